@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# each request's ORM calls run on a fresh thread, so a persistent connection
+# would never be reused, only left open: default to closing them (see README)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+# uvicorn workers run one event loop for their whole life: pool upstream connections on it
+from backend.http import pool_per_loop  # noqa: E402
+
+pool_per_loop()
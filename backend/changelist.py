@@ -0,0 +1,54 @@
+"""
+Admin changelists that stay fast on tables of 100k+ rows.
+
+Every changelist page runs a COUNT(*) for the paginator, and by default a
+second one for the "N total" next to the filters; on MySQL and PostgreSQL
+an unfiltered COUNT(*) reads the whole table. LargeTableAdmin drops the
+second count and pages unfiltered lists by the table statistics' row
+estimate instead (information_schema.TABLES on MySQL, pg_class on
+PostgreSQL). The estimate can be off by a few percent, so the last page may
+come up short or empty. Filtered and searched lists, small tables and other
+databases count exactly.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# below this many rows COUNT(*) is cheap and the exact page count is worth it
+ESTIMATE_MIN_ROWS = 10_000
+
+ESTIMATE_SQL = {
+    "mysql": "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+    "postgresql": "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+}
+
+
+def estimated_rows(queryset):
+    """The statistics' row count for `queryset`'s table, or None where there is none."""
+    connection = connections[queryset.db]
+    sql = ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for a table never analyzed
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where and not queryset.query.distinct:
+            estimate = estimated_rows(queryset)
+            if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin:
+    """ModelAdmin mixin: one (estimated, when unfiltered) count per changelist page."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,83 @@
+"""
+Primary/replica database routing.
+
+Catalog models (categories, subcategories, items, images) are read from the
+`replica` alias. Orders, payments and users stay on `default`, except inside
+`replica_reads(user_id)`, which the shipment-tracking endpoints use to move
+their order lookups to the replica as well.
+
+A user who wrote one of their orders in the last DB_REPLICA_PIN_SECONDS is
+pinned to the primary so they never read their own write back from a lagging
+replica. Without a `replica` entry in DATABASES everything stays on `default`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = "replica"
+
+CATALOG_MODELS = {
+    "rentals.category",
+    "rentals.subcategory",
+    "rentals.clothingitem",
+    "rentals.clothingitemimage",
+}
+ORDER_MODELS = {"rentals.rentalorder", "rentals.rentalorderitem"}
+
+_replica_scope = ContextVar("replica_scope", default=False)
+
+
+def has_replica():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Send this user's scoped reads to the primary for the pinning window."""
+    seconds = getattr(settings, "DB_REPLICA_PIN_SECONDS", 0)
+    if user_id and seconds and has_replica():
+        cache.set(_pin_key(user_id), True, seconds)
+
+
+def is_pinned(user_id):
+    return bool(user_id) and cache.get(_pin_key(user_id)) is not None
+
+
+@contextmanager
+def replica_reads(user_id=None):
+    """Read orders from the replica in this block, unless `user_id` is pinned."""
+    token = _replica_scope.set(has_replica() and not is_pinned(user_id))
+    try:
+        yield
+    finally:
+        _replica_scope.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not has_replica():
+            return None
+        # related lookups follow the instance's own database, and reads inside
+        # a transaction must see its uncommitted writes
+        if "instance" in hints or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        label = model._meta.label_lower
+        if label in CATALOG_MODELS or (label in ORDER_MODELS and _replica_scope.get()):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
@@ -0,0 +1,77 @@
+"""
+Shared httpx.AsyncClient for async views and upstream batches.
+
+An AsyncClient's connection pool belongs to the event loop that created it
+and holds sockets until closed. Under uvicorn (backend.asgi calls
+pool_per_loop()) each worker's loop lives as long as the process, so one
+client is kept per loop and reused by every request. Everywhere else loops
+are short-lived: async views served by WSGI get one per request, and
+`asyncio.run()` in commands and admin actions one per batch. There the
+outermost coroutine runs inside async_client_scope() (async views through
+@with_async_client), which opens a client for the block and closes it at
+the end.
+"""
+import asyncio
+import functools
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()
+_scoped = ContextVar("scoped_async_client", default=None)
+_pooled = False
+
+
+def pool_per_loop():
+    """Keep one client per event loop from now on: for servers whose loops last as long as the process."""
+    global _pooled
+    _pooled = True
+
+
+def _new_client():
+    import httpx
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(getattr(settings, "UPSTREAM_TIMEOUT", 15)),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
+@asynccontextmanager
+async def async_client_scope():
+    """Within the block, get_async_client() returns a client that is closed when the block exits (unless pooled)."""
+    if _pooled or _scoped.get() is not None:
+        yield get_async_client()
+        return
+    client = _new_client()
+    token = _scoped.set(client)  # tasks started in the block inherit it
+    try:
+        yield client
+    finally:
+        _scoped.reset(token)
+        await client.aclose()
+
+
+def with_async_client(view):
+    """Run an async view inside async_client_scope()."""
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        async with async_client_scope():
+            return await view(*args, **kwargs)
+    return wrapper
+
+
+def get_async_client():
+    client = _scoped.get()
+    if client is not None:
+        return client
+    if not _pooled:
+        # a client left on a short-lived loop would never be closed
+        raise RuntimeError("get_async_client() needs async_client_scope() outside ASGI workers")
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = _new_client()
+    return client
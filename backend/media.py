@@ -0,0 +1,159 @@
+"""
+Media (uploaded file) delivery.
+
+MEDIA_SERVE_MODE picks who moves the bytes:
+
+- "accel":    nginx, via `X-Accel-Redirect: MEDIA_ACCEL_PREFIX + path`
+- "sendfile": Apache mod_xsendfile / lighttpd, via `X-Sendfile: <absolute path>`
+- "django":   no front server; FileResponse (wsgi.file_wrapper / sendfile under
+              gunicorn) with ETag/If-None-Match and single Range support
+
+Product photos are stored under content-hashed names (ContentHashedUploadTo),
+so their URLs never change content and are cached as immutable.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from email.utils import formatdate
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.deconstruct import deconstructible
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+HASH_LENGTH = 20
+# <hash>.<ext>, optionally with the suffix storage adds when the name is taken
+_HASHED_NAME_RE = re.compile(r"(^|/)[0-9a-f]{%d}(_[A-Za-z0-9]{7})?\.\w+$" % HASH_LENGTH)
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentHashedUploadTo:
+    """
+    upload_to that names a file after its SHA-256 (`<prefix>/<hash>.<ext>`),
+    so a URL always serves the same bytes and can be cached forever.
+    """
+
+    def __init__(self, prefix, field="image"):
+        self.prefix = prefix
+        self.field = field
+
+    def __call__(self, instance, filename):
+        # called from FieldFile.save() while the upload is still attached
+        content = getattr(instance, self.field).file
+        return posixpath.join(self.prefix, hashed_name(content, filename))
+
+    def __eq__(self, other):
+        return (isinstance(other, ContentHashedUploadTo)
+                and (self.prefix, self.field) == (other.prefix, other.field))
+
+
+def hashed_name(fileobj, filename):
+    digest = hashlib.sha256()
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    ext = os.path.splitext(filename)[1].lower()
+    return digest.hexdigest()[:HASH_LENGTH] + ext
+
+
+def is_hashed_name(name):
+    return bool(_HASHED_NAME_RE.search(name))
+
+
+def _cache_control(path):
+    if is_hashed_name(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_SECONDS', 3600)}"
+
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single satisfiable `bytes=` range, None to send it all, False if unsatisfiable."""
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:  # suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(fullpath)
+    except (OSError, ValueError):
+        raise Http404("File not found")
+    if not os.path.isfile(fullpath):
+        raise Http404("File not found")
+
+    mode = getattr(settings, "MEDIA_SERVE_MODE", "django")
+    content_type = mimetypes.guess_type(fullpath)[0] or "application/octet-stream"
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        "Cache-Control": _cache_control(path),
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+
+    if mode in ("accel", "sendfile"):
+        # the front server handles conditional and range requests itself
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if mode == "accel":
+            # percent-encoded: nginx decodes the URI, and a raw non-ASCII or
+            # spaced name (a legacy upload) would be MIME-encoded by Django
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        else:
+            response["X-Sendfile"] = fullpath
+        return response
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        return HttpResponseNotModified(headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if "Range" in request.headers and (if_range is None or if_range == etag):
+        byte_range = _byte_range(request.headers["Range"], stat.st_size)
+    if byte_range is False:
+        return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(fullpath, start, end - start + 1), status=206,
+            content_type=content_type, headers=headers,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+        return response
+
+    return FileResponse(open(fullpath, "rb"), content_type=content_type, headers=headers)
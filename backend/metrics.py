@@ -0,0 +1,275 @@
+"""
+Low-overhead request metrics, exposed in Prometheus text format on /api/metrics.
+
+MetricsMiddleware records per-route latency histograms and SQL query
+count/time. Outbound calls (Shiprocket, Razorpay, Google, SMTP) are timed
+with track_external(). Everything lives in a per-process registry; when
+METRICS_DIR is set each worker also snapshots it to METRICS_DIR/<pid>.json
+(at most every METRICS_FLUSH_INTERVAL seconds) and the endpoint sums all
+snapshots, so numbers are correct across gunicorn workers.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+HELP = {
+    "http_request_duration_ms": ("histogram", "Request latency by route"),
+    "db_queries_total": ("counter", "SQL queries executed, by route"),
+    "db_query_duration_ms_total": ("counter", "Time spent in SQL, by route"),
+    "external_call_duration_ms": ("histogram", "Outbound call latency by service"),
+    "external_call_errors_total": ("counter", "Outbound calls that raised, by service"),
+    "slow_queries_total": ("counter", "SQL queries slower than SLOW_QUERY_MS"),
+}
+
+# Per-request accumulator, so outbound time can be attributed to the route
+_current = ContextVar("metrics_request", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        # key -> [bucket counts..., +Inf count, sum]
+        self.histograms = {}
+        self._last_flush = 0.0
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            self.counters[(name, labels)] += value
+
+    def observe(self, name, labels, value_ms):
+        with self._lock:
+            row = self.histograms.get((name, labels))
+            if row is None:
+                row = self.histograms[(name, labels)] = [0] * (len(BUCKETS_MS) + 2)
+            for i, bound in enumerate(BUCKETS_MS):
+                if value_ms <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += value_ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[n, list(lb), v] for (n, lb), v in self.counters.items()],
+                "histograms": [[n, list(lb), list(row)] for (n, lb), row in self.histograms.items()],
+            }
+
+    def maybe_flush(self):
+        directory = getattr(settings, "METRICS_DIR", None)
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+        now = time.monotonic()
+        if not directory or now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+
+registry = Registry()
+
+
+def inc(name, labels=(), value=1):
+    registry.inc(name, tuple(labels), value)
+
+
+@contextmanager
+def track_external(service):
+    """Time an outbound call: `with track_external("shiprocket"): requests.post(...)`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registry.inc("external_call_errors_total", (("service", service),))
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        registry.observe("external_call_duration_ms", (("service", service),), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats["external_ms"] += elapsed
+
+
+def _timed_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = _current.get()
+        if stats is not None:
+            stats["queries"] += 1
+            stats["sql_ms"] += elapsed
+        if elapsed > getattr(settings, "SLOW_QUERY_MS", 200):
+            registry.inc("slow_queries_total")
+            logger.warning("Slow query (%.0fms): %s", elapsed, sql[:1000])
+
+
+@receiver(connection_created)
+def _instrument_connection(sender, connection, **kwargs):
+    # Installed once per connection rather than per request. The ContextVar
+    # follows sync_to_async into worker threads, so async views are counted too.
+    if _timed_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_query)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = {"queries": 0, "sql_ms": 0.0, "external_ms": 0.0}
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = {"queries": 0, "sql_ms": 0.0, "external_ms": 0.0}
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, stats, start)
+
+    def _record(self, request, response, stats, start):
+        elapsed = (time.perf_counter() - start) * 1000
+        match = getattr(request, "resolver_match", None)
+        route = (match.route or match.view_name) if match else "unmatched"
+        registry.observe(
+            "http_request_duration_ms",
+            (("method", request.method), ("route", route), ("status", str(response.status_code // 100) + "xx")),
+            elapsed,
+        )
+        registry.inc("db_queries_total", (("route", route),), stats["queries"])
+        registry.inc("db_query_duration_ms_total", (("route", route),), stats["sql_ms"])
+        registry.maybe_flush()
+
+        if settings.DEBUG:
+            response["Server-Timing"] = (
+                f"app;dur={elapsed:.1f}, db;dur={stats['sql_ms']:.1f}, ext;dur={stats['external_ms']:.1f}"
+            )
+        return response
+
+
+class InstrumentedEmailBackend(EmailBackend):
+    """SMTP backend that reports send time as the "smtp" external service."""
+
+    def send_messages(self, email_messages):
+        with track_external("smtp"):
+            return super().send_messages(email_messages)
+
+
+# -- exposition ---------------------------------------------------------
+
+def _collect():
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(directory)
+    snapshots = []
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(directory, name)) as fh:
+                    snapshots.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+    return snapshots
+
+
+def _escape(value):
+    # the text format's label value escapes; DRF format-suffix routes contain a backslash
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    counters = defaultdict(float)
+    histograms = {}
+    for snap in _collect():
+        for name, labels, value in snap["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, row in snap["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(row))
+            for i, v in enumerate(row):
+                total[i] += v
+
+    lines = []
+    seen = set()
+
+    def header(name):
+        if name not in seen and name in HELP:
+            seen.add(name)
+            kind, text = HELP[name]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name)
+        lines.append(f"{name}{_labels(labels)} {value:g}")
+    for (name, labels), row in sorted(histograms.items()):
+        header(name)
+        for bound, count in zip(BUCKETS_MS, row):
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {row[-2]}")
+        lines.append(f"{name}_count{_labels(labels)} {row[-2]}")
+        lines.append(f"{name}_sum{_labels(labels)} {row[-1]:.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>`
+    when METRICS_TOKEN is set; without a token it is only served in DEBUG.
+    """
+    expected = getattr(settings, "METRICS_TOKEN", None)
+    if expected:
+        if request.headers.get("Authorization") != f"Bearer {expected}":
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,85 @@
+"""
+Query-count and latency budgets for tests.
+
+    with QueryBudget("item-list", max_queries=4, max_duplicates=0, max_ms=300):
+        client.get("/api/rentals/items/")
+
+Fails with every recorded query and the project frames that issued it, so
+an N+1 (e.g. a __str__ or nested serializer loading an FK per row) points
+straight at the offending line.
+"""
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+
+
+def _project_stack():
+    base = str(settings.BASE_DIR)
+    return [
+        f"{frame.filename[len(base) + 1:]}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(base)
+        and "site-packages" not in frame.filename
+        and not frame.filename.endswith(("query_budget.py", "tests.py"))
+    ]
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class QueryBudget:
+    label: str
+    max_queries: int
+    max_duplicates: int = 0
+    max_ms: float = 500
+
+    def __enter__(self):
+        self.queries = []
+        self._wrapper = connection.execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed_ms = (time.perf_counter() - self._start) * 1000
+        self._wrapper.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def _record(self, execute, sql, params, many, context):
+        # sql still holds placeholders, so an N+1 repeats the exact same string
+        self.queries.append((sql, params, _project_stack()))
+        return execute(sql, params, many, context)
+
+    @property
+    def duplicates(self):
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return sum(n - 1 for n in counts.values() if n > 1)
+
+    def check(self):
+        problems = []
+        if len(self.queries) > self.max_queries:
+            problems.append(f"{len(self.queries)} queries (budget {self.max_queries})")
+        if self.duplicates > self.max_duplicates:
+            problems.append(f"{self.duplicates} duplicate queries (budget {self.max_duplicates})")
+        if self.elapsed_ms > self.max_ms:
+            problems.append(f"{self.elapsed_ms:.0f}ms (budget {self.max_ms:.0f}ms)")
+        if problems:
+            raise BudgetExceeded(f"{self.label}: {', '.join(problems)}\n\n{self.report()}")
+
+    def report(self):
+        counts = Counter(sql for sql, _, _ in self.queries)
+        lines = []
+        for i, (sql, params, stack) in enumerate(self.queries, 1):
+            repeated = counts[sql]
+            marker = f" [x{repeated}]" if repeated > 1 else ""
+            lines.append(f"{i}.{marker} {sql} -- {params!r}")
+            lines.extend(f"      {frame}" for frame in stack[-4:])
+        return "\n".join(lines)
@@ -0,0 +1,89 @@
+"""
+Precomputed OpenAPI schema.
+
+drf-spectacular introspects every view and serializer to build the schema,
+which is far too slow to do per request. `manage.py build_schema` writes it to
+OPENAPI_SCHEMA_FILE at deploy time (and `--check` fails when the committed
+file drifts from the code); the view serves that file, or a schema generated
+once per process when the file is missing or DEBUG is on, with a strong ETag
+and gzip.
+"""
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+
+def generate_schema():
+    """Build the OpenAPI document from the code, as pretty-printed JSON bytes."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+
+    import users.schema  # noqa: F401  (registers the CachedJWTAuthentication extension)
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={"indent": 2}) + b"\n"
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return cls(body=body, gzipped=gzip.compress(body, 9, mtime=0), etag=f'"{digest}"')
+
+    @property
+    def gzip_etag(self):
+        # strong validators differ per content encoding
+        return self.etag[:-1] + '-gzip"'
+
+
+_lock = threading.Lock()
+_compiled = None
+
+
+def get_schema():
+    global _compiled
+    if _compiled is None:
+        with _lock:
+            if _compiled is None:
+                _compiled = CompiledSchema.from_body(_load_body())
+    return _compiled
+
+
+def _load_body():
+    if not settings.DEBUG:
+        try:
+            with open(settings.OPENAPI_SCHEMA_FILE, "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            pass
+    return generate_schema()
+
+
+@require_safe
+def schema_view(request):
+    schema = get_schema()
+    use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+    etag = schema.gzip_etag if use_gzip else schema.etag
+
+    if {schema.etag, schema.gzip_etag} & set(parse_etags(request.headers.get("If-None-Match", ""))):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(schema.gzipped if use_gzip else schema.body,
+                                content_type="application/vnd.oai.openapi+json")
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"  # revalidate; a 304 costs nothing
+    response["Vary"] = "Accept-Encoding"
+    return response
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
+    'backend.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -63,32 +65,86 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 AUTH_USER_MODEL = "users.CustomUser"
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# ✅ Database from .env: DB_ENGINE=mysql uses the PA_MYSQL_* variables,
+# anything else a local SQLite file (WAL so readers don't block the writer)
+# (backend.asgi defaults it to 0: ASGI requests run their queries on fresh threads)
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
+if os.getenv("DB_ENGINE") == "mysql":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.getenv("PA_MYSQL_NAME"),
+            'USER': os.getenv("PA_MYSQL_USER"),
+            'PASSWORD': os.getenv("PA_MYSQL_PASSWORD"),
+            'HOST': os.getenv("PA_MYSQL_HOST"),
+            'PORT': os.getenv("PA_MYSQL_PORT"),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'charset': 'utf8mb4'},
+        }
+    }
+    # Optional read replica for catalog and tracking reads (backend.db_router)
+    if os.getenv("PA_MYSQL_REPLICA_HOST"):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'USER': os.getenv("PA_MYSQL_REPLICA_USER", DATABASES['default']['USER']),
+            'PASSWORD': os.getenv("PA_MYSQL_REPLICA_PASSWORD", DATABASES['default']['PASSWORD']),
+            'HOST': os.getenv("PA_MYSQL_REPLICA_HOST"),
+            'PORT': os.getenv("PA_MYSQL_REPLICA_PORT", DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'timeout': int(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),  # seconds to wait for the write lock
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
-}
 
-# # ✅ Database from .env
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': os.getenv("PA_MYSQL_NAME"),
-#         'USER': os.getenv("PA_MYSQL_USER"),
-#         'PASSWORD': os.getenv("PA_MYSQL_PASSWORD"),
-#         'HOST': os.getenv("PA_MYSQL_HOST"),
-#         'PORT': os.getenv("PA_MYSQL_PORT"),
-#     }
-# }
+DATABASE_ROUTERS = ['backend.db_router.PrimaryReplicaRouter']
+
+# Seconds a user's tracking reads stay on the primary after they write an order
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson when installed, stock DRF json otherwise (backend.renderers)
+    "DEFAULT_RENDERER_CLASSES": (
+        "backend.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "backend.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # backend.throttling scopes, as "<requests>/<second|minute|hour|day>"
+    "DEFAULT_THROTTLE_RATES": {
+        "catalog": os.getenv("THROTTLE_CATALOG_RATE", "120/min"),
+        "auth": os.getenv("THROTTLE_AUTH_RATE", "10/min"),
+        "upload": os.getenv("THROTTLE_UPLOAD_RATE", "60/hour"),
+        # a request per keystroke
+        "autocomplete": os.getenv("THROTTLE_AUTOCOMPLETE_RATE", "600/min"),
+    },
+    # reverse proxies in front of the app; throttles then take the client address
+    # from X-Forwarded-For instead of REMOTE_ADDR
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
 }
 
+# Responses smaller than this are sent uncompressed (backend.compression)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "My Rental API",
     "DESCRIPTION": "All the endpoints for categories, items, orders, etc.",
@@ -96,6 +152,9 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Built by `manage.py build_schema` and served by /api/schema/ (backend.schema)
+OPENAPI_SCHEMA_FILE = BASE_DIR / "openapi.json"
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -103,12 +162,62 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# ✅ Shared cache (set REDIS_URL in production so all workers see the same entries)
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds an authenticated user stays cached by CachedJWTAuthentication (0 disables)
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+
+# Serve the admin user directory's order stats from the UserOrderStats table
+# (refresh with `manage.py refresh_user_stats`) instead of aggregating per request
+USER_STATS_DENORMALIZED = os.getenv("USER_STATS_DENORMALIZED", "False") == "True"
+
+# `manage.py archive_data` moves completed orders this long past their end date
+ARCHIVE_ORDERS_AFTER_DAYS = int(os.getenv("ARCHIVE_ORDERS_AFTER_DAYS", "180"))
+
+# Order lifecycle (`manage.py advance_orders`, see rentals.lifecycle)
+ORDER_PENDING_EXPIRY_HOURS = int(os.getenv("ORDER_PENDING_EXPIRY_HOURS", "48"))
+ORDER_RETURN_GRACE_DAYS = int(os.getenv("ORDER_RETURN_GRACE_DAYS", "7"))
+TRACKING_CONCURRENCY = int(os.getenv("TRACKING_CONCURRENCY", "10"))
+
 # ✅ Load sensitive values from .env
 SHIPROCKET_EMAIL = os.getenv("SHIPROCKET_EMAIL")
 SHIPROCKET_PASSWORD = os.getenv("SHIPROCKET_PASSWORD")
 SHIPROCKET_BASE_URL = os.getenv("SHIPROCKET_BASE_URL")
+# Warehouse address parcels ship from and returns go back to
+SHIPROCKET_PICKUP_PINCODE = os.getenv("SHIPROCKET_PICKUP_PINCODE", "411042")
+SHIPROCKET_PICKUP_CITY = os.getenv("SHIPROCKET_PICKUP_CITY", "Pune")
+SHIPROCKET_PICKUP_STATE = os.getenv("SHIPROCKET_PICKUP_STATE", "Maharashtra")
+PARCEL_WEIGHT_PER_ITEM_KG = float(os.getenv("PARCEL_WEIGHT_PER_ITEM_KG", "0.5"))
+
+# Search-box suggestions (rentals.autocomplete): names kept in each process's
+# index, and seconds before it is rebuilt anyway (changes are replayed, so this
+# only bounds what a lost change can leave stale)
+AUTOCOMPLETE_MAX_ENTRIES = int(os.getenv("AUTOCOMPLETE_MAX_ENTRIES", "50000"))
+AUTOCOMPLETE_MAX_AGE = int(os.getenv("AUTOCOMPLETE_MAX_AGE", "3600"))
+
+# Navigation menu tree (rentals.catalog_tree): seconds a cached tree is kept,
+# the limit on staleness from changes that bypass the ORM's signals
+CATALOG_TREE_TTL = int(os.getenv("CATALOG_TREE_TTL", "3600"))
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Courier serviceability cache (rentals.serviceability): seconds an answer is
+# kept, and the weight step (kg) parcels are rounded up to for its key
+SERVICEABILITY_TTL = int(os.getenv("SERVICEABILITY_TTL", str(12 * 3600)))
+SERVICEABILITY_WEIGHT_STEP_KG = float(os.getenv("SERVICEABILITY_WEIGHT_STEP_KG", "0.5"))
+
+EMAIL_BACKEND = 'backend.metrics.InstrumentedEmailBackend'  # SMTP, timed for /api/metrics
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
@@ -116,9 +225,25 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Google sign-in: GOOGLE_CLIENT_ID enables the audience check, GOOGLE_CERTS_FILE
+# points at a local copy of Google's signing keys (offline tests/benchmarks)
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CERTS_FILE = os.getenv("GOOGLE_CERTS_FILE")
+
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 
+# ✅ Serve the Shiprocket/Google-bound endpoints with async views (see README)
+ASYNC_UPSTREAM_VIEWS = os.getenv("ASYNC_UPSTREAM_VIEWS", "True") == "True"
+UPSTREAM_TIMEOUT = int(os.getenv("UPSTREAM_TIMEOUT", "15"))
+
+# ✅ Metrics (/api/metrics): METRICS_DIR shares counters across gunicorn workers,
+# METRICS_TOKEN protects the endpoint outside DEBUG
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "200"))
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'Asia/Kolkata'
 USE_I18N = True
@@ -130,4 +255,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/api/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# ✅ Who sends media files (backend.media): "django" streams them itself,
+# "accel" hands them to nginx (X-Accel-Redirect to an `internal` location at
+# MEDIA_ACCEL_PREFIX), "sendfile" to Apache/lighttpd (X-Sendfile)
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+MEDIA_CACHE_SECONDS = int(os.getenv("MEDIA_CACHE_SECONDS", "3600"))  # for files without a content hash
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
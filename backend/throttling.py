@@ -0,0 +1,93 @@
+"""
+Scoped request throttles backed by fixed-window cache counters.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client and
+rewrites it on every request (a get and a set of a growing value). Here each
+client has one integer per window: `cache.add()` starts it with the window's
+TTL and `cache.incr()` bumps it, atomic on Redis and cheap on LocMem. A
+burst of up to twice the rate can straddle a window boundary, which is fine
+for scraper and abuse control.
+
+Decisions read the client address or the already-authenticated user
+(CachedJWTAuthentication), never the database, and are counted in
+`throttle_requests_total{scope, result}`. Rates come from
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]; a scope set to None is not
+throttled.
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from backend.metrics import inc
+
+
+class CounterThrottle(SimpleRateThrottle):
+    cache_format = "throttle:%(scope)s:%(ident)s:%(window)s"
+
+    def get_rate(self):
+        # read per instance, so override_settings applies
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_key(self, request, view):
+        """What to count requests against, or None to let the request through."""
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return None
+        window = int(self.timer()) // self.duration
+        return self.cache_format % {"scope": self.scope, "ident": ident, "window": window}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.cache.add(key, 0, self.duration + 1)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:  # expired between add() and incr()
+            self.cache.set(key, 1, self.duration + 1)
+            count = 1
+        allowed = count <= self.num_requests
+        inc("throttle_requests_total", (("scope", self.scope), ("result", "allowed" if allowed else "throttled")))
+        return allowed
+
+    def wait(self):
+        return self.duration - int(self.timer()) % self.duration
+
+
+class CatalogThrottle(CounterThrottle):
+    """Anonymous catalog reads, per client address."""
+    scope = "catalog"
+
+    def get_ident_key(self, request, view):
+        if request.method not in SAFE_METHODS or request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class AutocompleteThrottle(CatalogThrottle):
+    """Anonymous search-box suggestions, with a rate of their own."""
+    scope = "autocomplete"
+
+
+class AuthThrottle(CounterThrottle):
+    """OTP and login requests, per client address (also used by the async Google login)."""
+    scope = "auth"
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UploadThrottle(CounterThrottle):
+    """Catalog writes (multipart image uploads), per user."""
+    scope = "upload"
+
+    def get_ident_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        user = request.user
+        return f"user-{user.pk}" if user.is_authenticated else self.get_ident(request)
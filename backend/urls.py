@@ -14,18 +14,41 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+from functools import cache
+
 from django.contrib import admin
-from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from backend.media import serve_media
+from backend.metrics import metrics_view
+from backend.schema import schema_view
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """
+    Class-based view imported on its first request rather than at URLconf
+    load, for heavy optional modules like drf_spectacular's Swagger UI.
+    """
+    @cache
+    def load():
+        return import_string(dotted_path).as_view(**initkwargs)
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        return load()(request, *args, **kwargs)
+
+    return view
+
 
 urlpatterns = [
     path('api/admin/', admin.site.urls),
     path('api/auth/',include("users.urls")),
     path("api/rentals/", include("rentals.urls")),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/',   SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-
-
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('api/schema/', schema_view, name='schema'),
+    path('api/docs/',   lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/metrics', metrics_view, name='metrics'),
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+]
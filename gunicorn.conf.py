@@ -0,0 +1,43 @@
+"""
+Gunicorn settings, picked up automatically from the project root:
+
+    gunicorn backend.asgi:application      # uvicorn workers (default)
+    GUNICORN_WORKER_CLASS=sync gunicorn backend.wsgi:application
+
+The app is loaded once in the master and forked, so Django, DRF and the
+payment/courier/Google SDKs warmed in when_ready() are shared copy-on-write
+between workers instead of being imported again in each of them.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+# Loaded lazily by the views; import them before forking so workers share them
+PRELOAD_MODULES = (
+    "razorpay",
+    "requests",
+    "google.oauth2.id_token",
+    "users.services.google_transport",
+    "httpx",
+)
+
+
+def when_ready(server):
+    from importlib import import_module
+
+    from django.db import connections
+
+    for name in PRELOAD_MODULES:
+        import_module(name)
+    # nothing opened in the master may be inherited by workers
+    connections.close_all()
+    # keep the collector from touching (and so copying) preloaded objects
+    gc.freeze()
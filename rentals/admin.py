@@ -1,15 +1,25 @@
 # rentals/admin.py
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
+from backend.changelist import LargeTableAdmin
+from .bulk import bulk_set_status
 from .models import Category, SubCategory, ClothingItem, ClothingItemImage, RentalOrder, SIZE_CHOICES, RentalOrderItem
+from .shipments import MAX_SHIPMENTS, create_shipments
+
+# Large tables: one estimated COUNT per changelist page (backend.changelist), and
+# foreign keys edited through autocomplete widgets rather than a <select> of every row
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("id", "name", "slug", "image")
+    search_fields = ("name", "slug")
 
 @admin.register(SubCategory)
-class SubCategoryAdmin(admin.ModelAdmin):
+class SubCategoryAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("id", "name", "slug", "category", "image")
+    list_select_related = ("category",)
+    search_fields = ("name", "slug")
+    autocomplete_fields = ("category",)
 
 
 class ClothingItemImageInline(admin.TabularInline):  # or admin.StackedInline
@@ -18,10 +28,12 @@ class ClothingItemImageInline(admin.TabularInline):  # or admin.StackedInline
     fields = ("image",)
 
 @admin.register(ClothingItem)
-class ClothingItemAdmin(admin.ModelAdmin):
+class ClothingItemAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ('name', 'category', 'subcategory', 'available', 'daily_rate')
+    list_select_related = ('category', 'subcategory__category')
     list_filter = ('available', 'category', 'subcategory')
     search_fields = ('name',)
+    autocomplete_fields = ('category', 'subcategory')
     inlines = [ClothingItemImageInline]
     
 
@@ -38,8 +50,10 @@ class ClothingItemAdmin(admin.ModelAdmin):
         
 
 @admin.register(ClothingItemImage)
-class ClothingItemImageAdmin(admin.ModelAdmin):
+class ClothingItemImageAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("id","item","image")
+    list_select_related = ("item__category", "item__subcategory__category")
+    autocomplete_fields = ("item",)
 
 # class RentalOrderForm(forms.ModelForm):
 #     size = forms.ChoiceField(choices=[])  # placeholder
@@ -72,12 +86,67 @@ class ClothingItemImageAdmin(admin.ModelAdmin):
 class RentalOrderItemInline(admin.TabularInline):
     model = RentalOrderItem
     extra = 1
+    autocomplete_fields = ("item",)
+
+    def get_queryset(self, request):
+        # each row is labelled with its item
+        return super().get_queryset(request).select_related("item")
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "item":
+            # the widget renders the chosen item's __str__, which names its categories
+            kwargs["queryset"] = ClothingItem.objects.select_related("category", "subcategory")
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+def status_action(to_status):
+    """An admin action moving the selected orders to `to_status` (rentals.lifecycle rules apply)."""
+    label = dict(RentalOrder.STATUS_CHOICES)[to_status].lower()
+
+    @admin.action(description=f"Mark selected orders as {label}", permissions=["change"])
+    def action(modeladmin, request, queryset):
+        moved, skipped = bulk_set_status(queryset.values_list("pk", flat=True), to_status, "admin")
+        modeladmin.message_user(request, f"{moved} order(s) marked as {label}.")
+        if skipped:
+            modeladmin.message_user(
+                request, f"{len(skipped)} order(s) can't go to {label} from their status and were left alone.",
+                messages.WARNING,
+            )
+
+    action.__name__ = f"mark_{to_status}"
+    return action
+
+
+def shipment_action(returns):
+    noun = "return pickup" if returns else "shipment"
+    eligible = "shipped or delivered orders without one" if returns else "active orders without one"
+
+    @admin.action(description=f"Create Shiprocket {noun}s", permissions=["change"])
+    def action(modeladmin, request, queryset):
+        created, failed = create_shipments(queryset, returns=returns)
+        modeladmin.message_user(
+            request, f"{created} {noun}(s) created ({eligible} only, at most {MAX_SHIPMENTS} at a time).",
+        )
+        if failed:
+            modeladmin.message_user(request, f"{failed} {noun}(s) failed; try them again.", messages.ERROR)
+
+    action.__name__ = "create_returns" if returns else "create_shipments"
+    return action
 
 
 @admin.register(RentalOrder)
-class RentalOrderAdmin(admin.ModelAdmin):
+class RentalOrderAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("id", "user_name", "user_email", "start_date", "end_date", "status", "total_price")
+    list_select_related = ("user",)
+    # backed by the RentalOrder indexes
+    list_filter = ("status", "start_date", "created_at")
+    autocomplete_fields = ("user",)
     inlines = [RentalOrderItemInline]
+    actions = [
+        *(status_action(s) for s in ("shipped", "delivered", "return_picked", "completed", "cancelled")),
+        shipment_action(returns=False),
+        shipment_action(returns=True),
+    ]
 
     def user_name(self, obj):
         return obj.user.get_full_name() or obj.user.username
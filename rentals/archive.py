@@ -0,0 +1,93 @@
+# rentals/archive.py
+"""
+Keeps the live tables sized to the working set (`manage.py archive_data`).
+
+- Completed and cancelled orders that ended more than
+  ARCHIVE_ORDERS_AFTER_DAYS ago move, with their lines, to
+  ArchivedRentalOrder/ArchivedRentalOrderItem under the same ids: copy and
+  delete in one transaction per batch. The order API
+  still serves them (RentalOrderViewSet), rollups read both tables, and
+  `orders_archived` tells other apps which users' orders moved.
+- Expired OTP requests and expired JWT outstanding/blacklisted tokens are
+  deleted, a batch of primary keys per transaction.
+
+Batches keep each transaction (and its locks) short, so the job can run
+while the site is up. Archive tables rather than database partitioning:
+MySQL cannot partition tables that have foreign keys.
+"""
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from users.models import OTPRequest
+from .models import ArchivedRentalOrder, ArchivedRentalOrderItem, RentalOrder, RentalOrderItem
+
+ARCHIVED_STATUSES = ("completed", "cancelled")
+OTP_RETENTION = timedelta(days=1)  # codes expire after 10 minutes
+DEFAULT_BATCH_SIZE = 500
+
+# sent after each archived batch with user_ids: the owners of the moved orders
+orders_archived = Signal()
+
+_archiving = ContextVar("archiving", default=False)
+
+
+def is_archiving():
+    """True while archive_orders() deletes the live copies; delete signal handlers skip their work."""
+    return _archiving.get()
+
+
+def archive_cutoff(today=None):
+    return (today or timezone.localdate()) - timedelta(days=settings.ARCHIVE_ORDERS_AFTER_DAYS)
+
+
+def archive_orders(before, batch_size=DEFAULT_BATCH_SIZE):
+    """Move closed orders that ended before `before` to the archive. Yields (orders, lines) per batch."""
+    candidates = RentalOrder.objects.filter(status__in=ARCHIVED_STATUSES, end_date__lt=before).order_by("pk")
+    order_fields = [f.attname for f in ArchivedRentalOrder._meta.concrete_fields if f.name != "archived_at"]
+    line_fields = [f.attname for f in ArchivedRentalOrderItem._meta.concrete_fields]
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            ids = list(candidates.filter(pk__gt=last_pk).select_for_update().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return
+            orders = list(RentalOrder.objects.filter(pk__in=ids).values(*order_fields))
+            lines = list(RentalOrderItem.objects.filter(order_id__in=ids).values(*line_fields))
+            ArchivedRentalOrder.objects.bulk_create([ArchivedRentalOrder(**row) for row in orders])
+            ArchivedRentalOrderItem.objects.bulk_create([ArchivedRentalOrderItem(**row) for row in lines])
+            token = _archiving.set(True)
+            try:
+                RentalOrder.objects.filter(pk__in=ids).delete()  # lines cascade
+            finally:
+                _archiving.reset(token)
+            orders_archived.send(sender=ArchivedRentalOrder, user_ids={row["user_id"] for row in orders})
+        yield len(orders), len(lines)
+        last_pk = ids[-1]
+
+
+def delete_in_batches(queryset, batch_size=1000):
+    """Delete the rows of `queryset`, `batch_size` primary keys per transaction. Returns rows matched."""
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    total = 0
+    while batch := list(pks[:batch_size]):
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=batch).delete()
+        total += len(batch)
+    return total
+
+
+def purge_expired_otps(now=None, batch_size=1000):
+    now = now or timezone.now()
+    return delete_in_batches(OTPRequest.objects.filter(created_at__lt=now - OTP_RETENTION), batch_size)
+
+
+def purge_expired_tokens(now=None, batch_size=1000):
+    """Like simplejwt's flushexpiredtokens, in batches; blacklist entries cascade."""
+    now = now or timezone.now()
+    return delete_in_batches(OutstandingToken.objects.filter(expires_at__lt=now), batch_size)
@@ -0,0 +1,109 @@
+# rentals/async_views.py
+"""
+Async versions of the Shiprocket-bound ShippingViewSet actions.
+
+Under ASGI a slow courier API call only parks a coroutine instead of holding
+a worker thread, so catalog requests keep flowing. Same URLs, auth and
+response shapes as the DRF actions; enabled by ASYNC_UPSTREAM_VIEWS.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.db_router import replica_reads
+from backend.http import with_async_client
+from users.authentication import CachedJWTAuthentication
+from .models import RentalOrder
+from .services.shiprocket import summarize_tracking
+from .services.shiprocket_async import AsyncShiprocketAPI
+
+
+async def _authenticated_user(request):
+    try:
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def _unauthorized():
+    return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+
+async def _user_order(request, pk, with_items=False, replica=False):
+    user = await _authenticated_user(request)
+    if user is None:
+        return None, _unauthorized()
+    orders = RentalOrder.objects.filter(user=user)
+    if with_items:
+        # payload building runs in the event loop, so load everything up front
+        orders = orders.prefetch_related("items__item")
+    if replica:
+        with replica_reads(user.pk):
+            order = await orders.filter(pk=pk).afirst()
+    else:
+        order = await orders.filter(pk=pk).afirst()
+    if order is None:
+        return None, JsonResponse({"error": "Order not found"}, status=404)
+    return order, None
+
+
+@csrf_exempt
+@require_POST
+@with_async_client
+async def create_shipment(request, pk):
+    order, error = await _user_order(request, pk, with_items=True)
+    if error:
+        return error
+
+    resp = await AsyncShiprocketAPI().create_order(order)
+
+    order.shiprocket_awb = resp["awb_code"]
+    order.shiprocket_shipment_id = resp["shipment_id"]
+    await order.asave(update_fields=["shiprocket_awb", "shiprocket_shipment_id"])
+
+    return JsonResponse({"shipment": resp})
+
+
+@require_GET
+@with_async_client
+async def track_shipment(request, pk):
+    order, error = await _user_order(request, pk, replica=True)
+    if error:
+        return error
+
+    if not order.shiprocket_shipment_id:
+        return JsonResponse({"error": "No shipment created for this order"}, status=400)
+
+    resp = await AsyncShiprocketAPI().track_order(order.shiprocket_shipment_id)
+
+    return JsonResponse({
+        "order_id": order.id,
+        "shipment_id": order.shiprocket_shipment_id,
+        **summarize_tracking(resp, order.shiprocket_shipment_id),
+    })
+
+
+@csrf_exempt
+@require_POST
+@with_async_client
+async def create_return(request, pk):
+    """
+    Trigger a Shiprocket reverse-pickup (return) for this order.
+    """
+    order, error = await _user_order(request, pk, with_items=True)
+    if error:
+        return error
+
+    if not order.shiprocket_shipment_id:
+        return JsonResponse({"error": "Forward shipment not ready yet"}, status=400)
+
+    resp = await AsyncShiprocketAPI().create_return_order(order)
+
+    order.return_shipment_id = resp.get("shipment_id")
+    order.return_awb = resp.get("awb_code")
+    await order.asave(update_fields=["return_shipment_id", "return_awb"])
+
+    return JsonResponse({"return_shipment": resp})
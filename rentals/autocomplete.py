@@ -0,0 +1,272 @@
+# rentals/autocomplete.py
+"""
+Search-box suggestions from an in-memory prefix index.
+
+Every word of every item, subcategory and category name gets a posting
+list of the names using it, kept best-ranked first, and the words
+themselves are kept sorted. The words starting with the typed prefix are
+one bisect away, and merging their lists yields matches best first, so a
+lookup stops after `limit` of them. No query runs per keystroke, and no
+`icontains` scan either. Each word typed must prefix some word of the
+name ("red leh" finds "Red Silk Lehenga"). Matches rank available first,
+then by popularity: ItemPopularity, SubCategoryPopularity, and for a category
+the sum of its subcategories' scores.
+
+The index is built per process on first use (three queries, on the primary:
+the catalog replica may lag behind the change that triggered the build) and
+capped at AUTOCOMPLETE_MAX_ENTRIES names, the least popular items dropped
+first. Saves and deletes (rentals.signals) patch it in place after commit,
+bump a version in the cache and store the change itself under that version.
+Other processes replay the changes they missed on their next lookup. They
+rebuild only when a change is gone from the cache, more than MAX_REPLAY
+behind, or a rebuild was asked for. Bulk changes that send no signals call
+invalidate() to ask for one. Every process also rebuilds after
+AUTOCOMPLETE_MAX_AGE seconds, in case a change was lost.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from .models import Category, ClothingItem, SubCategory
+
+VERSION_KEY = "autocomplete:version"
+CHANGE_KEY = "autocomplete:change:{}"  # the change that made each version
+MAX_REPLAY = 200  # changes a process catches up on before it rebuilds instead
+REBUILD = ("rebuild", None)
+MAX_WORDS = 8  # per name
+MAX_NAME_LENGTH = 100
+MAX_LIMIT = 20
+# prefixes this short match too many words to merge per keystroke: their
+# best TOP_PER_PREFIX names are kept ready instead
+SHORT_PREFIX = 2
+TOP_PER_PREFIX = 100
+
+Entry = namedtuple("Entry", "kind id name slug words rank")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def words(text):
+    """Lowercased, accent-free words of `text`."""
+    if text.isascii():
+        return _WORD_RE.findall(text.lower())
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return _WORD_RE.findall("".join(c for c in text if not unicodedata.combining(c)))
+
+
+def make_entry(kind, pk, name, slug=None, available=True, score=None):
+    name = name[:MAX_NAME_LENGTH]
+    return Entry(
+        kind, pk, name, slug, tuple(dict.fromkeys(words(name)))[:MAX_WORDS],
+        (not available, -(score or 0.0), len(name), kind, pk),
+    )
+
+
+class PrefixIndex:
+    def __init__(self, entries, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.entries = {(e.kind, e.id): e for e in entries}
+        postings = defaultdict(list)
+        for e in self.entries.values():
+            for word in e.words:
+                postings[word].append((e.rank, e.kind, e.id))
+        for posting in postings.values():
+            posting.sort()
+        self.postings = dict(postings)  # word -> (rank, kind, id), best first
+        self.vocabulary = sorted(self.postings)
+        short = defaultdict(set)
+        for word, posting in self.postings.items():
+            for prefix in _short_prefixes(word):
+                short[prefix].update(posting[:TOP_PER_PREFIX])
+        self.short = {prefix: heapq.nsmallest(TOP_PER_PREFIX, rows) for prefix, rows in short.items()}
+
+    def search(self, query, limit=10):
+        wanted = words(query)[:MAX_WORDS]
+        if not wanted:
+            return []
+        head = max(wanted, key=len)  # the most selective word picks the candidates
+        if len(head) <= SHORT_PREFIX:
+            lists = [self.short.get(head, ())]
+        else:
+            i = bisect_left(self.vocabulary, head)
+            lists = []
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(head):
+                lists.append(self.postings.get(self.vocabulary[i], ()))
+                i += 1
+        # merging the best-first lists yields candidates best first: stop at `limit`.
+        # Lock-free: a concurrent patch can only repeat or skip one candidate.
+        found, seen = [], set()
+        for _, kind, pk in heapq.merge(*lists):
+            entry = self.entries.get((kind, pk))
+            if entry is None or (kind, pk) in seen:
+                continue
+            seen.add((kind, pk))
+            if all(any(word.startswith(w) for word in entry.words) for w in wanted):
+                found.append(entry)
+                if len(found) == limit:
+                    break
+        return found
+
+    def upsert(self, entry):
+        key = (entry.kind, entry.id)
+        old = self.entries.get(key)
+        if old is None and len(self.entries) >= settings.AUTOCOMPLETE_MAX_ENTRIES:
+            return  # full: the next rebuild decides what stays
+        if old is not None:
+            entry = entry._replace(rank=(entry.rank[0], old.rank[1], *entry.rank[2:]))  # keep its score
+            self._drop_postings(old)
+        self.entries[key] = entry
+        row = (entry.rank, entry.kind, entry.id)
+        for word in entry.words:
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = []
+                insort(self.vocabulary, word)
+            insort(posting, row)
+        for prefix in {p for word in entry.words for p in _short_prefixes(word)}:
+            top = self.short.setdefault(prefix, [])
+            insort(top, row)
+            del top[TOP_PER_PREFIX:]
+
+    def remove(self, kind, pk):
+        old = self.entries.pop((kind, pk), None)
+        if old is not None:
+            self._drop_postings(old)
+
+    def _drop_postings(self, entry):
+        row = (entry.rank, entry.kind, entry.id)
+        lists = [self.postings.get(word, []) for word in entry.words]
+        # (a short list left under TOP_PER_PREFIX fills up again at the next rebuild)
+        lists += [self.short.get(p, []) for p in {p for word in entry.words for p in _short_prefixes(word)}]
+        for rows in lists:
+            i = bisect_left(rows, row)
+            if i < len(rows) and rows[i] == row:
+                del rows[i]
+
+
+def _short_prefixes(word):
+    return [word[:n] for n in range(1, min(len(word), SHORT_PREFIX) + 1)]
+
+
+def build_index(version=0):
+    subcategories = list(SubCategory.objects.using(DEFAULT_DB_ALIAS).values_list("pk", "name", "slug", "category_id", "popularity__score"))
+    category_scores = {}
+    for _, _, _, category_id, score in subcategories:
+        category_scores[category_id] = category_scores.get(category_id, 0.0) + (score or 0.0)
+    entries = [
+        make_entry("category", pk, name, slug, score=category_scores.get(pk))
+        for pk, name, slug in Category.objects.using(DEFAULT_DB_ALIAS).values_list("pk", "name", "slug")
+    ]
+    entries += [make_entry("subcategory", pk, name, slug, score=score) for pk, name, slug, _, score in subcategories]
+    room = max(settings.AUTOCOMPLETE_MAX_ENTRIES - len(entries), 0)
+    items = ClothingItem.objects.using(DEFAULT_DB_ALIAS).order_by("-available", F("popularity__score").desc(nulls_last=True), "pk")
+    entries += [
+        make_entry("item", pk, name, available=available, score=score)
+        for pk, name, available, score in items.values_list("pk", "name", "available", "popularity__score")[:room]
+    ]
+    return PrefixIndex(entries, version)
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def _publish(change):
+    """Bump the version and store `change` (("upsert", entry), ("remove", (kind, pk)) or REBUILD) under it."""
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(VERSION_KEY, 1, timeout=None)
+        version = 1
+    cache.set(CHANGE_KEY.format(version), change, settings.AUTOCOMPLETE_MAX_AGE)
+    return version
+
+
+def _apply(index, change):
+    op, arg = change
+    if op == "upsert":
+        index.upsert(arg)
+    else:
+        index.remove(*arg)
+
+
+def _catch_up(index, version):
+    """Replay the changes from index.version to `version` onto `index`; False if some are missing."""
+    if not index.version < version <= index.version + MAX_REPLAY:
+        return False
+    keys = [CHANGE_KEY.format(v) for v in range(index.version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys) or REBUILD in changes.values():
+        return False
+    if not _lock.acquire(blocking=False):
+        return True  # being caught up or rebuilt by another thread: answer from it as it is
+    try:
+        for v in range(index.version + 1, version + 1):  # another thread may have replayed some
+            _apply(index, changes[CHANGE_KEY.format(v)])
+            index.version = v
+    finally:
+        _lock.release()
+    return True
+
+
+def get_index():
+    """This process's index: caught up with other processes' changes, or (re)built if that isn't possible."""
+    global _index
+    version = cache.get(VERSION_KEY, 0)
+    index = _index
+    if index is not None and time.monotonic() - index.built_at < settings.AUTOCOMPLETE_MAX_AGE:
+        if index.version == version or (_index is index and _catch_up(index, version)):
+            return index
+    # one thread rebuilds; the others keep answering from the old index meanwhile
+    if not _lock.acquire(blocking=index is None):
+        return index
+    try:
+        if _index is index:  # not rebuilt by another thread meanwhile
+            _index = build_index(version)
+        return _index
+    finally:
+        _lock.release()
+
+
+def suggest(query, limit=10):
+    return get_index().search(query, min(limit, MAX_LIMIT))
+
+
+def _patch(change):
+    version = _publish(change)
+    with _lock:
+        if _index is None:
+            return  # not loaded yet: the first lookup builds it
+        if _index.version == version - 1:  # was current, so stays current
+            _apply(_index, change)
+            _index.version = version
+        # otherwise the next lookup replays this change along with the ones before it
+
+
+def invalidate():
+    """Make every process rebuild its index on its next lookup."""
+    _publish(REBUILD)
+
+
+def item_saved(item):
+    _patch(("upsert", make_entry("item", item.pk, item.name, available=item.available)))
+
+
+def category_saved(category):
+    kind = "subcategory" if isinstance(category, SubCategory) else "category"
+    _patch(("upsert", make_entry(kind, category.pk, category.name, category.slug)))
+
+
+def removed(kind, pk):
+    _patch(("remove", (kind, pk)))
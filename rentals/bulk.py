@@ -0,0 +1,97 @@
+# rentals/bulk.py
+"""
+Staff bulk changes behind the items/bulk/ and orders/bulk-status/ endpoints.
+
+Each request is one transaction with a fixed number of queries, however
+many rows it touches: item rows are locked and read in one SELECT, their
+new categories checked in one query each, and written back with
+bulk_update(). Order statuses go through rentals.lifecycle.transition(),
+one guarded UPDATE and status-log insert per current status. Rollups and
+user stats follow as they do for the scheduled transitions.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from . import autocomplete, catalog_tree
+from .lifecycle import TRANSITIONS, transition
+from .models import Category, ClothingItem, RentalOrder, SubCategory
+
+MAX_BULK = 500
+ITEM_FIELDS = {"available": "available", "category_id": "category", "subcategory_id": "subcategory"}
+
+
+def _unknown(kind, ids, found):
+    missing = sorted(set(ids) - set(found))
+    if missing:
+        raise ValueError(f"Unknown {kind}: {', '.join(map(str, missing))}")
+
+
+def bulk_update_items(changes):
+    """
+    Apply per-item changes ({"id", and any of "available", "category_id",
+    "subcategory_id"}) in one transaction. Setting only a subcategory moves the
+    item to that subcategory's category; setting only a category takes the
+    item out of its subcategory unless that is in the new category. Returns
+    the updated items; raises ValueError for unknown ids or a subcategory
+    outside the given category.
+    """
+    sub_ids = {c["subcategory_id"] for c in changes if c.get("subcategory_id")}
+    cat_ids = {c["category_id"] for c in changes if c.get("category_id")}
+    with transaction.atomic():
+        items = ClothingItem.objects.select_for_update().only("id", *ITEM_FIELDS.values()).in_bulk(
+            [c["id"] for c in changes]
+        )
+        _unknown("items", [c["id"] for c in changes], items)
+        # the current subcategories of items given only a new category, to check against it
+        current_sub_ids = {
+            items[c["id"]].subcategory_id for c in changes if "category_id" in c and "subcategory_id" not in c
+        } - {None}
+        lookup = sub_ids | current_sub_ids
+        sub_categories = dict(SubCategory.objects.filter(pk__in=lookup).values_list("pk", "category_id")) if lookup else {}
+        _unknown("subcategories", sub_ids, sub_categories)
+        if cat_ids:
+            _unknown("categories", cat_ids, Category.objects.filter(pk__in=cat_ids).values_list("pk", flat=True))
+
+        fields = set()
+        for change in changes:
+            item = items[change["id"]]
+            sub_id = change.get("subcategory_id")
+            if sub_id and "category_id" not in change:
+                change = {**change, "category_id": sub_categories[sub_id]}
+            elif "subcategory_id" not in change and "category_id" in change and item.subcategory_id \
+                    and sub_categories.get(item.subcategory_id) != change["category_id"]:
+                change = {**change, "subcategory_id": None}  # filed under the old category
+            if sub_id and change["category_id"] != sub_categories[sub_id]:
+                raise ValueError(f"Subcategory {sub_id} is not in category {change['category_id']}")
+            for key, name in ITEM_FIELDS.items():
+                if key in change:
+                    setattr(item, key, change[key])
+                    fields.add(name)
+        if fields:
+            ClothingItem.objects.bulk_update(items.values(), sorted(fields))
+            # bulk_update() sends no signals; availability changes the ranking
+            transaction.on_commit(autocomplete.invalidate, robust=True)
+            transaction.on_commit(catalog_tree.invalidate, robust=True)
+    return list(items.values())
+
+
+def bulk_set_status(ids, to_status, reason):
+    """
+    Move the orders `ids` to `to_status` in one transaction, through the
+    lifecycle's allowed transitions. Returns (moved count, ids skipped:
+    unknown, or not allowed to go to `to_status` from where they are).
+    """
+    ids = set(ids)
+    by_status = defaultdict(list)
+    with transaction.atomic():
+        for pk, status in RentalOrder.objects.filter(pk__in=ids).values_list("pk", "status"):
+            by_status[status].append(pk)
+        skipped = ids - {pk for pks in by_status.values() for pk in pks}
+        moved = 0
+        for from_status, pks in by_status.items():
+            if to_status not in TRANSITIONS.get(from_status, ()):
+                skipped.update(pks)
+                continue
+            moved += transition(RentalOrder.objects.filter(pk__in=pks), from_status, to_status, reason, batch_size=MAX_BULK)
+    return moved, sorted(skipped)
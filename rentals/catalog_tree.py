@@ -0,0 +1,83 @@
+# rentals/catalog_tree.py
+"""
+The navigation menu: every category with its subcategories and how many
+available items each holds, for /api/rentals/catalog-tree/.
+
+The tree comes from one query: categories LEFT JOIN subcategories LEFT JOIN
+their items, grouped, with the category's own count as a subquery, so items
+filed under a category but no subcategory count too. It is cached, shared
+by every process, under a version that saves and deletes of items,
+categories and subcategories bump after commit (rentals.signals), as do
+bulk changes that send no signals. It is read from the primary, not the
+catalog replica, which may not have the change yet when the first request
+after the bump rebuilds. A tree built from data read before a change is
+stored under the old version, so it is never served after it.
+CATALOG_TREE_TTL bounds what a change made behind the ORM's back can leave
+stale.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Category, ClothingItem
+
+VERSION_KEY = "catalog-tree:version"
+
+
+def _category_items():
+    return Coalesce(Subquery(
+        ClothingItem.objects.filter(category=OuterRef("pk"), available=True)
+        .order_by().values("category").annotate(n=Count("pk")).values("n"),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def build_tree():
+    """[{id, name, slug, image, available_items, subcategories: [...]}], by name; images are storage names."""
+    rows = (
+        Category.objects.using(DEFAULT_DB_ALIAS).order_by("name", "subcategories__name", "subcategories__pk")
+        .values_list(
+            "pk", "name", "slug", "image",
+            "subcategories__pk", "subcategories__name", "subcategories__slug", "subcategories__image",
+        )
+        .annotate(
+            category_items=_category_items(),
+            sub_items=Count("subcategories__items", filter=Q(subcategories__items__available=True)),
+        )
+    )
+    tree, nodes = [], {}
+    for pk, name, slug, image, sub_pk, sub_name, sub_slug, sub_image, category_items, sub_items in rows:
+        node = nodes.get(pk)
+        if node is None:
+            node = nodes[pk] = {
+                "id": pk, "name": name, "slug": slug, "image": image or None,
+                "available_items": category_items, "subcategories": [],
+            }
+            tree.append(node)
+        if sub_pk is not None:  # the LEFT JOIN's row for a category without subcategories
+            node["subcategories"].append({
+                "id": sub_pk, "name": sub_name, "slug": sub_slug, "image": sub_image or None,
+                "available_items": sub_items,
+            })
+    return tree
+
+
+def get_tree():
+    version = cache.get(VERSION_KEY, 0)
+    key = f"catalog-tree:{version}"
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_tree()
+        cache.set(key, tree, settings.CATALOG_TREE_TTL)
+    return tree
+
+
+def invalidate():
+    """Make the next request rebuild the tree."""
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(VERSION_KEY, 1, timeout=None)
@@ -0,0 +1,80 @@
+# rentals/dynamic_fields.py
+"""
+Sparse fieldsets and expansion for the rentals API.
+
+    GET /api/rentals/items/?fields=id,name,daily_rate,primary_image
+    GET /api/rentals/items/?fields=id,name,category&expand=category
+
+`fields` limits a response to the listed top-level fields. Relations listed
+in a serializer's Meta.expandable_fields are rendered as nested objects when
+expanded and as ids otherwise. Without `fields`, Meta.default_expand applies
+(and `expand` adds to it), so plain requests look exactly as before. Views
+use the same parsed request to trim their querysets (DynamicFieldsViewMixin).
+"""
+from dataclasses import dataclass
+
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+SPARSE_PARAMETERS = [
+    OpenApiParameter("fields", str, description="Comma-separated fields to return"),
+    OpenApiParameter("expand", str, description="Comma-separated relations to nest instead of returning ids"),
+]
+
+
+def _split(value):
+    return {part.strip() for part in value.split(",") if part.strip()} if value else set()
+
+
+@dataclass(frozen=True)
+class FieldSelection:
+    only: frozenset = None  # None: every field
+    expand: frozenset = frozenset()
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in ("GET", "HEAD"):
+            return cls()
+        params = request.query_params
+        only = _split(params.get("fields"))
+        return cls(only=frozenset(only) or None, expand=frozenset(_split(params.get("expand"))))
+
+    def wants(self, name):
+        return self.only is None or name in self.only
+
+    def expands(self, name, default_expand=()):
+        if name in self.expand:
+            return True
+        return self.only is None and name in default_expand
+
+
+# Serializer side: drops unrequested fields and collapses unexpanded relations.
+class DynamicFieldsMixin:
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+        selection = FieldSelection.from_request(self.context.get("request"))
+        meta = self.Meta
+        for name, (serializer_class, kwargs) in getattr(meta, "expandable_fields", {}).items():
+            if name not in fields:
+                continue
+            if selection.expands(name, getattr(meta, "default_expand", ())):
+                fields[name] = serializer_class(read_only=True, **kwargs)
+            else:
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=kwargs.get("many", False))
+        if selection.only is not None:
+            fields = {name: field for name, field in fields.items() if name in selection.only}
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+
+# View side: `self.selection` lets get_queryset() skip unneeded joins. (No
+# docstring: drf-spectacular would publish it as every view's description.)
+class DynamicFieldsViewMixin:
+    @property
+    def selection(self):
+        return FieldSelection.from_request(self.request)
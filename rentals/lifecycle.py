@@ -0,0 +1,203 @@
+# rentals/lifecycle.py
+"""
+The rental order status state machine.
+
+    pending ──paid──> active ──> shipped ──> delivered ──> return_picked ──> completed
+       └──> cancelled: unpaid after the start date or once PENDING_EXPIRY passes
+
+Payment moves single orders (advance()). Everything else is done by
+`manage.py advance_orders`, on a schedule, in set-based steps (transition()):
+one UPDATE per batch of orders sharing a from/to pair, plus an
+OrderStatusLog row for each order that moved. Logs, rollup refreshes and
+statuses_changed cover only those: an order another process moved first
+is left out.
+
+- Tracking: forward shipments in transit make orders `shipped`, delivered
+  ones `delivered`; a picked-up return makes them `return_picked`, a
+  delivered return `completed`.
+- Dates: unpaid orders are cancelled the day after their start date (a
+  same-day rental may still be paying) or after
+  ORDER_PENDING_EXPIRY_HOURS. Paid orders still open
+  ORDER_RETURN_GRACE_DAYS after their end date are completed, whatever
+  tracking says.
+
+Only RentalOrder.BLOCKING_STATUSES take part in the overlap check, so that
+set stays limited to orders that really hold their items.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from backend.http import async_client_scope
+from backend.metrics import inc
+from .models import OrderStatusLog, RentalOrder
+from .rollups import schedule_refresh
+
+logger = logging.getLogger(__name__)
+
+TRANSITIONS = {
+    "pending": {"active", "cancelled"},
+    "active": {"shipped", "delivered", "completed", "cancelled"},
+    "shipped": {"delivered", "completed"},
+    "delivered": {"return_picked", "completed"},
+    "return_picked": {"completed"},
+    "completed": set(),
+    "cancelled": set(),
+}
+OPEN_STATUSES = ("active", "shipped", "delivered", "return_picked")
+
+# Shiprocket shipment_status codes (services.shiprocket.STATUS_MAP)
+FORWARD_TRACKING = {1: "shipped", 2: "delivered"}
+RETURN_TRACKING = {1: "return_picked", 2: "completed"}
+
+BATCH_SIZE = 500
+
+# OrderStatusLog reason marking a cancelled order whose payment came in anyway
+REFUND_DUE = "refund due: paid after cancel"
+
+# sent after each transition() batch with user_ids, from_status and to_status
+statuses_changed = Signal()
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def check_transition(from_status, to_status):
+    if to_status not in TRANSITIONS.get(from_status, ()):
+        raise InvalidTransition(f"Orders can't go from {from_status!r} to {to_status!r}")
+
+
+def advance(order, to_status, reason):
+    """Move one order along (signals fire as for any save) and log it."""
+    check_transition(order.status, to_status)
+    from_status, order.status = order.status, to_status
+    with transaction.atomic(savepoint=False):
+        order.save(update_fields=["status"])
+        OrderStatusLog.objects.create(order_id=order.pk, from_status=from_status, to_status=to_status, reason=reason)
+
+
+def flag_refund(order, payment_id):
+    """Record a payment captured for a cancelled order, for staff to refund."""
+    logger.warning("Payment %s captured for cancelled order %s: refund due", payment_id, order.pk)
+    inc("payments_after_cancel_total")
+    OrderStatusLog.objects.create(order_id=order.pk, from_status=order.status, to_status=order.status, reason=REFUND_DUE)
+
+
+def transition(orders, from_status, to_status, reason, batch_size=BATCH_SIZE):
+    """
+    Move the orders in `orders` (a queryset) that are in `from_status` to
+    `to_status`, a batch per transaction. Returns how many moved.
+    """
+    check_transition(from_status, to_status)
+    rows = orders.filter(status=from_status).order_by("pk").values_list("pk", "user_id", "start_date", "end_date")
+    moved = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(rows.filter(pk__gt=last_pk).select_for_update()[:batch_size])
+            if not batch:
+                return moved
+            ids = [pk for pk, *_ in batch]
+            # the status guard again: an order changed since it was read is left alone
+            updated = RentalOrder.objects.filter(pk__in=ids, status=from_status).update(status=to_status)
+            changed = batch
+            if updated < len(batch):  # the rows are locked now: those in to_status are ours
+                ours = set(RentalOrder.objects.filter(pk__in=ids, status=to_status).values_list("pk", flat=True))
+                changed = [row for row in batch if row[0] in ours]
+            if changed:
+                OrderStatusLog.objects.bulk_create([
+                    OrderStatusLog(order_id=pk, from_status=from_status, to_status=to_status, reason=reason)
+                    for pk, *_ in changed
+                ])
+                # update() sends no signals: rollups only change when an order stops (or starts) counting
+                if (from_status in RentalOrder.PAID_STATUSES) != (to_status in RentalOrder.PAID_STATUSES):
+                    schedule_refresh(*[(start, end) for _, _, start, end in changed])
+                statuses_changed.send(
+                    sender=RentalOrder, user_ids={user_id for _, user_id, *_ in changed},
+                    from_status=from_status, to_status=to_status,
+                )
+        moved += len(changed)
+        if len(batch) < batch_size:  # short batch: nothing left to ask for
+            return moved
+        last_pk = ids[-1]
+
+
+def apply_date_rules(now=None):
+    """Cancel stale unpaid orders and complete overdue ones. Returns {(from, to): count}."""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    expired = RentalOrder.objects.filter(
+        Q(start_date__lt=today) | Q(created_at__lt=now - timedelta(hours=settings.ORDER_PENDING_EXPIRY_HOURS))
+    )
+    overdue = RentalOrder.objects.filter(end_date__lt=today - timedelta(days=settings.ORDER_RETURN_GRACE_DAYS))
+    moved = {("pending", "cancelled"): transition(expired, "pending", "cancelled", "unpaid")}
+    for status in OPEN_STATUSES:
+        moved[status, "completed"] = transition(overdue, status, "completed", "return overdue")
+    return moved
+
+
+def tracking_targets(status, forward_code, return_code):
+    """The status tracking codes call for, or None if there is nothing to do."""
+    target = RETURN_TRACKING.get(return_code) or FORWARD_TRACKING.get(forward_code)
+    if target and target != status and target in TRANSITIONS[status]:
+        return target
+    return None
+
+
+async def _fetch_codes(shipments, concurrency):
+    from .services.shiprocket import shipment_status_code
+    from .services.shiprocket_async import AsyncShiprocketAPI
+
+    api = AsyncShiprocketAPI()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def code(shipment_id):
+        async with limit:
+            try:
+                return shipment_status_code(await api.track_order(shipment_id), shipment_id)
+            except Exception:  # one failing lookup must not stop the run; retried next time
+                return None
+
+    async with async_client_scope():  # closed before asyncio.run() drops the loop
+        return await asyncio.gather(*(code(shipment_id) for shipment_id in shipments))
+
+
+def apply_tracking(concurrency=None):
+    """Poll tracking for open shipped orders and apply what it shows. Returns {(from, to): count}."""
+    orders = list(
+        RentalOrder.objects.filter(status__in=OPEN_STATUSES)
+        .filter(Q(shiprocket_shipment_id__gt="") | Q(return_shipment_id__gt=""))
+        .values_list("pk", "status", "shiprocket_shipment_id", "return_shipment_id")
+    )
+    if not orders:
+        return {}
+    # forward tracking until delivered, then the return shipment
+    lookups = {}
+    for pk, status, forward, back in orders:
+        if status in ("delivered", "return_picked") and back:
+            lookups[pk] = (None, back)
+        elif status in ("active", "shipped") and forward:
+            lookups[pk] = (forward, None)
+    shipments = sorted({s for pair in lookups.values() for s in pair if s})
+    codes = dict(zip(shipments, asyncio.run(_fetch_codes(shipments, concurrency or settings.TRACKING_CONCURRENCY))))
+
+    groups = defaultdict(list)
+    for pk, status, *_ in orders:
+        if pk not in lookups:
+            continue
+        forward, back = lookups[pk]
+        target = tracking_targets(status, codes.get(forward), codes.get(back))
+        if target:
+            groups[status, target].append(pk)
+    return {
+        (from_status, to_status): transition(RentalOrder.objects.filter(pk__in=ids), from_status, to_status, "tracking")
+        for (from_status, to_status), ids in groups.items()
+    }
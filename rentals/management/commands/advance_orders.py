@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from rentals.lifecycle import apply_date_rules, apply_tracking
+
+
+class Command(BaseCommand):
+    help = (
+        "Move orders through their lifecycle: cancel stale unpaid orders, apply "
+        "Shiprocket tracking (shipped, delivered, return picked up/delivered) and "
+        "complete overdue rentals. Run it on a schedule, e.g. every 15 minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skip-tracking", action="store_true", help="Only apply the date rules")
+        parser.add_argument("--concurrency", type=int, help="Parallel tracking lookups (default: TRACKING_CONCURRENCY)")
+
+    def handle(self, *args, **opts):
+        moved = {}
+        if not opts["skip_tracking"]:
+            moved.update(apply_tracking(opts["concurrency"]))
+        for pair, count in apply_date_rules().items():
+            moved[pair] = moved.get(pair, 0) + count
+        for (from_status, to_status), count in sorted(moved.items()):
+            if count:
+                self.stdout.write(f"  {from_status} -> {to_status}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Moved {sum(moved.values())} orders."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rentals.archive import (
+    DEFAULT_BATCH_SIZE, archive_cutoff, archive_orders, purge_expired_otps, purge_expired_tokens,
+)
+from rentals.exports import parse_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old completed orders to the archive tables and purge expired OTP "
+        "requests and JWT tokens, in batched transactions. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Archive orders that ended before YYYY-MM-DD "
+                                             "(default: ARCHIVE_ORDERS_AFTER_DAYS ago)")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--skip-orders", action="store_true")
+        parser.add_argument("--skip-purge", action="store_true", help="Keep expired OTPs and tokens")
+
+    def handle(self, *args, **opts):
+        try:
+            before = parse_day(opts["before"]) or archive_cutoff()
+        except ValueError as e:
+            raise CommandError(e)
+        batch_size = opts["batch_size"]
+
+        if not opts["skip_orders"]:
+            orders = lines = 0
+            for batch_orders, batch_lines in archive_orders(before, batch_size):
+                orders += batch_orders
+                lines += batch_lines
+            self.stdout.write(f"Archived {orders} orders ({lines} lines) that ended before {before}.")
+        if not opts["skip_purge"]:
+            otps = purge_expired_otps(batch_size=batch_size)
+            tokens = purge_expired_tokens(batch_size=batch_size)
+            self.stdout.write(f"Purged {otps} expired OTP requests and {tokens} expired tokens.")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from rentals.models import RentalOrder
+from .benchmark_endpoints import percentile
+
+User = get_user_model()
+
+BENCH_EMAIL = "benchmark-async@example.com"
+
+
+def worker_pool(app, workers):
+    """
+    Cap concurrent requests like `gunicorn -w N` with sync workers: each
+    worker serves one request at a time, however long it waits upstream.
+    """
+    slots = asyncio.Semaphore(workers)
+
+    async def limited(scope, receive, send):
+        async with slots:
+            await app(scope, receive, send)
+
+    return limited
+
+
+def slow_upstream(delay):
+    """Local stand-in for Shiprocket that takes `delay` seconds to answer tracking calls."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._json({"token": "benchmark"})
+
+        def do_GET(self):
+            time.sleep(delay)
+            self._json({})
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 256
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        "Show whether slow upstream (Shiprocket) calls starve catalog requests: "
+        "measures catalog latency alone and while tracking calls are in flight. "
+        "Async mode models a uvicorn worker; sync mode (ASYNC_UPSTREAM_VIEWS=False) "
+        "models gunicorn sync workers by capping concurrency at --workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delay", type=float, default=1.0, help="Upstream response time in seconds")
+        parser.add_argument("--tracking", type=int, default=20, help="Concurrent slow tracking requests")
+        parser.add_argument("--catalog", type=int, default=50, help="Catalog requests per phase")
+        parser.add_argument("--workers", type=int, default=4, help="Sync worker count to model")
+        parser.add_argument("--compare", action="store_true",
+                            help="Also run with ASYNC_UPSTREAM_VIEWS=False in a subprocess")
+
+    def handle(self, *args, **opts):
+        from django.conf import settings
+
+        server = slow_upstream(opts["delay"])
+        upstream = f"http://127.0.0.1:{server.server_port}"
+        user, order = self._fixtures()
+        token = str(AccessToken.for_user(user))
+
+        mode = "async" if settings.ASYNC_UPSTREAM_VIEWS else "sync"
+        with override_settings(SHIPROCKET_BASE_URL=upstream, SHIPROCKET_EMAIL="bench", SHIPROCKET_PASSWORD="bench"):
+            idle, loaded, tracking_ms = asyncio.run(self._run(token, order.pk, opts, mode == "sync"))
+        server.shutdown()
+
+        self.stdout.write(
+            f"[{mode} upstream views] catalog p50/p95/max idle "
+            f"{percentile(idle, 50):.1f}/{percentile(idle, 95):.1f}/{max(idle):.1f}ms, "
+            f"with {opts['tracking']} slow tracking calls "
+            f"{percentile(loaded, 50):.1f}/{percentile(loaded, 95):.1f}/{max(loaded):.1f}ms; "
+            f"tracking batch finished in {tracking_ms:.0f}ms"
+        )
+
+        if opts["compare"]:
+            env = dict(os.environ, ASYNC_UPSTREAM_VIEWS="False" if mode == "async" else "True")
+            argv = [sys.executable, sys.argv[0], "benchmark_async_upstream",
+                    f"--delay={opts['delay']}", f"--tracking={opts['tracking']}",
+                    f"--catalog={opts['catalog']}", f"--workers={opts['workers']}"]
+            subprocess.run(argv, env=env, check=True)
+
+    def _fixtures(self):
+        user, _ = User.objects.get_or_create(username=BENCH_EMAIL, defaults={"email": BENCH_EMAIL})
+        order = RentalOrder.objects.filter(user=user).first()
+        if order is None:
+            today = time.strftime("%Y-%m-%d")
+            order = RentalOrder.objects.create(
+                user=user, start_date=today, end_date=today, shiprocket_shipment_id="benchmark",
+            )
+        return user, order
+
+    async def _run(self, token, order_pk, opts, sync_workers):
+        import httpx
+        from django.core.asgi import get_asgi_application
+
+        app = get_asgi_application()
+        if sync_workers:
+            app = worker_pool(app, opts["workers"])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=None) as client:
+            headers = {"Authorization": f"Bearer {token}"}
+
+            async def catalog_latencies():
+                samples = []
+                for _ in range(opts["catalog"]):
+                    start = time.perf_counter()
+                    await client.get("/api/rentals/categories/")
+                    samples.append((time.perf_counter() - start) * 1000)
+                return samples
+
+            await client.get("/api/rentals/categories/")  # warm up
+            idle = await catalog_latencies()
+
+            start = time.perf_counter()
+            tracking = [
+                asyncio.create_task(client.get(f"/api/rentals/shipping/{order_pk}/track-shipment/", headers=headers))
+                for _ in range(opts["tracking"])
+            ]
+            await asyncio.sleep(0.05)  # let the tracking calls reach the upstream
+            loaded = await catalog_latencies()
+            await asyncio.gather(*tracking)
+            tracking_ms = (time.perf_counter() - start) * 1000
+        return idle, loaded, tracking_ms
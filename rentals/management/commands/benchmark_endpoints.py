@@ -0,0 +1,153 @@
+import json
+import re
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from rentals.urls import router as rentals_router
+from users.urls import router as users_router
+
+User = get_user_model()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every router GET endpoint in process: latency percentiles, "
+        "SQL queries per request and peak memory, optionally against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", default=None,
+                            help="Regex; benchmark only endpoints whose name matches")
+        parser.add_argument("--user", default=None,
+                            help="Email of the staff user to authenticate as")
+        parser.add_argument("--baseline", default=None,
+                            help="JSON file from a previous --save run to compare against")
+        parser.add_argument("--save", default=None,
+                            help="Write this run's results to a JSON file")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed p95 slowdown vs baseline before flagging (0.25 = 25%%)")
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **opts):
+        client = self._client(opts["user"])
+        only = re.compile(opts["only"]) if opts["only"] else None
+
+        results = {}
+        for name, url in self._endpoints():
+            if only and not only.search(name):
+                continue
+            results[name] = self._measure(client, url, opts["iterations"], opts["warmup"])
+            self._print_row(name, results[name])
+
+        if opts["save"]:
+            with open(opts["save"], "w") as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {opts['save']}"))
+
+        if opts["baseline"]:
+            regressions = self._compare(results, opts["baseline"], opts["tolerance"])
+            if regressions and opts["fail_on_regression"]:
+                raise CommandError(f"{regressions} endpoint(s) regressed against {opts['baseline']}")
+
+    # -- setup ------------------------------------------------------------
+
+    def _client(self, email):
+        users = User.objects.filter(is_staff=True, is_active=True)
+        user = (users.filter(email=email) if email else users).order_by("pk").first()
+        if user is None:
+            raise CommandError("No active staff user to benchmark as; create one or pass --user.")
+        client = APIClient()
+        # Real JWT header so the authentication path is part of the measurement
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        return client
+
+    def _endpoints(self):
+        """list and detail URLs for every viewset registered on the app routers."""
+        for router in (rentals_router, users_router):
+            for prefix, viewset, basename in router.registry:
+                try:
+                    yield f"{basename}-list", reverse(f"{basename}-list")
+                except NoReverseMatch:
+                    continue  # action-only viewsets (shipping) hit external APIs
+                queryset = getattr(viewset, "queryset", None)
+                model = queryset.model if queryset is not None else viewset.serializer_class.Meta.model
+                pk = model._default_manager.order_by("pk").values_list("pk", flat=True).first()
+                if pk is not None:
+                    yield f"{basename}-detail", reverse(f"{basename}-detail", args=[pk])
+
+    # -- measurement ------------------------------------------------------
+
+    def _measure(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+
+        timings, queries, status = [], [], None
+        for _ in range(iterations):
+            reset_queries()  # the query log is capped; start each request empty
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(ctx.captured_queries))
+            status = response.status_code
+
+        # Separate pass: tracemalloc would skew the latency numbers
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "url": url,
+            "status": status,
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+            "queries": max(queries),
+            "peak_kb": round(peak / 1024, 1),
+            "bytes": len(response.content),
+        }
+
+    def _print_row(self, name, r):
+        self.stdout.write(
+            f"{name:<22} {r['status']}  p50 {r['p50_ms']:>8.2f}ms  p95 {r['p95_ms']:>8.2f}ms  "
+            f"p99 {r['p99_ms']:>8.2f}ms  queries {r['queries']:>4}  peak {r['peak_kb']:>9.1f}KB  "
+            f"{r['bytes']}B"
+        )
+
+    def _compare(self, results, path, tolerance):
+        with open(path) as fh:
+            baseline = json.load(fh)
+
+        regressions = 0
+        for name, current in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            problems = []
+            if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                problems.append(f"p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+            if current["queries"] > before["queries"]:
+                problems.append(f"queries {before['queries']} -> {current['queries']}")
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"REGRESSION {name}: {', '.join(problems)}"))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {path}"))
+        return regressions
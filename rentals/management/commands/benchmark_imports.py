@@ -0,0 +1,74 @@
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# SDKs that views load on first use; seeing one at startup is a regression
+LAZY_MODULES = (
+    "razorpay",
+    "google.auth",
+    "google.oauth2",
+    "drf_spectacular.views",
+    "httpx",
+)
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def import_profile(argv):
+    """
+    Run `python -X importtime manage.py <argv>` in a fresh interpreter and
+    return (total self time in ms, {module: cumulative ms}, {top-level package: ms}).
+    """
+    cmd = [sys.executable, "-X", "importtime", str(settings.BASE_DIR / "manage.py"), *argv]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode:
+        raise CommandError(f"{' '.join(argv)} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    modules = {}
+    packages = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = match.groups()
+        total_us += int(self_us)
+        modules[name] = int(cumulative_us) / 1000
+        packages[name.split(".")[0]] += int(self_us)
+    return total_us / 1000, modules, {name: us / 1000 for name, us in packages.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure interpreter + Django startup import time with -X importtime "
+        "(default: `manage.py check`) and fail when it exceeds a budget or when "
+        "a lazily loaded SDK is imported at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("argv", nargs="*", default=["check"],
+                            help="manage.py command to profile (default: check)")
+        parser.add_argument("--runs", type=int, default=3, help="Profile this many times and keep the fastest")
+        parser.add_argument("--budget", type=float, default=600.0, help="Total import time budget in ms")
+        parser.add_argument("--top", type=int, default=10, help="Show the N slowest top-level packages")
+
+    def handle(self, *args, **opts):
+        runs = [import_profile(opts["argv"]) for _ in range(max(1, opts["runs"]))]
+        total, modules, packages = min(runs, key=lambda run: run[0])
+
+        self.stdout.write(f"manage.py {' '.join(opts['argv'])}: {total:.0f}ms of imports "
+                          f"(best of {len(runs)}, budget {opts['budget']:.0f}ms)")
+        for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])[:opts["top"]]:
+            self.stdout.write(f"  {name:<32} {ms:8.1f}ms")
+
+        problems = [f"{name} is imported at startup ({modules[name]:.1f}ms)"
+                    for name in LAZY_MODULES if name in modules]
+        if total > opts["budget"]:
+            problems.append(f"import time {total:.0f}ms exceeds the {opts['budget']:.0f}ms budget")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Within budget"))
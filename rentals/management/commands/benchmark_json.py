@@ -0,0 +1,63 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from backend.compression import brotli, compress
+from backend.renderers import ORJSONRenderer, orjson
+from rentals.models import ClothingItem
+from rentals.serializers import ClothingItemSerializer
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark JSON encode/decode and compression of the item list payload "
+        "(seed it with seed_synthetic): stock DRF json vs orjson, gzip vs brotli."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000, help="Items in the payload")
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **opts):
+        items = ClothingItem.objects.select_related(
+            "category", "subcategory__category"
+        ).prefetch_related("images")[:opts["limit"]]
+        request = Request(APIRequestFactory().get("/api/rentals/items/"))
+        data = ClothingItemSerializer(items, many=True, context={"request": request}).data
+        if not data:
+            raise CommandError("No items; run `manage.py seed_synthetic` first.")
+        n = opts["iterations"]
+
+        rows = []
+        stock_ms, stock = timed(lambda: JSONRenderer().render(data), n)
+        rows.append(("encode drf/json", stock_ms, len(stock)))
+        fast_ms, fast = timed(lambda: ORJSONRenderer().render(data), n)
+        rows.append(("encode orjson" if orjson else "encode (orjson missing)", fast_ms, len(fast)))
+        if fast != stock:
+            self.stderr.write(self.style.WARNING("orjson output differs from DRF's"))
+
+        rows.append(("decode json", timed(lambda: json.loads(stock), n)[0], len(stock)))
+        if orjson:
+            rows.append(("decode orjson", timed(lambda: orjson.loads(stock), n)[0], len(stock)))
+
+        for encoding in ("gzip", "br") if brotli else ("gzip",):
+            ms, body = timed(lambda: compress(fast, encoding), n)
+            rows.append((f"compress {encoding}", ms, len(body)))
+
+        self.stdout.write(f"{len(data)} items, median of {n} runs")
+        for name, ms, size in rows:
+            self.stdout.write(f"  {name:<24} {ms:8.2f}ms {size:>10,} bytes")
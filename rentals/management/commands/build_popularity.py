@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentals.popularity import HALF_LIFE_DAYS, LOOKBACK_DAYS, TOP_N, build_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the trending scores (items, subcategories) and 'often rented with' "
+        "lists from recent paid orders. Run it periodically, e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--half-life", type=float, default=HALF_LIFE_DAYS, help="Days for a booking's weight to halve")
+        parser.add_argument("--lookback", type=int, default=LOOKBACK_DAYS, help="Days of orders to read")
+        parser.add_argument("--top", type=int, default=TOP_N, help="Related items kept per item")
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        items, subcategories, pairs = build_popularity(opts["half_life"], opts["lookback"], opts["top"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {items} items and {subcategories} subcategories, "
+            f"{pairs} co-rental rows in {time.perf_counter() - start:.2f}s."
+        ))
@@ -0,0 +1,42 @@
+import difflib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the OpenAPI schema served at /api/schema/ to OPENAPI_SCHEMA_FILE. "
+        "With --check, fail instead if the committed file is out of date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Compare with the committed schema and fail on drift")
+        parser.add_argument("--file", default=None, help="Override OPENAPI_SCHEMA_FILE")
+
+    def handle(self, *args, **opts):
+        path = opts["file"] or settings.OPENAPI_SCHEMA_FILE
+        body = generate_schema()
+
+        if not opts["check"]:
+            with open(path, "wb") as fh:
+                fh.write(body)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(body)} bytes to {path}"))
+            return
+
+        try:
+            with open(path, "rb") as fh:
+                committed = fh.read()
+        except FileNotFoundError:
+            raise CommandError(f"{path} does not exist; run `manage.py build_schema`")
+        if committed != body:
+            diff = difflib.unified_diff(
+                committed.decode().splitlines(), body.decode().splitlines(),
+                "committed", "generated", lineterm="", n=1,
+            )
+            self.stderr.write("\n".join(list(diff)[:60]))
+            raise CommandError(f"{path} is out of date; run `manage.py build_schema`")
+        self.stdout.write(self.style.SUCCESS(f"{path} is up to date"))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentals.exports import CHUNKERS, DEFAULT_BATCH_SIZE, export_sources, parse_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream orders with their line items to CSV or JSONL, in keyset-paginated "
+        "batches so memory stays flat for any number of rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--type", choices=sorted(CHUNKERS), default="csv")
+        parser.add_argument("--since", help="Orders created on or after YYYY-MM-DD")
+        parser.add_argument("--until", help="Orders created on or before YYYY-MM-DD")
+        parser.add_argument("--status", default="", help="Comma-separated statuses")
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout)")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **opts):
+        try:
+            since, until = parse_day(opts["since"]), parse_day(opts["until"])
+        except ValueError as e:
+            raise CommandError(e)
+        statuses = [s for s in opts["status"].split(",") if s]
+        chunks = CHUNKERS[opts["type"]](export_sources(since, until, statuses), opts["batch_size"])
+
+        out = sys.stdout.buffer if opts["output"] == "-" else open(opts["output"], "wb")
+        written = 0
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        if opts["output"] != "-":
+            self.stderr.write(f"Wrote {written:,} bytes to {opts['output']}")
@@ -0,0 +1,50 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend.media import hashed_name, is_hashed_name
+from rentals.models import ClothingItemImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Move clothing images uploaded before content hashing to "
+        "`clothing_images/<sha256>.<ext>` names so they get immutable cache headers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--delete-old", action="store_true",
+                            help="Delete the old file once no image row points at it")
+
+    def handle(self, *args, **opts):
+        field = ClothingItemImage._meta.get_field("image")
+        storage = field.storage
+        prefix = field.upload_to.prefix
+
+        renames = {}
+        names = ClothingItemImage.objects.exclude(image="").values_list("image", flat=True).distinct()
+        for name in names.iterator():
+            if is_hashed_name(name):
+                continue
+            if not storage.exists(name):
+                self.stderr.write(f"missing: {name}")
+                continue
+            with storage.open(name, "rb") as fh:
+                new_name = posixpath.join(prefix, hashed_name(fh, name))
+                if not opts["dry_run"] and not storage.exists(new_name):
+                    new_name = storage.save(new_name, fh)
+            renames[name] = new_name
+
+        self.stdout.write(f"{len(renames)} file(s) to rename")
+        if opts["dry_run"]:
+            return
+
+        with transaction.atomic():
+            for old, new in renames.items():
+                ClothingItemImage.objects.filter(image=old).update(image=new)
+        if opts["delete_old"]:
+            for old in renames:
+                storage.delete(old)
+        self.stdout.write(self.style.SUCCESS(f"Renamed {len(renames)} file(s)"))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentals.serviceability import PINCODE_RE, PREWARM_CONCURRENCY, prewarm, top_pincodes
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the cached courier serviceability and rates for the pincodes most "
+        "orders ship to. Run it more often than SERVICEABILITY_TTL, e.g. every 6 hours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=200, help="Busiest delivery pincodes to cover")
+        parser.add_argument("--days", type=int, default=90, help="Days of orders to rank pincodes by")
+        parser.add_argument("--pincodes", default="", help="Comma-separated pincodes to cover as well")
+        parser.add_argument("--max-units", type=int, default=3, help="Cover parcels of 1..N garments")
+        parser.add_argument("--concurrency", type=int, default=PREWARM_CONCURRENCY, help="Parallel lookups")
+        parser.add_argument("--only-missing", action="store_true", help="Skip pincodes already cached")
+
+    def handle(self, *args, **opts):
+        extra = [p.strip() for p in opts["pincodes"].split(",") if p.strip()]
+        invalid = [p for p in extra if not PINCODE_RE.match(p)]
+        if invalid:
+            raise CommandError(f"Not pincodes: {', '.join(invalid)}")
+        pincodes = extra + top_pincodes(opts["top"], opts["days"])
+        start = time.perf_counter()
+        cached, failed = prewarm(pincodes, opts["max_units"], opts["concurrency"], opts["only_missing"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {cached} lookups for {len(set(pincodes))} pincodes ({failed} failed) "
+            f"in {time.perf_counter() - start:.2f}s."
+        ))
@@ -0,0 +1,225 @@
+import io
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from rentals.models import (
+    SIZE_CHOICES, Category, ClothingItem, ClothingItemImage,
+    RentalOrder, RentalOrderItem, SubCategory,
+)
+
+User = get_user_model()
+
+CATEGORY_NAMES = [
+    "Lehengas", "Sarees", "Sherwanis", "Gowns", "Kurtas",
+    "Suits", "Indo-Western", "Anarkalis", "Jackets", "Accessories",
+]
+STYLES = ["Bridal", "Festive", "Party", "Classic", "Designer", "Royal", "Pastel", "Embroidered"]
+FABRICS = ["Silk", "Velvet", "Georgette", "Chiffon", "Brocade", "Linen", "Organza", "Net"]
+COLOURS = ["Maroon", "Ivory", "Emerald", "Navy", "Gold", "Blush", "Teal", "Black", "Mustard"]
+SIZES = [code for code, _ in SIZE_CHOICES]
+
+# Weighted like a live shop: most history is finished rentals
+STATUS_WEIGHTS = [
+    ("completed", 74), ("cancelled", 6), ("return_picked", 1), ("delivered", 3),
+    ("shipped", 2), ("active", 6), ("pending", 8),
+]
+
+# Delivery pincodes, a few busy ones and a long tail (prewarm_serviceability)
+PINCODES = [str(411001 + n) for n in range(60)] + [str(400001 + n) for n in range(40)]
+PINCODE_WEIGHTS = [1 / (rank + 1) for rank in range(len(PINCODES))]
+
+PLACEHOLDER_IMAGE = "clothing_images/synthetic-placeholder.jpg"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic categories, items, images, users and orders "
+        "for load testing. Use --scale to grow every volume together."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0,
+                            help="Multiplier applied to items, users and orders")
+        parser.add_argument("--categories", type=int, default=8)
+        parser.add_argument("--subcategories", type=int, default=5,
+                            help="Subcategories per category")
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--images-per-item", type=int, default=3)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--orders", type=int, default=20000)
+        parser.add_argument("--years", type=int, default=3,
+                            help="How far back order history goes")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None,
+                            help="Random seed for a repeatable dataset")
+
+    def handle(self, *args, **opts):
+        self.rng = random.Random(opts["seed"])
+        self.batch_size = opts["batch_size"]
+        scale = opts["scale"]
+        # Tag every generated row so repeated runs never collide on unique fields
+        self.run = f"s{int(timezone.now().timestamp()):x}"
+
+        image_name = self._placeholder_image()
+        subcategories = self._seed_categories(opts["categories"], opts["subcategories"])
+        items = self._seed_items(int(opts["items"] * scale), subcategories)
+        self._seed_images(items, opts["images_per_item"], image_name)
+        user_ids = self._seed_users(int(opts["users"] * scale))
+        self._seed_orders(int(opts["orders"] * scale), items, user_ids, opts["years"])
+
+        self.stdout.write(self.style.SUCCESS(f"Synthetic dataset '{self.run}' created."))
+
+    # -- helpers ----------------------------------------------------------
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def _placeholder_image(self):
+        if not default_storage.exists(PLACEHOLDER_IMAGE):
+            from PIL import Image
+
+            buf = io.BytesIO()
+            Image.new("RGB", (600, 800), (214, 196, 176)).save(buf, format="JPEG", quality=70)
+            return default_storage.save(PLACEHOLDER_IMAGE, ContentFile(buf.getvalue()))
+        return PLACEHOLDER_IMAGE
+
+    def _seed_categories(self, n_categories, n_subcategories):
+        categories = Category.objects.bulk_create([
+            Category(
+                name=f"{CATEGORY_NAMES[i % len(CATEGORY_NAMES)]} {self.run}-{i}",
+                slug=f"{self.run}-cat-{i}",
+            )
+            for i in range(n_categories)
+        ])
+        if not categories or categories[0].pk is None:
+            categories = list(Category.objects.filter(slug__startswith=f"{self.run}-cat-"))
+
+        subcategories = SubCategory.objects.bulk_create([
+            SubCategory(
+                category=cat,
+                name=f"{STYLES[j % len(STYLES)]} {cat.name}",
+                slug=f"{cat.slug}-sub-{j}",
+            )
+            for cat in categories
+            for j in range(n_subcategories)
+        ])
+        if subcategories and subcategories[0].pk is None:
+            subcategories = list(SubCategory.objects.filter(slug__startswith=f"{self.run}-cat-"))
+        self.stdout.write(f"  {len(categories)} categories, {len(subcategories)} subcategories")
+        return subcategories
+
+    def _next_pk(self, model):
+        return (model.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+
+    def _seed_items(self, total, subcategories):
+        """Returns (id, daily_rate, security_deposit, sizes) per item."""
+        rng = self.rng
+        items = []
+        next_pk = self._next_pk(ClothingItem)
+        for start, end in self._batches(total):
+            batch = []
+            for i in range(start, end):
+                sub = rng.choice(subcategories)
+                rate = Decimal(rng.randrange(300, 5000, 50))
+                deposit = rate * rng.choice([2, 3, 4])
+                sizes = sorted(rng.sample(SIZES, rng.randint(2, 5)), key=SIZES.index)
+                batch.append(ClothingItem(
+                    pk=next_pk + i,
+                    category_id=sub.category_id,
+                    subcategory=sub,
+                    name=f"{rng.choice(COLOURS)} {rng.choice(FABRICS)} {sub.name} #{i}",
+                    description=f"{rng.choice(STYLES)} {rng.choice(FABRICS).lower()} piece, "
+                                f"dry-cleaned after every rental.",
+                    sizes=sizes,
+                    daily_rate=rate,
+                    security_deposit=deposit,
+                    available=rng.random() > 0.1,
+                ))
+                items.append((next_pk + i, rate, deposit, sizes))
+            ClothingItem.objects.bulk_create(batch)
+        self.stdout.write(f"  {total} items")
+        return items
+
+    def _seed_images(self, items, per_item, image_name):
+        total = len(items) * per_item
+        for start, end in self._batches(total):
+            ClothingItemImage.objects.bulk_create([
+                ClothingItemImage(item_id=items[n // per_item][0], image=image_name)
+                for n in range(start, end)
+            ])
+        self.stdout.write(f"  {total} images")
+
+    def _seed_users(self, total):
+        next_pk = self._next_pk(User)
+        joined = timezone.now()
+        for start, end in self._batches(total):
+            User.objects.bulk_create([
+                User(
+                    pk=next_pk + i,
+                    username=f"{self.run}-{i}@example.com",
+                    email=f"{self.run}-{i}@example.com",
+                    first_name=f"Renter {i}",
+                    password="!",  # unusable
+                    auth_provider=self.rng.choice(["email", "google"]),
+                    date_joined=joined - timedelta(days=self.rng.randint(0, 1500)),
+                )
+                for i in range(start, end)
+            ])
+        self.stdout.write(f"  {total} users")
+        return range(next_pk, next_pk + total)
+
+    def _seed_orders(self, total, items, user_ids, years):
+        rng = self.rng
+        statuses, weights = zip(*STATUS_WEIGHTS)
+        today = date.today()
+        span = 365 * years
+        next_pk = self._next_pk(RentalOrder)
+
+        for start, end in self._batches(total):
+            orders, lines = [], []
+            for i in range(start, end):
+                begin = today - timedelta(days=rng.randint(-30, span))
+                days = rng.randint(1, 7)
+                status = rng.choices(statuses, weights)[0]
+                total_price = Decimal(0)
+                order_pk = next_pk + i
+                for item_id, rate, deposit, sizes in rng.sample(items, min(len(items), rng.randint(1, 3))):
+                    qty = 1 if rng.random() < 0.9 else 2
+                    total_price += rate * qty * days + deposit * qty
+                    lines.append(RentalOrderItem(
+                        order_id=order_pk, item_id=item_id,
+                        size=rng.choice(sizes), quantity=qty,
+                    ))
+                pincode = rng.choices(PINCODES, PINCODE_WEIGHTS)[0]
+                city = "Pune" if pincode.startswith("411") else "Mumbai"
+                orders.append(RentalOrder(
+                    pk=order_pk,
+                    user_id=rng.choice(user_ids),
+                    status=status,
+                    name=f"Renter {i}",
+                    email=f"{self.run}-order-{i}@example.com",
+                    phone=f"+9198{rng.randint(10000000, 99999999)}",
+                    address=f"{rng.randint(1, 999)} MG Road, {city}",
+                    pincode=pincode,
+                    city=city,
+                    state="Maharashtra",
+                    start_date=begin,
+                    end_date=begin + timedelta(days=days - 1),
+                    total_price=total_price,
+                    payment_id=f"order_{self.run}{i}" if status in RentalOrder.PAID_STATUSES else None,
+                ))
+            # bulk_create skips RentalOrder.save(), so totals are computed above
+            with transaction.atomic():
+                RentalOrder.objects.bulk_create(orders)
+                RentalOrderItem.objects.bulk_create(lines)
+            self.stdout.write(f"  {end}/{total} orders")
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(unique=True)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='category_images/')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RentalOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('active', 'Active'), ('completed', 'Completed')], default='pending', max_length=10)),
+                ('name', models.CharField(default='name', max_length=100)),
+                ('email', models.EmailField(default='email', max_length=254)),
+                ('phone', models.CharField(default='+91', max_length=15)),
+                ('address', models.TextField(default='city')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('total_price', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('payment_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('shiprocket_awb', models.CharField(blank=True, max_length=50, null=True)),
+                ('shiprocket_shipment_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('shipment_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('return_shipment_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('return_awb', models.CharField(blank=True, max_length=50, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RentalOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.CharField(default='M', max_length=10)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='subcategory_images/')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClothingItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('sizes', models.JSONField(blank=True, default=list)),
+                ('security_deposit', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('daily_rate', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('available', models.BooleanField(default=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='rentals.category')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClothingItemImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='clothing_images/')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='rentals.clothingitem')),
+            ],
+        ),
+    ]
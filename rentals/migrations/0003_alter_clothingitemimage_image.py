@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+import backend.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clothingitemimage',
+            name='image',
+            field=models.ImageField(upload_to=backend.media.ContentHashedUploadTo('clothing_images')),
+        ),
+    ]
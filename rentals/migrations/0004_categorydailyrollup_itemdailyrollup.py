@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0003_alter_clothingitemimage_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rentals_started', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('deposit_held', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rentals.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'category'], name='rentals_cat_day_5a91bd_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('deposit_held', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rentals.category')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='rentals.clothingitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'day'], name='rentals_ite_item_id_305c7f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'item'), name='item_rollup_day_item')],
+            },
+        ),
+    ]
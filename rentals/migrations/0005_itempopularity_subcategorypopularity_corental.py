@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0004_categorydailyrollup_itemdailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemPopularity',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='rentals.clothingitem')),
+                ('score', models.FloatField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubCategoryPopularity',
+            fields=[
+                ('subcategory', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='rentals.subcategory')),
+                ('score', models.FloatField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CoRental',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_rentals', to='rentals.clothingitem')),
+                ('related_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rentals.clothingitem')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('item', 'rank'), name='corental_item_rank')],
+            },
+        ),
+    ]
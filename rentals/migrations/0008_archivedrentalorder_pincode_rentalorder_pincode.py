@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0007_orderstatuslog_alter_archivedrentalorder_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedrentalorder',
+            name='pincode',
+            field=models.CharField(blank=True, default='', max_length=6),
+        ),
+        migrations.AddField(
+            model_name='rentalorder',
+            name='pincode',
+            field=models.CharField(blank=True, default='', max_length=6),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0008_archivedrentalorder_pincode_rentalorder_pincode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentalorder',
+            index=models.Index(fields=['status', 'start_date'], name='rentals_ren_status_ca1916_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalorder',
+            index=models.Index(fields=['start_date'], name='rentals_ren_start_d_46a3e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalorder',
+            index=models.Index(fields=['created_at'], name='rentals_ren_created_a9c3b6_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0009_rentalorder_rentals_ren_status_ca1916_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedrentalorder',
+            name='city',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='archivedrentalorder',
+            name='state',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='rentalorder',
+            name='city',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='rentalorder',
+            name='state',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
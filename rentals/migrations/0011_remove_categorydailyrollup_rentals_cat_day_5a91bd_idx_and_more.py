@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0010_archivedrentalorder_city_archivedrentalorder_state_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='categorydailyrollup',
+            name='rentals_cat_day_5a91bd_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='categorydailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'category'), name='category_rollup_day_category'),
+        ),
+    ]
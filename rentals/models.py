@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from backend.media import ContentHashedUploadTo
+
 User = get_user_model()
 
 class Category(models.Model):
@@ -10,12 +12,19 @@ class Category(models.Model):
 
     def __str__(self): return self.name
 
+class SubCategoryManager(models.Manager):
+    # __str__ shows the parent category, so always fetch it in the same query
+    def get_queryset(self):
+        return super().get_queryset().select_related("category")
+
 class SubCategory(models.Model):
     category = models.ForeignKey(Category, related_name="subcategories", on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     image = models.ImageField(upload_to="subcategory_images/", null=True, blank=True)
 
+    objects = SubCategoryManager()
+
     def __str__(self): return f"{self.name} ({self.category.name})"
 
 SIZE_CHOICES = [
@@ -37,31 +46,44 @@ class ClothingItem(models.Model):
     daily_rate  = models.DecimalField(max_digits=8, decimal_places=2)
     available   = models.BooleanField(default=True)
 
-    def __str__(self): return f"{self.name} ({self.category.name} > {self.subcategory.name if self.subcategory else 'No Sub'})"
+    def __str__(self): return f"{self.name} ({self.category.name if self.category else 'No Category'} > {self.subcategory.name if self.subcategory else 'No Sub'})"
 
 class ClothingItemImage(models.Model):
     item  = models.ForeignKey(ClothingItem, related_name="images", on_delete=models.CASCADE)
-    image = models.ImageField(upload_to="clothing_images/")
+    image = models.ImageField(upload_to=ContentHashedUploadTo("clothing_images"))  # immutable URLs
 
     def __str__(self):
         return f"Image for {self.item.name}"
 
 class RentalOrder(models.Model):
+    # transitions: rentals.lifecycle
     STATUS_CHOICES = [
         ("pending", "Pending"),
         ("active", "Active"),
+        ("shipped", "Shipped"),
+        ("delivered", "Delivered"),
+        ("return_picked", "Return picked up"),
         ("completed", "Completed"),
+        ("cancelled", "Cancelled"),
     ]
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    # paid for; pending orders wait for payment, cancelled ones never got it
+    PAID_STATUSES = ("active", "shipped", "delivered", "return_picked", "completed")
+    # hold their items for their dates (the overlap check)
+    BLOCKING_STATUSES = ("pending", "active", "shipped", "delivered", "return_picked")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     name = models.CharField(max_length=100, default="name")
     email = models.EmailField(default="email")
     phone = models.CharField(max_length=15, default="+91")
     address = models.TextField(default="city")
+    # delivery address, set at checkout
+    pincode = models.CharField(max_length=6, blank=True, default="")
+    city = models.CharField(max_length=100, blank=True, default="")
+    state = models.CharField(max_length=100, blank=True, default="")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
     start_date = models.DateField()
     end_date = models.DateField()
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    payment_id = models.CharField(max_length=100, blank=True, null=True)
+    payment_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)  # webhook lookups
     shiprocket_awb = models.CharField(max_length=50, blank=True, null=True)
     shiprocket_shipment_id = models.CharField(max_length=50, blank=True, null=True)
     shipment_id = models.CharField(max_length=50, blank=True, null=True)
@@ -69,17 +91,35 @@ class RentalOrder(models.Model):
     return_shipment_id = models.CharField(max_length=50, blank=True, null=True)
     return_awb = models.CharField(max_length=50, blank=True, null=True)
 
+    class Meta:
+        # the admin's status and date filters, and the lifecycle's status scans
+        indexes = [
+            models.Index(fields=["status", "start_date"]),
+            models.Index(fields=["start_date"]),
+            models.Index(fields=["created_at"]),
+        ]
+
     def save(self, *args, **kwargs):
     # Only calculate after order exists and has items
-        if self.pk:
+    # (skipped for partial saves that wouldn't write total_price anyway)
+        update_fields = kwargs.get("update_fields")
+        if self.pk and (update_fields is None or "total_price" in update_fields):
             days = (self.end_date - self.start_date).days + 1
             total = 0
-            for order_item in self.items.all():
+            for order_item in self.items.select_related("item"):
                 daily = order_item.item.daily_rate * order_item.quantity * days
                 deposit = order_item.item.security_deposit * order_item.quantity
                 total += daily + deposit
             self.total_price = total
         super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        order = super().from_db(db, field_names, values)
+        # the stored state, so signal handlers can tell what a save changed
+        order._stored = dict(zip(field_names, values))
+        return order
+
     def __str__(self):
         return f"Order #{self.id} - {self.user.email} ({self.start_date} to {self.end_date})"
 
@@ -92,4 +132,104 @@ class RentalOrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
 
     def __str__(self):
-        return f"{self.item.name} (x{self.quantity})"
\ No newline at end of file
+        return f"{self.item.name} (x{self.quantity})"
+
+
+class OrderStatusLog(models.Model):
+    """Audit trail of status transitions (rentals.lifecycle)."""
+    order_id = models.BigIntegerField(db_index=True)  # no FK: the log outlives archived orders
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    reason = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} -> {self.to_status} ({self.reason})"
+
+
+# Completed orders moved out of the live tables by rentals.archive, keeping
+# their ids. Columns mirror RentalOrder/RentalOrderItem.
+class ArchivedRentalOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    status = models.CharField(max_length=20, choices=RentalOrder.STATUS_CHOICES)
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    phone = models.CharField(max_length=15)
+    address = models.TextField()
+    pincode = models.CharField(max_length=6, blank=True, default="")
+    city = models.CharField(max_length=100, blank=True, default="")
+    state = models.CharField(max_length=100, blank=True, default="")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_orders")
+    start_date = models.DateField()
+    end_date = models.DateField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_id = models.CharField(max_length=100, blank=True, null=True)
+    shiprocket_awb = models.CharField(max_length=50, blank=True, null=True)
+    shiprocket_shipment_id = models.CharField(max_length=50, blank=True, null=True)
+    shipment_id = models.CharField(max_length=50, blank=True, null=True)
+    created_at = models.DateTimeField()
+    return_shipment_id = models.CharField(max_length=50, blank=True, null=True)
+    return_awb = models.CharField(max_length=50, blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived order #{self.id} ({self.start_date} to {self.end_date})"
+
+
+class ArchivedRentalOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedRentalOrder, related_name="items", on_delete=models.CASCADE)
+    item = models.ForeignKey(ClothingItem, on_delete=models.PROTECT, related_name="+")
+    size = models.CharField(max_length=10)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.item.name} (x{self.quantity})"
+
+
+# Daily rollups for the staff reports, maintained by rentals.rollups.
+class ItemDailyRollup(models.Model):
+    day = models.DateField()
+    item = models.ForeignKey(ClothingItem, on_delete=models.CASCADE, related_name="daily_rollups")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, related_name="+")
+    units = models.PositiveIntegerField(default=0)  # units out on rent that day
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    deposit_held = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "item"], name="item_rollup_day_item")]
+        indexes = [models.Index(fields=["item", "day"])]
+
+
+class CategoryDailyRollup(models.Model):
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, related_name="+")
+    rentals_started = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    deposit_held = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "category"], name="category_rollup_day_category")]
+
+
+# Rankings rebuilt periodically by `manage.py build_popularity` (rentals.popularity).
+class ItemPopularity(models.Model):
+    item = models.OneToOneField(ClothingItem, on_delete=models.CASCADE, primary_key=True, related_name="popularity")
+    score = models.FloatField(default=0, db_index=True)
+
+
+class SubCategoryPopularity(models.Model):
+    subcategory = models.OneToOneField(SubCategory, on_delete=models.CASCADE, primary_key=True, related_name="popularity")
+    score = models.FloatField(default=0, db_index=True)
+
+
+class CoRental(models.Model):
+    """`related_item` is the rank-th item most often rented together with `item`."""
+    item = models.ForeignKey(ClothingItem, on_delete=models.CASCADE, related_name="co_rentals")
+    related_item = models.ForeignKey(ClothingItem, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["item", "rank"], name="corental_item_rank")]
@@ -0,0 +1,81 @@
+# rentals/popularity.py
+"""
+Precomputed "trending" scores and "often rented with" lists.
+
+A periodic job (`manage.py build_popularity`, e.g. hourly from cron) reads
+the paid order lines booked within the lookback window and writes:
+
+- ItemPopularity / SubCategoryPopularity: time-decayed rental counts, each
+  unit booked `age` days ago weighing 0.5 ** (age / half_life);
+- CoRental: for every item, the top-N other items booked in the same
+  orders, scored with the same decay.
+
+Reads (`?ordering=popular`, an item's `related` field) are indexed lookups
+on these tables and never touch order history.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from itertools import permutations
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import autocomplete
+from .models import CoRental, ItemPopularity, RentalOrderItem, SubCategoryPopularity
+from .rollups import COUNTED_STATUSES
+
+HALF_LIFE_DAYS = 14
+LOOKBACK_DAYS = 180
+TOP_N = 8
+# bulk/staff orders say little about what goes together and cost n^2 pairs
+MAX_ITEMS_PER_ORDER = 20
+
+
+def build_popularity(half_life=HALF_LIFE_DAYS, lookback=LOOKBACK_DAYS, top_n=TOP_N, now=None):
+    """Rebuild the popularity and co-rental tables. Returns (items, subcategories, co-rental rows)."""
+    now = now or timezone.now()
+    lines = RentalOrderItem.objects.filter(
+        order__status__in=COUNTED_STATUSES,
+        order__created_at__gte=now - timedelta(days=lookback),
+    ).values_list("order_id", "item_id", "item__subcategory_id", "quantity", "order__created_at")
+
+    items = defaultdict(float)
+    subcategories = defaultdict(float)
+    orders = defaultdict(set)
+    order_weight = {}
+    for order_id, item_id, subcategory_id, quantity, created_at in lines:
+        age = max((now - created_at).total_seconds() / 86400, 0)
+        weight = order_weight.setdefault(order_id, 0.5 ** (age / half_life))
+        items[item_id] += quantity * weight
+        if subcategory_id:
+            subcategories[subcategory_id] += quantity * weight
+        orders[order_id].add(item_id)
+
+    pairs = defaultdict(lambda: defaultdict(float))
+    for order_id, basket in orders.items():
+        if 1 < len(basket) <= MAX_ITEMS_PER_ORDER:
+            for item_id, other in permutations(basket, 2):
+                pairs[item_id][other] += order_weight[order_id]
+    co_rentals = [
+        CoRental(item_id=item_id, related_item_id=other, rank=rank, score=score)
+        for item_id, scores in pairs.items()
+        for rank, (score, other) in enumerate(
+            heapq.nlargest(top_n, ((s, o) for o, s in scores.items())), start=1
+        )
+    ]
+
+    with transaction.atomic():
+        ItemPopularity.objects.all().delete()
+        SubCategoryPopularity.objects.all().delete()
+        CoRental.objects.all().delete()
+        ItemPopularity.objects.bulk_create(
+            [ItemPopularity(item_id=pk, score=score) for pk, score in items.items()], batch_size=1000,
+        )
+        SubCategoryPopularity.objects.bulk_create(
+            [SubCategoryPopularity(subcategory_id=pk, score=score) for pk, score in subcategories.items()],
+            batch_size=1000,
+        )
+        CoRental.objects.bulk_create(co_rentals, batch_size=1000)
+    autocomplete.invalidate()  # re-rank suggestions by the new scores
+    return len(items), len(subcategories), len(co_rentals)
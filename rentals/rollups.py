@@ -0,0 +1,192 @@
+# rentals/rollups.py
+"""
+Daily utilization and revenue rollups behind the staff reports.
+
+ItemDailyRollup has a row per item per day it is out on a paid rental (units,
+daily-rate revenue, deposit held); CategoryDailyRollup sums those per
+category and counts the rentals starting that day. Reports read a month or a
+year of rollup rows, never RentalOrder itself, so they cost the same however
+long the order history grows.
+
+Rows are kept current per day: when an order enters or leaves
+COUNTED_STATUSES, changes dates, or a counted order's lines change, the days
+it covers (before and after) are recomputed from the orders overlapping them,
+after the transaction commits. A refresh locks the days' rollup rows (on
+MySQL, with the gaps between them) before reading the orders, and rewrites
+them in the same transaction, so two refreshes of the same days run one
+after the other, never interleaved. `manage.py rebuild_rollups` recomputes any
+range from scratch (archived orders included), e.g. for the initial
+backfill. Rates are read when a day is computed, so repricing an item
+leaves rolled-up history alone until that range is rebuilt.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import partial
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import DEFERRED, Count, DecimalField, F, FilteredRelation, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import (
+    ArchivedRentalOrderItem, CategoryDailyRollup, ClothingItem, ItemDailyRollup, RentalOrder, RentalOrderItem,
+)
+
+COUNTED_STATUSES = RentalOrder.PAID_STATUSES
+WINDOW_DAYS = 31  # backfill chunk
+
+
+def counted_window(status, start_date, end_date):
+    """The (first, last) days an order in `status` contributes, or None."""
+    if status not in COUNTED_STATUSES or not start_date or not end_date:
+        return None
+    return start_date, end_date
+
+
+def _days(first, last):
+    for offset in range((last - first).days + 1):
+        yield first + timedelta(days=offset)
+
+
+def refresh_rollups(first, last):
+    """Recompute the rollup rows for every day in [first, last]. Returns rows written."""
+    columns = (
+        "order_id", "item_id", "item__category_id", "quantity", "item__daily_rate",
+        "item__security_deposit", "order__start_date", "order__end_date",
+    )
+    overlapping = {"order__status__in": COUNTED_STATUSES, "order__start_date__lte": last, "order__end_date__gte": first}
+    with transaction.atomic():
+        # a concurrent refresh of these days waits here until this one commits,
+        # then reads the orders as they are after it
+        item_rows = ItemDailyRollup.objects.select_for_update().filter(day__range=(first, last))
+        category_rows = CategoryDailyRollup.objects.select_for_update().filter(day__range=(first, last))
+        list(item_rows.values_list("pk"))
+        list(category_rows.values_list("pk"))
+
+        lines = chain(
+            RentalOrderItem.objects.filter(**overlapping).values_list(*columns),
+            ArchivedRentalOrderItem.objects.filter(**overlapping).values_list(*columns),
+        )
+        items = defaultdict(lambda: [0, Decimal(0), Decimal(0)])  # (day, item, category)
+        categories = defaultdict(lambda: [set(), 0, Decimal(0), Decimal(0)])  # (day, category)
+        for order_id, item_id, category_id, quantity, rate, deposit, start, end in lines:
+            if first <= start <= last:
+                categories[start, category_id][0].add(order_id)
+            for day in _days(max(start, first), min(end, last)):
+                item_row = items[day, item_id, category_id]
+                item_row[0] += quantity
+                item_row[1] += rate * quantity
+                item_row[2] += deposit * quantity
+                cat_row = categories[day, category_id]
+                cat_row[1] += quantity
+                cat_row[2] += rate * quantity
+                cat_row[3] += deposit * quantity
+
+        item_rows.delete()
+        category_rows.delete()
+        ItemDailyRollup.objects.bulk_create([
+            ItemDailyRollup(day=day, item_id=item_id, category_id=category_id,
+                            units=units, revenue=revenue, deposit_held=deposit)
+            for (day, item_id, category_id), (units, revenue, deposit) in items.items()
+        ], batch_size=1000)
+        CategoryDailyRollup.objects.bulk_create([
+            CategoryDailyRollup(day=day, category_id=category_id, rentals_started=len(started),
+                                units=units, revenue=revenue, deposit_held=deposit)
+            for (day, category_id), (started, units, revenue, deposit) in categories.items()
+        ], batch_size=1000)
+    return len(items) + len(categories)
+
+
+def rebuild_rollups(first, last, window=WINDOW_DAYS):
+    """refresh_rollups() over a long range, a window at a time. Yields (first, last, rows)."""
+    while first <= last:
+        chunk_end = min(first + timedelta(days=window - 1), last)
+        yield first, chunk_end, refresh_rollups(first, chunk_end)
+        first = chunk_end + timedelta(days=1)
+
+
+def schedule_refresh(*windows):
+    """Refresh the days covered by `windows` ((first, last) or None) once the transaction commits."""
+    spans = sorted(w for w in windows if w)
+    merged = []
+    for first, last in spans:
+        if merged and first <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    for first, last in merged:
+        # robust: a failed refresh is logged, not raised at the caller; rebuild_rollups repairs it
+        transaction.on_commit(partial(refresh_rollups, first, last), robust=True)
+
+
+def stored_window(order):
+    """The counted window as of the last load/save, or None for new orders."""
+    stored = getattr(order, "_stored", None)
+    if stored is None:
+        return None
+    values = [stored.get(name, DEFERRED) for name in ("status", "start_date", "end_date")]
+    if DEFERRED in values:  # not loaded: assume it counted over its current dates
+        return order.start_date, order.end_date
+    return counted_window(*values)
+
+
+def parse_period(value, today=None):
+    """'YYYY' or 'YYYY-MM' (default: this month) to (first day, last day); ValueError otherwise."""
+    today = today or timezone.localdate()
+    if not value:
+        value = f"{today:%Y-%m}"
+    parts = value.split("-")
+    if len(parts) not in (1, 2) or not all(p.isdigit() for p in parts):
+        raise ValueError(f"{value!r} is not a YYYY or YYYY-MM period")
+    year = int(parts[0])
+    if len(parts) == 1:
+        return date(year, 1, 1), date(year, 12, 31)
+    month = int(parts[1])
+    if not 1 <= month <= 12:
+        raise ValueError(f"{value!r} is not a YYYY or YYYY-MM period")
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def item_report(first, last, category=None):
+    """
+    Per item over [first, last], busiest first: days rented, unit-days,
+    revenue and peak deposit. A values() queryset aggregated in the database,
+    for the caller to page; with_utilization() finishes the rows it keeps.
+    """
+    zero = Value(Decimal("0.00"), output_field=DecimalField(max_digits=12, decimal_places=2))
+    # the period goes in the JOIN's ON clause, so unrented items stay and the (item, day) index is used
+    items = ClothingItem.objects.annotate(
+        period=FilteredRelation("daily_rollups", condition=Q(daily_rollups__day__range=(first, last))),
+    )
+    if category:
+        items = items.filter(category__slug=category)
+    return items.values("id", "name", "category_id").annotate(
+        rental_days=Count("period"), unit_days=Coalesce(Sum("period__units"), 0),
+        revenue=Coalesce(Sum("period__revenue"), zero), deposit_held=Coalesce(Max("period__deposit_held"), zero),
+    ).order_by("-revenue", "id")
+
+
+def with_utilization(rows, first, last):
+    """Add utilization (rental_days as a % of the period's days) to item_report() rows."""
+    days = (last - first).days + 1
+    for row in rows:
+        row["utilization"] = round(100 * row["rental_days"] / days, 1)
+    return rows
+
+
+def category_report(first, last, granularity="day"):
+    """Per category and day (or month) over [first, last]; deposit_held is the peak daily balance."""
+    bucket = F("day") if granularity == "day" else TruncMonth("day")
+    return list(
+        CategoryDailyRollup.objects.filter(day__range=(first, last))
+        .annotate(period=bucket)
+        .values("period", "category_id", name=F("category__name"))
+        .annotate(
+            rentals_started=Sum("rentals_started"), unit_days=Sum("units"),
+            revenue=Sum("revenue"), deposit_held=Max("deposit_held"),
+        )
+        .order_by("period", "category_id")
+    )
@@ -1,14 +1,21 @@
 from rest_framework import serializers
-from .models import Category, ClothingItem, ClothingItemImage, RentalOrder, SubCategory, RentalOrderItem
+from drf_spectacular.utils import extend_schema_field, OpenApiTypes
+from .models import (
+    ArchivedRentalOrder, ArchivedRentalOrderItem, Category, ClothingItem, ClothingItemImage, CoRental,
+    RentalOrder, SubCategory, RentalOrderItem,
+)
+from .bulk import MAX_BULK
+from .dynamic_fields import DynamicFieldsMixin
+from .serviceability import PINCODE_RE
 from django.db.models import Q
 from datetime import timedelta
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = "__all__"
 
-class SubCategorySerializer(serializers.ModelSerializer):
+class SubCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category_slug = serializers.CharField(source="category.slug", read_only=True)
     category_name = serializers.CharField(source="category.name", read_only=True)
 
@@ -20,6 +27,7 @@ class SubCategorySerializer(serializers.ModelSerializer):
             "category_name",  # readable name
             "category_slug"   # readable slug
         )
+        expandable_fields = {"category": (CategorySerializer, {})}
 
 
 class ClothingItemImageSerializer(serializers.ModelSerializer):
@@ -27,7 +35,30 @@ class ClothingItemImageSerializer(serializers.ModelSerializer):
         model  = ClothingItemImage
         fields = ("id","image")
 
-class ClothingItemSerializer(serializers.ModelSerializer):
+def image_url(name, request):
+    if not name:
+        return None
+    url = ClothingItemImage._meta.get_field("image").storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+class RelatedItemSerializer(serializers.ModelSerializer):
+    # serializes CoRental links, annotated by ClothingItemViewSet with the image
+    id = serializers.IntegerField(source="related_item_id")
+    name = serializers.CharField(source="related_item.name")
+    daily_rate = serializers.DecimalField(source="related_item.daily_rate", max_digits=8, decimal_places=2)
+    primary_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CoRental
+        fields = ("id", "name", "daily_rate", "primary_image")
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_primary_image(self, link):
+        return image_url(getattr(link, "primary_image_name", None), self.context.get("request"))
+
+
+class ClothingItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = ClothingItemImageSerializer(many=True, read_only=True)
     image_files = serializers.ListField(
         child=serializers.ImageField(),
@@ -37,6 +68,8 @@ class ClothingItemSerializer(serializers.ModelSerializer):
     )
     category = CategorySerializer(read_only=True)
     subcategory = SubCategorySerializer(read_only=True)
+    primary_image = serializers.SerializerMethodField()
+    related = serializers.SerializerMethodField()
     
     # ✅ Fixed these lines
     category_id = serializers.PrimaryKeyRelatedField(
@@ -56,8 +89,38 @@ class ClothingItemSerializer(serializers.ModelSerializer):
         fields = (
             "id", "name", "description", "category", "subcategory",
             "category_id", "subcategory_id", "sizes", "daily_rate",
-            "available", "images", "image_files","security_deposit"
+            "available", "images", "image_files","security_deposit",
+            "primary_image", "related",
         )
+        expandable_fields = {
+            "category": (CategorySerializer, {}),
+            "subcategory": (SubCategorySerializer, {}),
+            "images": (ClothingItemImageSerializer, {"many": True}),
+        }
+        default_expand = ("category", "subcategory", "images")
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_primary_image(self, item):
+        """URL of the item's first image, for listing cards."""
+        # annotated by ClothingItemViewSet on slim requests, else from the prefetched images
+        if hasattr(item, "primary_image_name"):
+            name = item.primary_image_name
+        else:
+            images = sorted(item.images.all(), key=lambda image: image.pk)
+            name = images[0].image.name if images else None
+        return image_url(name, self.context.get("request"))
+
+    @extend_schema_field(RelatedItemSerializer(many=True))
+    def get_related(self, item):
+        """Items often rented together with this one, best match first. Item detail only."""
+        return RelatedItemSerializer(item.co_rentals.all(), many=True, context=self.context).data
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # a lookup per card would be an N+1 on lists
+        if isinstance(self.parent, serializers.ListSerializer):
+            fields.pop("related", None)
+        return fields
 
     def create(self, validated_data):
         files = validated_data.pop("image_files", [])
@@ -79,7 +142,7 @@ class RentalOrderItemSerializer(serializers.ModelSerializer):
         fields = ("id", "item", "size", "quantity")
 
 
-class RentalOrderSerializer(serializers.ModelSerializer):
+class RentalOrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     items = RentalOrderItemSerializer(many=True)
 
@@ -87,16 +150,23 @@ class RentalOrderSerializer(serializers.ModelSerializer):
         model = RentalOrder
         fields = (
             "id", "items", "start_date", "end_date",
-            "total_price", "status", "created_at"
+            "total_price", "status", "created_at", "pincode", "city", "state",
         )
-        read_only_fields = ("id", "total_price", "created_at")
+        read_only_fields = ("id", "total_price", "status", "created_at")  # status: rentals.lifecycle
         
+    def validate_pincode(self, value):
+        if value and not PINCODE_RE.match(value):
+            raise serializers.ValidationError("Enter a valid 6-digit pincode.")
+        return value
+
     def validate(self, data):
         start_date = data["start_date"]
         end_date = data["end_date"]
 
         if end_date < start_date:
             raise serializers.ValidationError("`end_date` must not be before `start_date`")
+        if data.get("pincode") and not (data.get("city") and data.get("state")):
+            raise serializers.ValidationError({"pincode": "Enter the city and state for this pincode."})
 
         for item_data in data.get("items", []):
             item = item_data["item"]
@@ -107,7 +177,7 @@ class RentalOrderSerializer(serializers.ModelSerializer):
 
             overlapping_orders = RentalOrderItem.objects.filter(
                 item=item,
-                order__status__in=["pending", "active"],
+                order__status__in=RentalOrder.BLOCKING_STATUSES,
                 order__start_date__lte=end_date,
                 order__end_date__gte=start_date,
             )
@@ -131,4 +201,102 @@ class RentalOrderSerializer(serializers.ModelSerializer):
         order.save()
         return order
 
-        
\ No newline at end of file
+        
+
+
+class ArchivedRentalOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedRentalOrderItem
+        fields = ("id", "item", "size", "quantity")
+
+
+class ArchivedRentalOrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # same shape as RentalOrderSerializer, read-only
+    items = ArchivedRentalOrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedRentalOrder
+        fields = RentalOrderSerializer.Meta.fields
+        read_only_fields = fields
+
+
+class ItemReportSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    category = serializers.IntegerField(source="category_id", allow_null=True)
+    rental_days = serializers.IntegerField(help_text="Days with at least one unit out on rent")
+    unit_days = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    deposit_held = serializers.DecimalField(max_digits=12, decimal_places=2, help_text="Peak daily deposit held")
+    utilization = serializers.FloatField(help_text="rental_days as a percentage of days in the period")
+
+
+class CategoryReportSerializer(serializers.Serializer):
+    period = serializers.DateField(help_text="The day, or the first of the month")
+    category = serializers.IntegerField(source="category_id", allow_null=True)
+    name = serializers.CharField(allow_null=True)
+    rentals_started = serializers.IntegerField()
+    unit_days = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    deposit_held = serializers.DecimalField(max_digits=12, decimal_places=2, help_text="Peak daily deposit held")
+
+
+class CourierQuoteSerializer(serializers.Serializer):
+    courier = serializers.CharField()
+    rate = serializers.FloatField()
+    days = serializers.IntegerField(allow_null=True, help_text="Estimated delivery days")
+
+
+class ServiceabilitySerializer(serializers.Serializer):
+    pincode = serializers.CharField()
+    serviceable = serializers.BooleanField(allow_null=True, help_text="null when the courier lookup failed")
+    shipping_rate = serializers.FloatField(allow_null=True, help_text="Cheapest courier rate")
+    estimated_days = serializers.IntegerField(allow_null=True, help_text="Fastest courier's estimate")
+    couriers = CourierQuoteSerializer(many=True, help_text="Cheapest first")
+
+
+class ItemBulkChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    available = serializers.BooleanField(required=False)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    subcategory_id = serializers.IntegerField(required=False, allow_null=True, help_text="Alone, also sets its category")
+
+
+class ItemBulkUpdateSerializer(serializers.Serializer):
+    items = ItemBulkChangeSerializer(many=True, allow_empty=False, max_length=MAX_BULK)
+
+
+class OrderBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK)
+    status = serializers.ChoiceField(choices=RentalOrder.STATUS_CHOICES)
+    reason = serializers.CharField(max_length=50, required=False, default="staff")
+
+
+class OrderBulkStatusResultSerializer(serializers.Serializer):
+    moved = serializers.IntegerField()
+    skipped = serializers.ListField(child=serializers.IntegerField(), help_text="Unknown, or can't move to status")
+
+
+class SuggestionSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(source="kind", choices=["item", "subcategory", "category"])
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    slug = serializers.CharField(allow_null=True, help_text="Categories and subcategories only")
+
+
+class CatalogNodeSerializer(serializers.Serializer):
+    # renders rentals.catalog_tree nodes (dicts, images as storage names)
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    slug = serializers.CharField()
+    image = serializers.SerializerMethodField()
+    available_items = serializers.IntegerField()
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_image(self, node):
+        return image_url(node["image"], self.context.get("request"))
+
+
+class CatalogTreeSerializer(CatalogNodeSerializer):
+    available_items = serializers.IntegerField(help_text="Including items in no subcategory")
+    subcategories = CatalogNodeSerializer(many=True)
@@ -0,0 +1,130 @@
+# rentals/serviceability.py
+"""
+Courier serviceability and shipping rates by delivery pincode.
+
+A Shiprocket serviceability lookup takes hundreds of milliseconds, too slow
+for every checkout. Answers are cached for SERVICEABILITY_TTL per (pickup
+pincode, delivery pincode, weight bucket). Parcel weights round up to
+SERVICEABILITY_WEIGHT_STEP_KG, so one entry covers every parcel in that step.
+"Not serviceable" answers are cached too. Failed lookups are not cached and
+come back as None (unknown), so a courier outage doesn't block checkout.
+
+`manage.py prewarm_serviceability` refreshes the entries for the pincodes
+most orders ship to, a few lookups at a time, ahead of the TTL running out.
+"""
+import asyncio
+import math
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from backend.http import async_client_scope
+from backend.metrics import inc
+from .models import RentalOrder
+from .services.shiprocket import ShiprocketAPI, parcel_weight
+
+PINCODE_RE = re.compile(r"^[1-9][0-9]{5}$")
+MAX_COURIERS = 3
+PREWARM_CONCURRENCY = 10
+
+
+def weight_bucket(weight):
+    """`weight` (kg) rounded up to the cache's weight step."""
+    step = settings.SERVICEABILITY_WEIGHT_STEP_KG
+    return round(step * max(1, math.ceil(round(weight / step, 6))), 3)
+
+
+def cache_key(pincode, bucket):
+    return f"shiprocket:serviceability:{settings.SHIPROCKET_PICKUP_PINCODE}:{pincode}:{bucket}"
+
+
+def _days(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize(resp):
+    """Reduce a serviceability response to what checkout needs: cheapest couriers first."""
+    companies = (resp.get("data") or {}).get("available_courier_companies") or ()
+    couriers = sorted(
+        (
+            {"courier": c.get("courier_name"), "rate": c.get("rate"), "days": _days(c.get("estimated_delivery_days"))}
+            for c in companies if c.get("rate") is not None
+        ),
+        key=lambda c: (c["rate"], c["days"] is None, c["days"]),
+    )
+    days = [c["days"] for c in couriers if c["days"] is not None]
+    return {
+        "serviceable": bool(couriers),
+        "shipping_rate": couriers[0]["rate"] if couriers else None,
+        "estimated_days": min(days) if days else None,
+        "couriers": couriers[:MAX_COURIERS],
+    }
+
+
+def check_serviceability(pincode, units=1):
+    """summarize() for shipping `units` garments to `pincode`, from the cache when possible; None if unknown."""
+    bucket = weight_bucket(parcel_weight(units))
+    key = cache_key(pincode, bucket)
+    result = cache.get(key)
+    inc("serviceability_cache_total", (("result", "miss" if result is None else "hit"),))
+    if result is not None:
+        return result
+    try:
+        resp = ShiprocketAPI().serviceability(settings.SHIPROCKET_PICKUP_PINCODE, pincode, bucket)
+    except Exception:  # unknown, not undeliverable: the next checkout tries again
+        return None
+    result = summarize(resp)
+    cache.set(key, result, settings.SERVICEABILITY_TTL)
+    return result
+
+
+def top_pincodes(limit, days=90):
+    """The `limit` pincodes with the most orders in the last `days` days."""
+    since = timezone.now() - timedelta(days=days)
+    return list(
+        RentalOrder.objects.filter(created_at__gte=since).exclude(pincode="")
+        .values("pincode").annotate(orders=Count("id")).order_by("-orders", "pincode")
+        .values_list("pincode", flat=True)[:limit]
+    )
+
+
+async def _fetch(lookups, concurrency):
+    from .services.shiprocket_async import AsyncShiprocketAPI
+
+    api = AsyncShiprocketAPI()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def fetch(pincode, bucket):
+        async with limit:
+            try:
+                return await api.serviceability(settings.SHIPROCKET_PICKUP_PINCODE, pincode, bucket)
+            except Exception:  # left for the next run (or the first checkout) to fill
+                return None
+
+    async with async_client_scope():  # closed before asyncio.run() drops the loop
+        return await asyncio.gather(*(fetch(pincode, bucket) for pincode, bucket in lookups))
+
+
+def prewarm(pincodes, max_units=1, concurrency=None, only_missing=False):
+    """
+    Look up and cache every pincode for parcels of 1..`max_units` garments.
+    Returns (cached, failed) lookup counts.
+    """
+    buckets = sorted({weight_bucket(parcel_weight(units)) for units in range(1, max_units + 1)})
+    lookups = {cache_key(p, b): (p, b) for p in dict.fromkeys(pincodes) for b in buckets}
+    if only_missing:
+        for key in cache.get_many(list(lookups)):
+            del lookups[key]
+    if not lookups:
+        return 0, 0
+    responses = asyncio.run(_fetch(list(lookups.values()), concurrency or PREWARM_CONCURRENCY))
+    fresh = {key: summarize(resp) for key, resp in zip(lookups, responses) if resp is not None}
+    cache.set_many(fresh, settings.SERVICEABILITY_TTL)
+    return len(fresh), len(lookups) - len(fresh)
@@ -1,125 +1,248 @@
 # rentals/services/shiprocket.py
-import requests
+from datetime import datetime
+
 from django.conf import settings
+from django.core.cache import cache
+from backend.metrics import track_external
+
+TOKEN_CACHE_KEY = "shiprocket:token"
+# Shiprocket tokens are valid for 10 days; refresh a little early
+TOKEN_TTL = 9 * 24 * 3600
+
+# HTTP statuses Shiprocket's serviceability lookup answers "no courier" with
+NOT_SERVICEABLE_STATUSES = (404, 422)
+
+
+def parcel_weight(units):
+    """Parcel weight in kg for `units` garments (at least one)."""
+    return max(units, 1) * settings.PARCEL_WEIGHT_PER_ITEM_KG
+
+
+def serviceability_params(pickup_pincode, delivery_pincode, weight):
+    return {
+        "pickup_postcode": pickup_pincode, "delivery_postcode": delivery_pincode,
+        "weight": weight, "cod": 0,
+    }
+
+
+def warehouse_address():
+    return settings.SHIPROCKET_PICKUP_PINCODE, settings.SHIPROCKET_PICKUP_CITY, settings.SHIPROCKET_PICKUP_STATE
+
+
+def delivery_address(order):
+    """(pincode, city, state) the order ships to; the warehouse's for orders from before checkout took them."""
+    if order.pincode:
+        return order.pincode, order.city, order.state
+    return warehouse_address()
+
+
+def order_payload(order):
+    # ✅ Multi-item order support
+    order_items = [
+        {
+            "name": oi.item.name,
+            "sku": str(oi.item.id),
+            "units": oi.quantity,
+            "selling_price": str(oi.item.daily_rate),
+        }
+        for oi in order.items.all()
+    ]
+
+    pincode, city, state = delivery_address(order)
+    payload = {
+        "order_id": str(order.id),
+        "order_date": str(order.created_at.date()),
+        "pickup_location": "warehouse",
+        "billing_customer_name": order.name,
+        "billing_last_name": "",
+        "billing_address": order.address,
+        "billing_city": city,
+        "billing_pincode": pincode,
+        "billing_state": state,
+        "billing_country": "India",
+        "billing_email": order.email,
+        "billing_phone": order.phone,
+        "shipping_is_billing": True,
+        "order_items": order_items,
+        "payment_method": "Prepaid",
+        "sub_total": str(order.total_price),
+        "length": 10,
+        "breadth": 10,
+        "height": 1,
+        "weight": parcel_weight(sum(item["units"] for item in order_items)),
+    }
+    return payload
+
+
+def return_payload(order):
+    """
+    Payload for a reverse pickup (return). Shiprocket needs full order details,
+    not just pickup address.
+    """
+    # same items as the forward order
+    order_items = [
+        {
+            "name": oi.item.name,
+            "sku": str(oi.item.id),
+            "units": oi.quantity,
+            "selling_price": str(oi.item.daily_rate),
+        }
+        for oi in order.items.all()
+    ]
+
+    pincode, city, state = delivery_address(order)
+    warehouse_pincode, warehouse_city, warehouse_state = warehouse_address()
+    payload = {
+        "order_id": f"RETURN-{order.id}",
+        "order_date": str(order.created_at.date()),
+
+        # payment & total
+        "payment_method": "Prepaid",
+        "sub_total": str(order.total_price),
+
+        # shipping (where courier will deliver return)
+        "shipping_customer_name": order.name,
+        "shipping_address": order.address,
+        "shipping_city": warehouse_city,
+        "shipping_state": warehouse_state,
+        "shipping_country": "India",
+        "shipping_pincode": warehouse_pincode,
+        "shipping_email": order.email,
+        "shipping_phone": order.phone,
+
+        # pickup (where courier will collect)
+        "pickup_customer_name": order.name,
+        "pickup_address": order.address,
+        "pickup_city": city,
+        "pickup_state": state,
+        "pickup_country": "India",
+        "pickup_pincode": pincode,
+        "pickup_email": order.email,
+        "pickup_phone": order.phone,
+
+        "order_items": order_items,
+        "length": 10,
+        "breadth": 10,
+        "height": 1,
+        "weight": parcel_weight(sum(item["units"] for item in order_items)),
+        "return_reason": "Rental return",
+    }
+    return payload
+
+
+STATUS_MAP = {
+    0: "Pending Pickup",
+    1: "In Transit",
+    2: "Delivered",
+    3: "Return to Origin Initiated",
+    4: "Return to Origin Delivered",
+}
+
+
+def shipment_status_code(resp, shipment_id):
+    """The numeric shipment_status (see STATUS_MAP) of a track/shipment response, or None."""
+    return resp.get(str(shipment_id), {}).get("tracking_data", {}).get("shipment_status")
+
+
+def summarize_tracking(resp, shipment_id):
+    """Reduce a track/shipment response to what the frontend shows."""
+    # ✅ Extract tracking data safely
+    tracking_data = (
+        resp.get(str(shipment_id), {})
+        .get("tracking_data", {})
+    )
+    expected_delivery = (
+        tracking_data.get("etd") or
+        tracking_data.get("expected_delivery")
+    )
+
+    # ✅ Calculate days_left
+    days_left = None
+    if expected_delivery:
+        try:
+            delivery_date = datetime.strptime(expected_delivery, "%Y-%m-%d").date()
+            today = datetime.today().date()
+            days_left = (delivery_date - today).days
+        except Exception:
+            pass
+
+    shipment_status_code = tracking_data.get("shipment_status", 0)
+    return {
+        "tracking_info": {
+            "tracking_data": {
+                "shipment_status": STATUS_MAP.get(shipment_status_code, "Unknown"),  # ✅ mapped to text
+                "track_url": tracking_data.get("track_url") or "Not available yet",
+                "expected_delivery": expected_delivery,
+            }
+        },
+        "days_left": days_left,
+    }
+
 
 class ShiprocketAPI:
     def __init__(self):
         self.base_url = settings.SHIPROCKET_BASE_URL
         self.token = self.get_token()
 
+    def _request(self, method, url, **kwargs):
+        import requests
+
+        kwargs.setdefault("timeout", settings.UPSTREAM_TIMEOUT)  # checkout waits on serviceability
+        with track_external("shiprocket"):
+            res = requests.request(method, url, **kwargs)
+            if res.status_code == 401:
+                cache.delete(TOKEN_CACHE_KEY)  # expired/revoked: log in again next time
+            res.raise_for_status()
+        return res
+
     def get_token(self):
+        # One login per TOKEN_TTL instead of one per API call
+        token = cache.get(TOKEN_CACHE_KEY)
+        if token:
+            return token
         url = f"{self.base_url}/auth/login"
         payload = {
             "email": settings.SHIPROCKET_EMAIL.strip(),
             "password": settings.SHIPROCKET_PASSWORD,
         }
-        res = requests.post(url, json=payload)
-        res.raise_for_status()
-        return res.json()["token"]
+        res = self._request("post", url, json=payload)
+        token = res.json()["token"]
+        cache.set(TOKEN_CACHE_KEY, token, TOKEN_TTL)
+        return token
 
     def create_order(self, order):
         url = f"{self.base_url}/orders/create/adhoc"
         headers = {"Authorization": f"Bearer {self.token}"}
-
-        # ✅ Multi-item order support
-        order_items = [
-            {
-                "name": oi.item.name,
-                "sku": str(oi.item.id),
-                "units": oi.quantity,
-                "selling_price": str(oi.item.daily_rate),
-            }
-            for oi in order.items.all()
-        ]
-
-        payload = {
-            "order_id": str(order.id),
-            "order_date": str(order.created_at.date()),
-            "pickup_location": "warehouse",
-            "billing_customer_name": order.name,
-            "billing_last_name": "",
-            "billing_address": order.address,
-            "billing_city": "Pune",
-            "billing_pincode": "411042",
-            "billing_state": "Maharashtra",
-            "billing_country": "India",
-            "billing_email": order.email,
-            "billing_phone": order.phone,
-            "shipping_is_billing": True,
-            "order_items": order_items,
-            "payment_method": "Prepaid",
-            "sub_total": str(order.total_price),
-            "length": 10,
-            "breadth": 10,
-            "height": 1,
-            "weight": 0.5
-        }
-        res = requests.post(url, json=payload, headers=headers)
-        res.raise_for_status()
+        res = self._request("post", url, json=order_payload(order), headers=headers)
         return res.json()
 
     def track_order(self, shipment_id):
         url = f"{self.base_url}/courier/track/shipment/{shipment_id}"
         headers = {"Authorization": f"Bearer {self.token}"}
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
+        r = self._request("get", url, headers=headers)
         return r.json()
 
     def create_return_order(self, order):
         """
-        Creates a reverse pickup (return). Shiprocket needs full order details,
-        not just pickup address.
+        Creates a reverse pickup (return).
         """
         url = f"{self.base_url}/orders/create/return"
         headers = {"Authorization": f"Bearer {self.token}"}
+        r = self._request("post", url, json=return_payload(order), headers=headers)
+        return r.json()
 
-        # same items as the forward order
-        order_items = [
-            {
-                "name": oi.item.name,
-                "sku": str(oi.item.id),
-                "units": oi.quantity,
-                "selling_price": str(oi.item.daily_rate),
-            }
-            for oi in order.items.all()
-        ]
-
-        payload = {
-            "order_id": f"RETURN-{order.id}",
-            "order_date": str(order.created_at.date()),
-
-            # payment & total
-            "payment_method": "Prepaid",
-            "sub_total": str(order.total_price),
-
-            # shipping (where courier will deliver return)
-            "shipping_customer_name": order.name,
-            "shipping_address": order.address,
-            "shipping_city": "Pune",
-            "shipping_state": "Maharashtra",
-            "shipping_country": "India",
-            "shipping_pincode": "411042",
-            "shipping_email": order.email,
-            "shipping_phone": order.phone,
-
-            # pickup (where courier will collect)
-            "pickup_customer_name": order.name,
-            "pickup_address": order.address,
-            "pickup_city": "Pune",
-            "pickup_state": "Maharashtra",
-            "pickup_country": "India",
-            "pickup_pincode": "411042",
-            "pickup_email": order.email,
-            "pickup_phone": order.phone,
-
-            "order_items": order_items,
-            "length": 10,
-            "breadth": 10,
-            "height": 1,
-            "weight": 0.5,
-            "return_reason": "Rental return",
-        }
+    def serviceability(self, pickup_pincode, delivery_pincode, weight):
+        """Couriers (with rates) that deliver `weight` kg between two pincodes; {} if none do."""
+        import requests
 
-        r = requests.post(url, json=payload, headers=headers)
-        r.raise_for_status()
+        url = f"{self.base_url}/courier/serviceability/"
+        headers = {"Authorization": f"Bearer {self.token}"}
+        try:
+            r = self._request(
+                "get", url, params=serviceability_params(pickup_pincode, delivery_pincode, weight), headers=headers,
+            )
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in NOT_SERVICEABLE_STATUSES:
+                return {}
+            raise
         return r.json()
@@ -0,0 +1,72 @@
+# rentals/services/shiprocket_async.py
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.http import get_async_client
+from backend.metrics import track_external
+from .shiprocket import (
+    NOT_SERVICEABLE_STATUSES, TOKEN_CACHE_KEY, TOKEN_TTL, order_payload, return_payload, serviceability_params,
+)
+
+
+class AsyncShiprocketAPI:
+    """
+    Async twin of ShiprocketAPI for the ASGI views. Requests go through the
+    pooled httpx client and share the cached login token with the sync API.
+
+    Orders passed in must have `items__item` prefetched: payload building
+    runs inside the event loop and can't touch the ORM.
+    """
+
+    def __init__(self):
+        self.base_url = settings.SHIPROCKET_BASE_URL
+        self.token = None
+
+    async def _request(self, method, path, **kwargs):
+        client = get_async_client()
+        with track_external("shiprocket"):
+            res = await client.request(method, f"{self.base_url}{path}", **kwargs)
+            if res.status_code == 401:
+                await cache.adelete(TOKEN_CACHE_KEY)
+            res.raise_for_status()
+        return res.json()
+
+    async def _headers(self):
+        if self.token is None:
+            self.token = await cache.aget(TOKEN_CACHE_KEY)
+        if self.token is None:
+            data = await self._request("POST", "/auth/login", json={
+                "email": settings.SHIPROCKET_EMAIL.strip(),
+                "password": settings.SHIPROCKET_PASSWORD,
+            })
+            self.token = data["token"]
+            await cache.aset(TOKEN_CACHE_KEY, self.token, TOKEN_TTL)
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def create_order(self, order):
+        return await self._request(
+            "POST", "/orders/create/adhoc", json=order_payload(order), headers=await self._headers()
+        )
+
+    async def track_order(self, shipment_id):
+        return await self._request(
+            "GET", f"/courier/track/shipment/{shipment_id}", headers=await self._headers()
+        )
+
+    async def create_return_order(self, order):
+        return await self._request(
+            "POST", "/orders/create/return", json=return_payload(order), headers=await self._headers()
+        )
+
+    async def serviceability(self, pickup_pincode, delivery_pincode, weight):
+        import httpx
+
+        try:
+            return await self._request(
+                "GET", "/courier/serviceability/",
+                params=serviceability_params(pickup_pincode, delivery_pincode, weight), headers=await self._headers(),
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in NOT_SERVICEABLE_STATUSES:
+                return {}
+            raise
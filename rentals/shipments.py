@@ -0,0 +1,82 @@
+# rentals/shipments.py
+"""
+Shiprocket shipments and return pickups for many orders at once (the order
+admin's actions). Requests go out TRACKING_CONCURRENCY at a time through
+the async client, as the tracking poll's do, and the ids that come back are
+written with one bulk_update(). An order whose request fails is left as it
+was, to be tried again.
+"""
+import asyncio
+
+from django.conf import settings
+from django.db.models import Q
+
+from backend.http import async_client_scope
+from .models import RentalOrder
+
+MAX_SHIPMENTS = 100  # per call: each one is a courier API request
+
+# the fields each kind of shipment fills in, and the response keys they come
+# from; shipment_id (Shiprocket's order id) is what order tracking looks up,
+# as the payment webhook sets it
+FORWARD_FIELDS = {"shipment_id": "order_id", "shiprocket_shipment_id": "shipment_id", "shiprocket_awb": "awb_code"}
+RETURN_FIELDS = {"return_shipment_id": "shipment_id", "return_awb": "awb_code"}
+
+
+def _unset(field):
+    return Q(**{f"{field}__isnull": True}) | Q(**{field: ""})
+
+
+def shippable(orders):
+    """The orders in `orders` that are paid for and have no shipment yet."""
+    return orders.filter(_unset("shiprocket_shipment_id"), status="active")
+
+
+def returnable(orders):
+    """The orders in `orders` that went out and have no return pickup yet."""
+    return orders.filter(_unset("return_shipment_id"), status__in=("shipped", "delivered")).exclude(
+        _unset("shiprocket_shipment_id")
+    )
+
+
+async def _create(orders, returns, concurrency):
+    from .services.shiprocket_async import AsyncShiprocketAPI
+
+    api = AsyncShiprocketAPI()
+    limit = asyncio.Semaphore(concurrency)
+    create = api.create_return_order if returns else api.create_order
+
+    async def one(order):
+        async with limit:
+            try:
+                return await create(order)
+            except Exception:  # one failing order must not stop the others
+                return None
+
+    async with async_client_scope():  # closed before asyncio.run() drops the loop
+        return await asyncio.gather(*(one(order) for order in orders))
+
+
+def create_shipments(orders, returns=False, concurrency=None):
+    """
+    Create shipments (with `returns`, return pickups) for the eligible orders
+    in `orders`, at most MAX_SHIPMENTS of them. Returns (created, failed);
+    orders that aren't eligible count as neither.
+    """
+    eligible = returnable(orders) if returns else shippable(orders)
+    # payloads are built inside the event loop: load the line items up front
+    batch = list(eligible.order_by("pk").prefetch_related("items__item")[:MAX_SHIPMENTS])
+    if not batch:
+        return 0, 0
+    responses = asyncio.run(_create(batch, returns, concurrency or settings.TRACKING_CONCURRENCY))
+    fields = RETURN_FIELDS if returns else FORWARD_FIELDS
+    created = []
+    for order, resp in zip(batch, responses):
+        if resp is None:
+            continue
+        for field, key in fields.items():
+            value = resp.get(key)
+            setattr(order, field, None if value is None else str(value))
+        created.append(order)
+    RentalOrder.objects.bulk_update(created, list(fields))
+    return len(created), len(batch) - len(created)
@@ -0,0 +1,84 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.db_router import pin_to_primary
+from . import autocomplete, catalog_tree
+from .archive import is_archiving
+from .models import Category, ClothingItem, RentalOrder, RentalOrderItem, SubCategory
+from .rollups import COUNTED_STATUSES, counted_window, schedule_refresh, stored_window
+
+
+@receiver(post_save, sender=RentalOrder)
+@receiver(post_delete, sender=RentalOrder)
+def pin_order_owner(sender, instance, **kwargs):
+    if is_archiving():
+        return
+    # read-after-write: the owner's next tracking reads skip the replica
+    pin_to_primary(instance.user_id)
+
+
+@receiver(post_save, sender=RentalOrder)
+def refresh_order_rollups(sender, instance, **kwargs):
+    before = stored_window(instance)
+    after = counted_window(instance.status, instance.start_date, instance.end_date)
+    if before != after:
+        schedule_refresh(before, after)
+    # the next save compares against what was just written
+    instance._stored = {"status": instance.status, "start_date": instance.start_date, "end_date": instance.end_date}
+
+
+@receiver(post_delete, sender=RentalOrder)
+def drop_order_rollups(sender, instance, **kwargs):
+    if is_archiving():  # the archive keeps counting in the rollups
+        return
+    schedule_refresh(stored_window(instance))
+
+
+@receiver(post_save, sender=RentalOrderItem)
+@receiver(post_delete, sender=RentalOrderItem)
+def refresh_line_rollups(sender, instance, origin=None, **kwargs):
+    # lines cascading away with their order: drop_order_rollups covers them
+    if isinstance(origin, RentalOrder) or getattr(origin, "model", None) is RentalOrder:
+        return
+    if RentalOrderItem.order.is_cached(instance):  # e.g. lines created along with their order
+        order = instance.order
+        window = counted_window(order.status, order.start_date, order.end_date)
+    else:
+        window = RentalOrder.objects.filter(
+            pk=instance.order_id, status__in=COUNTED_STATUSES,
+        ).values_list("start_date", "end_date").first()
+    schedule_refresh(window)
+
+
+# search-box index (rentals.autocomplete), patched once the change is committed
+@receiver(post_save, sender=ClothingItem)
+def index_item(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.item_saved, instance), robust=True)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def index_category(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.category_saved, instance), robust=True)
+
+
+@receiver(post_delete, sender=ClothingItem)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def unindex(sender, instance, **kwargs):
+    kind = {ClothingItem: "item", Category: "category", SubCategory: "subcategory"}[sender]
+    transaction.on_commit(partial(autocomplete.removed, kind, instance.pk), robust=True)
+
+
+# navigation menu counts (rentals.catalog_tree), rebuilt on the next request after commit
+@receiver(post_save, sender=ClothingItem)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=ClothingItem)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def drop_catalog_tree(sender, instance, **kwargs):
+    transaction.on_commit(catalog_tree.invalidate, robust=True)
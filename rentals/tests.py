@@ -1,3 +1,1179 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import re
+import tempfile
+from contextlib import redirect_stderr
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone as django_timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.compression import brotli
+from backend.http import async_client_scope, get_async_client
+from backend.media import IMMUTABLE_CACHE_CONTROL
+from backend.renderers import ORJSONParser, ORJSONRenderer
+from backend.db_router import PrimaryReplicaRouter, pin_to_primary, replica_reads
+from backend.metrics import registry
+from backend.query_budget import QueryBudget
+from users.models import OTPRequest
+from users.stats import annotate_order_stats
+from . import autocomplete
+from .models import (
+    ArchivedRentalOrder, ArchivedRentalOrderItem, Category, CategoryDailyRollup, ClothingItem,
+    ClothingItemImage, ItemDailyRollup, ItemPopularity, OrderStatusLog, RentalOrder, RentalOrderItem, SubCategory,
+)
+from .lifecycle import REFUND_DUE, InvalidTransition, advance, statuses_changed, transition
+from .rollups import refresh_rollups
+from .serializers import RentalOrderSerializer
+from .serviceability import check_serviceability
+from .services.shiprocket import TOKEN_CACHE_KEY, ShiprocketAPI, order_payload, return_payload
+
+User = get_user_model()
+
+
+def build_catalog(categories=3, subcategories=3, items_per_sub=4, images_per_item=2):
+    """Small but representative catalog: every FK and image relation populated."""
+    items = []
+    for c in range(categories):
+        cat = Category.objects.create(name=f"Category {c}", slug=f"cat-{c}")
+        for s in range(subcategories):
+            sub = SubCategory.objects.create(category=cat, name=f"Sub {c}.{s}", slug=f"sub-{c}-{s}")
+            for i in range(items_per_sub):
+                item = ClothingItem.objects.create(
+                    category=cat, subcategory=sub, name=f"Item {c}.{s}.{i}",
+                    description="desc", sizes=["S", "M", "L"],
+                    daily_rate=100 + i, security_deposit=500,
+                )
+                for n in range(images_per_item):
+                    ClothingItemImage.objects.create(item=item, image=f"clothing_images/{item.pk}-{n}.jpg")
+                items.append(item)
+    return items
+
+
+def build_orders(user, items, count=10, status="active"):
+    orders = []
+    start = date(2026, 1, 1)
+    for n in range(count):
+        order = RentalOrder.objects.create(
+            user=user, status=status,
+            start_date=start + timedelta(days=10 * n),
+            end_date=start + timedelta(days=10 * n + 2),
+            payment_id=f"order_{n}", shiprocket_shipment_id=f"{n}", shipment_id=f"{n}",
+        )
+        for item in items[n % len(items):n % len(items) + 2]:
+            RentalOrderItem.objects.create(order=order, item=item, size="M")
+        orders.append(order)
+    return orders
+
+
+# max SQL queries, max duplicate queries, max wall time (ms) per endpoint for
+# the dataset above. Staff requests include the session/JWT user lookup.
+API_BUDGETS = {
+    "category-list": (1, 0, 300),
+    "category-detail": (1, 0, 300),
+    "subcategory-list": (1, 0, 300),
+    "subcategory-detail": (1, 0, 300),
+    # the whole menu, when not cached
+    "catalog-tree": (1, 0, 300),
+    "item-list": (2, 0, 500),
+    # + the "often rented with" list
+    "item-detail": (3, 0, 300),
+    "item-list-popular": (2, 0, 500),
+    # ?fields=id,name,daily_rate,primary_image: no joins, no image prefetch
+    "item-list-slim": (1, 0, 300),
+    "order-list": (2, 0, 500),
+    "order-detail": (2, 0, 300),
+    "order-track": (2, 0, 300),
+    "order-list-slim": (1, 0, 300),
+    # one batch: orders, then their line items
+    "order-export": (2, 0, 500),
+    # ?ids= multi-get: the page plus its prefetches, whatever the number of ids
+    "item-multi-get": (2, 0, 300),
+    "order-multi-get": (2, 0, 300),
+    # lock + read the items, check the categories, one bulk UPDATE (+ the
+    # SAVEPOINT/RELEASE pair: the test runs inside a transaction)
+    "item-bulk": (6, 0, 300),
+    # read the statuses, then per current status a transition() batch: lock,
+    # guarded UPDATE, log INSERT (+ savepoints as above)
+    "order-bulk-status": (8, 0, 300),
+    # save() reprices from the order items, then the deposit total reads them again
+    "payment-create": (6, 1, 300),
+    # + the status log row
+    "payment-webhook": (6, 1, 300),
+    # async views: order, its items and their ClothingItems, then the UPDATE
+    "shipping-create-shipment": (5, 0, 300),
+    "shipping-track-shipment": (1, 0, 300),
+    "shipping-create-return": (4, 0, 300),
+    # staff reports: COUNT(*) and one page aggregated from the rollups; categories in one query
+    "report-items": (2, 0, 500),
+    "report-categories": (1, 0, 500),
+    # the order's units; the Shiprocket quote is cached, its miss costs no query
+    "checkout-validate": (1, 0, 300),
+    # cold: the index is built from categories, subcategories and items; warm: in memory
+    "autocomplete": (3, 0, 300),
+    "autocomplete-warm": (0, 0, 100),
+}
+
+# Admin changelists: one COUNT(*) (no full result count, backend.changelist)
+ADMIN_BUDGETS = {
+    "category": (4, 0, 1000),
+    "subcategory": (4, 0, 1000),
+    # + the category and subcategory filter choices
+    "clothingitem": (6, 0, 1000),
+    "clothingitemimage": (4, 0, 1000),
+    "rentalorder": (4, 0, 1000),
+}
+
+
+class EndpointBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="renter@example.com", email="renter@example.com", is_staff=True)
+        cls.items = build_catalog()
+        cls.orders = build_orders(cls.user, cls.items)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertBudget(self, name, method, url, **kwargs):
+        max_queries, max_duplicates, max_ms = API_BUDGETS[name]
+        with QueryBudget(name, max_queries, max_duplicates, max_ms):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, response.content[:500])
+        return response
+
+    def test_catalog_endpoints(self):
+        item, sub, cat = self.items[0], self.items[0].subcategory, self.items[0].category
+        self.assertBudget("category-list", "get", "/api/rentals/categories/")
+        self.assertBudget("category-detail", "get", f"/api/rentals/categories/{cat.pk}/")
+        self.assertBudget("subcategory-list", "get", "/api/rentals/subcategories/")
+        self.assertBudget("subcategory-detail", "get", f"/api/rentals/subcategories/{sub.pk}/")
+        self.assertBudget("catalog-tree", "get", "/api/rentals/catalog-tree/")
+        self.assertBudget("item-list", "get", "/api/rentals/items/")
+        self.assertBudget("item-detail", "get", f"/api/rentals/items/{item.pk}/")
+
+    def test_popularity(self):
+        # the newest orders (3..9) pair items[3..10] with their neighbours
+        with self.captureOnCommitCallbacks(execute=True):
+            for order in self.orders[:3]:
+                order.status = "pending"
+                order.save(update_fields=["status"])
+        call_command("build_popularity", stdout=StringIO())
+
+        ranked = self.assertBudget("item-list-popular", "get", "/api/rentals/items/?ordering=popular&fields=id")
+        ids = [row["id"] for row in ranked.json()]
+        self.assertEqual(len(ids), len(self.items))
+        self.assertEqual(set(ids[:8]), {item.pk for item in self.items[3:11]})
+        self.assertEqual(set(ids[:3]) & {self.items[3].pk, self.items[10].pk}, set())  # booked once each
+        subs = self.client.get("/api/rentals/subcategories/?ordering=popular").json()
+        self.assertEqual(subs[0]["id"], self.items[4].subcategory_id)
+
+        item = self.items[5]
+        related = self.client.get(f"/api/rentals/items/{item.pk}/").json()["related"]
+        self.assertEqual({row["id"] for row in related}, {self.items[4].pk, self.items[6].pk})
+        self.assertTrue(related[0]["primary_image"].endswith("-0.jpg"))
+        self.assertNotIn("related", self.client.get("/api/rentals/items/").json()[0])
+
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.assertBudget("item-list-slim", "get", "/api/rentals/items/?fields=id,name,daily_rate,primary_image")
+        self.assertNotIn("JOIN", queries[0]["sql"])
+        self.assertNotIn("description", queries[0]["sql"])
+        first = res.json()[0]
+        self.assertEqual(set(first), {"id", "name", "daily_rate", "primary_image"})
+        self.assertTrue(first["primary_image"].endswith(f"clothing_images/{first['id']}-0.jpg"))
+
+        item = self.items[0]
+        collapsed = self.client.get(f"/api/rentals/items/{item.pk}/?fields=id,category,images").json()
+        self.assertEqual(collapsed["category"], item.category_id)
+        self.assertEqual(len(collapsed["images"]), 2)
+        self.assertIsInstance(collapsed["images"][0], int)
+        expanded = self.client.get(f"/api/rentals/items/{item.pk}/?fields=id,category&expand=category").json()
+        self.assertEqual(expanded["category"]["slug"], item.category.slug)
+
+        # without ?fields the full representation is unchanged
+        full = self.client.get(f"/api/rentals/items/{item.pk}/").json()
+        self.assertEqual(full["subcategory"]["category_slug"], item.subcategory.category.slug)
+        self.assertTrue(full["primary_image"].endswith(f"clothing_images/{item.pk}-0.jpg"))
+        self.assertIn("description", full)
+
+        orders = self.assertBudget("order-list-slim", "get", "/api/rentals/orders/?fields=id,status,total_price")
+        self.assertEqual(set(orders.json()[0]), {"id", "status", "total_price"})
+
+    def test_order_endpoints(self):
+        order = self.orders[0]
+        self.assertBudget("order-list", "get", "/api/rentals/orders/")
+        self.assertBudget("order-detail", "get", f"/api/rentals/orders/{order.pk}/")
+        with mock.patch("rentals.views.ShiprocketAPI") as api:
+            api.return_value.track_order.return_value = {"tracking_data": {}}
+            self.assertBudget("order-track", "get", f"/api/rentals/orders/{order.pk}/track/")
+
+    def test_batch_endpoints(self):
+        wanted = [item.pk for item in self.items[:6]]
+        res = self.assertBudget("item-multi-get", "get", f"/api/rentals/items/?ids={','.join(map(str, wanted))}")
+        self.assertEqual(sorted(row["id"] for row in res.json()), wanted)
+        self.assertEqual(len(res.json()[0]["images"]), 2)
+        orders = [order.pk for order in self.orders[:4]]
+        res = self.assertBudget("order-multi-get", "get", f"/api/rentals/orders/?ids={','.join(map(str, orders))}")
+        self.assertEqual(sorted(row["id"] for row in res.json()), orders)
+        self.assertEqual(self.client.get("/api/rentals/items/?ids=1,x").status_code, 400)
+
+        sub = self.items[-1].subcategory
+        res = self.assertBudget("item-bulk", "post", "/api/rentals/items/bulk/", data={"items": [
+            {"id": wanted[0], "available": False},
+            {"id": wanted[1], "subcategory_id": sub.pk},
+        ]}, format="json")
+        self.assertEqual(res.json()[1], {"id": wanted[1], "available": True,
+                                         "category_id": sub.category_id, "subcategory_id": sub.pk})
+        self.assertFalse(ClothingItem.objects.get(pk=wanted[0]).available)
+        # a new category alone: the subcategory from the old one is dropped, one already in it kept
+        res = self.client.post("/api/rentals/items/bulk/", {"items": [
+            {"id": wanted[2], "category_id": sub.category_id},
+            {"id": wanted[1], "category_id": sub.category_id},
+        ]}, format="json")
+        self.assertEqual({row["id"]: (row["category_id"], row["subcategory_id"]) for row in res.json()},
+                         {wanted[2]: (sub.category_id, None), wanted[1]: (sub.category_id, sub.pk)})
+        bad = self.client.post("/api/rentals/items/bulk/", {"items": [
+            {"id": wanted[3], "available": False}, {"id": 0, "available": False},
+        ]}, format="json")
+        self.assertEqual((bad.status_code, bad.json()), (400, {"error": "Unknown items: 0"}))
+        self.assertTrue(ClothingItem.objects.get(pk=wanted[3]).available)
+
+        RentalOrder.objects.filter(pk=orders[3]).update(status="completed")
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.assertBudget("order-bulk-status", "post", "/api/rentals/orders/bulk-status/", data={
+                "ids": orders + [0], "status": "shipped",
+            }, format="json")
+        self.assertEqual(res.json(), {"moved": 3, "skipped": [0, orders[3]]})
+        self.assertEqual(OrderStatusLog.objects.filter(to_status="shipped", reason="staff").count(), 3)
+
+        renter = User.objects.create(username="plain@example.com", email="plain@example.com")
+        self.client.force_authenticate(renter)
+        self.assertEqual(self.client.get(f"/api/rentals/orders/?ids={orders[0]}").json(), [])
+        self.assertEqual(self.client.post("/api/rentals/items/bulk/", {"items": []}, format="json").status_code, 403)
+
+    def test_order_export(self):
+        RentalOrder.objects.filter(pk=self.orders[0].pk).update(status="cancelled")
+        with QueryBudget("order-export", *API_BUDGETS["order-export"]):
+            res = self.client.get("/api/rentals/orders/export/?type=csv&status=active&since=2020-01-01")
+            body = b"".join(res.streaming_content).decode()
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment;", res["Content-Disposition"])
+        header, *rows = body.splitlines()
+        self.assertTrue(header.startswith("order_id,created_at,status,user_email"))
+        self.assertEqual(len(rows), 18)  # 9 active orders x 2 line items
+        self.assertTrue(rows[0].startswith(f"{self.orders[1].pk},"))
+        self.assertIn(",order_1,", rows[0])
+
+        res = self.client.get("/api/rentals/orders/export/?type=jsonl")
+        lines = [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(lines[0]["order_id"], self.orders[0].pk)
+        self.assertEqual(len(lines[0]["items"]), 2)
+        self.assertEqual(lines[0]["items"][0]["daily_rate"], "100.00")
+
+        self.assertEqual(self.client.get("/api/rentals/orders/export/?type=xml").status_code, 400)
+        self.assertEqual(self.client.get("/api/rentals/orders/export/?since=2026-02-30").status_code, 400)
+        renter = User.objects.create(username="plain@example.com", email="plain@example.com")
+        self.client.force_authenticate(renter)
+        self.assertEqual(self.client.get("/api/rentals/orders/export/").status_code, 403)
+
+    def test_payment_endpoints(self):
+        order = self.orders[0]
+        RentalOrder.objects.filter(pk=order.pk).update(status="pending")
+        with mock.patch("razorpay.Client") as client:
+            client.return_value.order.create.return_value = {"id": "order_new", "amount": 100, "currency": "INR"}
+            self.assertBudget("payment-create", "post", "/api/rentals/payment/create/", data={
+                "order_id": order.pk, "name": "A", "email": "a@example.com",
+                "phone": "+910000000000", "address": "Pune",
+            }, format="json")
+        with mock.patch("rentals.views.ShiprocketAPI") as api, mock.patch("rentals.views.send_mail"):
+            api.return_value.create_order.return_value = {"order_id": 1, "shipment_id": 2, "awb_code": "AWB"}
+            self.assertBudget("payment-webhook", "post", "/api/rentals/payment/webhook/", data={
+                "event": "payment.captured",
+                "payload": {"payment": {"entity": {"order_id": "order_new"}}},
+            }, format="json")
+
+    def test_shipping_endpoints(self):
+        order = self.orders[1]
+        # the async shipping views authenticate the JWT header themselves
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        with mock.patch("rentals.async_views.AsyncShiprocketAPI") as api:
+            api.return_value.create_order = mock.AsyncMock(return_value={"awb_code": "AWB", "shipment_id": "9"})
+            api.return_value.track_order = mock.AsyncMock(return_value={})
+            api.return_value.create_return_order = mock.AsyncMock(return_value={"shipment_id": "10", "awb_code": "RAWB"})
+            self.assertBudget("shipping-create-shipment", "post", f"/api/rentals/shipping/{order.pk}/create-shipment/")
+            self.assertBudget("shipping-track-shipment", "get", f"/api/rentals/shipping/{order.pk}/track-shipment/")
+            self.assertBudget("shipping-create-return", "post", f"/api/rentals/shipping/{order.pk}/create-return/")
+
+
+    def test_report_endpoints(self):
+        refresh_rollups(date.today(), date.today())
+        page = self.assertBudget("report-items", "get", "/api/rentals/reports/items/").json()
+        self.assertEqual(page["count"], len(self.items))
+        self.assertBudget("report-categories", "get", "/api/rentals/reports/categories/")
+
+    def test_checkout_and_search_endpoints(self):
+        cache.clear()
+        with mock.patch("rentals.serviceability.ShiprocketAPI") as api:
+            api.return_value.serviceability.return_value = COURIERS
+            res = self.assertBudget("checkout-validate", "post", "/api/rentals/checkout/validate/",
+                                    data={"pincode": "560001", "order_id": self.orders[0].pk}, format="json")
+        self.assertTrue(res.json()["serviceable"])
+
+        with mock.patch.object(autocomplete, "_index", None):
+            res = self.assertBudget("autocomplete", "get", "/api/rentals/autocomplete/", data={"q": self.items[0].name[:3]})
+            self.assertTrue(res.json())
+            self.assertBudget("autocomplete-warm", "get", "/api/rentals/autocomplete/", data={"q": self.items[0].name[:3]})
+
+
+class AdminChangelistBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        items = build_catalog()
+        build_orders(cls.admin, items)
+
+    def test_changelists(self):
+        self.client.force_login(self.admin)
+        for model, (max_queries, max_duplicates, max_ms) in ADMIN_BUDGETS.items():
+            with self.subTest(model=model):
+                with QueryBudget(f"admin:{model}", max_queries, max_duplicates, max_ms):
+                    response = self.client.get(f"/api/admin/rentals/{model}/")
+                self.assertEqual(response.status_code, 200)
+
+
+class OrderAdminTests(TestCase):
+    url = "/api/admin/rentals/rentalorder/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.orders = build_orders(cls.admin, build_catalog(1, 1, 2, 0), count=4)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def act(self, action, orders):
+        return self.client.post(self.url, {"action": action, "_selected_action": [o.pk for o in orders]}, follow=True)
+
+    def test_status_action(self):
+        RentalOrder.objects.filter(pk=self.orders[0].pk).update(status="pending")
+        res = self.act("mark_shipped", self.orders[:3])
+        self.assertContains(res, "2 order(s) marked as shipped.")
+        self.assertContains(res, "1 order(s) can")
+        self.assertEqual(
+            list(RentalOrder.objects.order_by("pk").values_list("status", flat=True)),
+            ["pending", "shipped", "shipped", "active"],
+        )
+        self.assertEqual(OrderStatusLog.objects.filter(reason="admin").count(), 2)
+
+    def test_shipment_actions(self):
+        unshipped = self.orders[:2]
+        RentalOrder.objects.filter(pk__in=[o.pk for o in unshipped]).update(shiprocket_shipment_id=None)
+        RentalOrder.objects.filter(pk=self.orders[2].pk).update(status="delivered")
+
+        def create_order(order):
+            if order.pk == unshipped[1].pk:
+                raise RuntimeError("courier down")
+            return {"order_id": 7000 + order.pk, "shipment_id": f"S{order.pk}", "awb_code": f"AWB{order.pk}"}
+
+        with mock.patch("rentals.services.shiprocket_async.AsyncShiprocketAPI") as api:
+            api.return_value.create_order = mock.AsyncMock(side_effect=create_order)
+            api.return_value.create_return_order = mock.AsyncMock(return_value={"shipment_id": "R1", "awb_code": "RAWB"})
+            res = self.act("create_shipments", self.orders)
+            self.assertContains(res, "1 shipment(s) created")
+            self.assertContains(res, "1 shipment(s) failed")
+            # only the delivered order with a forward shipment qualifies for a return
+            res = self.act("create_returns", self.orders)
+            self.assertContains(res, "1 return pickup(s) created")
+
+        orders = RentalOrder.objects.in_bulk([o.pk for o in self.orders])
+        self.assertEqual(orders[unshipped[0].pk].shiprocket_awb, f"AWB{unshipped[0].pk}")
+        self.assertIsNone(orders[unshipped[1].pk].shiprocket_shipment_id)
+        self.assertEqual(orders[self.orders[2].pk].return_shipment_id, "R1")
+        self.assertIsNone(orders[self.orders[3].pk].return_shipment_id)
+
+        # trackable like a shipment the payment webhook created
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with mock.patch("rentals.views.ShiprocketAPI") as api:
+            api.return_value.track_order.return_value = {"tracking_data": {}}
+            res = client.get(f"/api/rentals/orders/{unshipped[0].pk}/track/")
+        self.assertEqual(res.status_code, 200, res.content)
+        api.return_value.track_order.assert_called_once_with(str(7000 + unshipped[0].pk))
+
+    def test_unfiltered_changelist_uses_the_row_estimate(self):
+        with mock.patch("backend.changelist.estimated_rows", return_value=250_000):
+            self.assertEqual(self.client.get(self.url).context["cl"].result_count, 250_000)
+            filtered = self.client.get(self.url, {"status__exact": "active"})
+            self.assertEqual(filtered.context["cl"].result_count, 4)
+
+
+@override_settings(DB_REPLICA_PIN_SECONDS=5)
+@mock.patch("backend.db_router.has_replica", return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def test_catalog_reads_go_to_replica(self, _):
+        self.assertEqual(self.router.db_for_read(ClothingItem), "replica")
+        self.assertIsNone(self.router.db_for_read(RentalOrder))
+        self.assertEqual(self.router.db_for_write(ClothingItem), "default")
+
+    def test_related_reads_follow_the_instance(self, _):
+        self.assertIsNone(self.router.db_for_read(ClothingItemImage, instance=ClothingItem()))
+
+    def test_scoped_order_reads_and_pinning(self, _):
+        with replica_reads(user_id=41):
+            self.assertEqual(self.router.db_for_read(RentalOrder), "replica")
+        self.assertIsNone(self.router.db_for_read(RentalOrder))
+
+        pin_to_primary(41)
+        with replica_reads(user_id=41):
+            self.assertIsNone(self.router.db_for_read(RentalOrder))
+        with replica_reads(user_id=42):
+            self.assertEqual(self.router.db_for_read(RentalOrder), "replica")
+
+
+class SchemaTests(SimpleTestCase):
+    def test_committed_schema_matches_code(self):
+        # regenerate with `manage.py build_schema` after changing the API
+        with redirect_stderr(StringIO()):
+            call_command("build_schema", "--check", stdout=StringIO())
+
+    def test_served_compressed_with_etag(self):
+        res = self.client.get("/api/schema/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn(b'"openapi"', gzip.decompress(res.content))
+
+        res = self.client.get("/api/schema/", HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, 304)
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        item = build_catalog(categories=1, subcategories=1, items_per_sub=1, images_per_item=0)[0]
+        self.image = ClothingItemImage.objects.create(
+            item=item, image=SimpleUploadedFile("Front View.JPG", b"0123456789" * 10),
+        )
+        self.url = self.image.image.url
+
+    def test_uploads_get_content_hashed_immutable_urls(self):
+        self.assertRegex(self.image.image.name, r"^clothing_images/[0-9a-f]{20}\.jpg$")
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), b"0123456789" * 10)
+        self.assertEqual(res["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, 304)
+
+    def test_range_requests(self):
+        res = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res["Content-Range"], "bytes 2-5/100")
+        self.assertEqual(b"".join(res.streaming_content), b"2345")
+
+        res = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(res.streaming_content), b"789")
+
+        res = self.client.get(self.url, HTTP_RANGE="bytes=200-")
+        self.assertEqual(res.status_code, 416)
+
+    @override_settings(MEDIA_SERVE_MODE="accel", MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_offloads_to_front_server(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res["X-Accel-Redirect"], "/protected-media/" + self.image.image.name)
+        self.assertEqual(res.content, b"")
+
+        # a legacy upload under its original name
+        legacy = os.path.join(settings.MEDIA_ROOT, "clothing_images", "Lehenga Ñ 1.jpg")
+        with open(legacy, "wb") as fh:
+            fh.write(b"x")
+        res = self.client.get("/api/media/clothing_images/Lehenga%20%C3%91%201.jpg")
+        self.assertEqual(res["X-Accel-Redirect"], "/protected-media/clothing_images/Lehenga%20%C3%91%201.jpg")
+
+    def test_no_path_traversal(self):
+        # SuspiciousFileOperation
+        self.assertEqual(self.client.get("/api/media/clothing_images/../../manage.py").status_code, 400)
+
+
+class JSONRenderingTests(TestCase):
+    def test_orjson_output_matches_drf(self):
+        data = {
+            "daily_rate": Decimal("149.50"), "total_price": Decimal("0.00"),
+            "start_date": date(2026, 3, 1), "created_at": datetime(2026, 3, 1, 9, 30, 0, 123456, tzinfo=timezone.utc),
+            "name": "Lehenga \u2028", 7: [None, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_round_trip(self):
+        body = ORJSONRenderer().render({"order_id": 5, "items": [{"item": 1, "quantity": 2}]})
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), {"order_id": 5, "items": [{"item": 1, "quantity": 2}]})
+
+    def test_large_payloads_are_compressed(self):
+        build_catalog(categories=2, subcategories=2, items_per_sub=5)
+        plain = self.client.get("/api/rentals/items/")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        res = self.client.get("/api/rentals/items/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        if brotli is not None:
+            res = self.client.get("/api/rentals/items/", HTTP_ACCEPT_ENCODING="gzip, br")
+            self.assertEqual(res["Content-Encoding"], "br")
+            self.assertEqual(brotli.decompress(res.content), plain.content)
+
+        small = self.client.get("/api/rentals/categories/99/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", small)
+
+        # pages with CSRF tokens are never compressed (BREACH)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        page = self.client.get("/api/admin/rentals/clothingitem/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertGreater(len(page.content), 1024)
+        self.assertNotIn("Content-Encoding", page)
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], **rates},
+    })
+
+
+# a Prometheus text-format sample: name{label="value",...} number, with \\ \" \n the only escapes
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][\w:]*(\{[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*"(,[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*")*\})? \S+$')
+
+
+class AsyncClientTests(SimpleTestCase):
+    def test_short_lived_loops_close_their_client(self):
+        async def batch():
+            async with async_client_scope() as client:
+                self.assertIs(get_async_client(), client)
+                async with async_client_scope() as inner:  # nested: the same client
+                    self.assertIs(inner, client)
+            return client
+
+        self.assertTrue(asyncio.run(batch()).is_closed)
+
+        async def unscoped():
+            get_async_client()
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(unscoped())
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    def test_exposition_escapes_label_values(self):
+        # format-suffix routes (items\.(?P<format>...)) put a backslash in the route label
+        self.client.get("/api/rentals/items.json")
+        res = self.client.get("/api/metrics", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(res.status_code, 200)
+        text = res.content.decode()
+        self.assertIn('route="api/rentals/items\\\\.(?P<format>', text)
+        for line in text.splitlines():
+            if not line.startswith("#"):
+                self.assertRegex(line, SAMPLE_RE)
+
+
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username="staff@example.com", email="staff@example.com", is_staff=True)
+        cls.renter = User.objects.create(username="renter@example.com", email="renter@example.com")
+        cls.items = build_catalog(categories=1, subcategories=1, items_per_sub=2, images_per_item=0)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    @throttle_rates(catalog="3/min")
+    def test_anonymous_catalog_reads(self):
+        throttled = ("throttle_requests_total", (("scope", "catalog"), ("result", "throttled")))
+        before = registry.counters[throttled]
+        for url in ("/api/rentals/items/", "/api/rentals/categories/", "/api/rentals/subcategories/"):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/rentals/items/")
+        self.assertEqual(res.status_code, 429)
+        self.assertLessEqual(int(res["Retry-After"]), 60)
+        self.assertEqual(registry.counters[throttled], before + 1)
+        # another client address has its own counter; signed-in users aren't counted
+        self.assertEqual(self.client.get("/api/rentals/items/", REMOTE_ADDR="10.0.0.2").status_code, 200)
+        self.client.force_authenticate(self.renter)
+        self.assertEqual(self.client.get("/api/rentals/items/").status_code, 200)
+
+    @throttle_rates(upload="1/hour")
+    def test_item_writes_are_staff_only(self):
+        item = self.items[0]
+        data = {"name": "Sherwani", "daily_rate": "500.00", "security_deposit": "1000.00", "category": item.category_id}
+        self.assertEqual(self.client.post("/api/rentals/items/", data).status_code, 401)
+        self.client.force_authenticate(self.renter)
+        self.assertEqual(self.client.post("/api/rentals/items/", data).status_code, 403)
+        self.assertEqual(self.client.delete(f"/api/rentals/items/{item.pk}/").status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.patch(f"/api/rentals/items/{item.pk}/", {"available": "false"}).status_code, 200)
+        self.assertEqual(self.client.patch(f"/api/rentals/items/{item.pk}/", {"available": "true"}).status_code, 429)
+        self.assertEqual(self.client.get(f"/api/rentals/items/{item.pk}/").status_code, 200)
+
+
+COURIERS = {"data": {"available_courier_companies": [
+    {"courier_name": "Slow", "rate": 60.0, "estimated_delivery_days": "6"},
+    {"courier_name": "Fast", "rate": 95.5, "estimated_delivery_days": "2"},
+]}}
+
+
+class ServiceabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="renter@example.com", email="renter@example.com")
+        cls.items = build_catalog(categories=1, subcategories=1, items_per_sub=2, images_per_item=0)
+        cls.order = build_orders(cls.user, cls.items, count=1, status="pending")[0]
+        RentalOrderItem.objects.filter(order=cls.order, item=cls.items[0]).update(quantity=2)  # 3 garments: 1.5kg
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch("rentals.serviceability.ShiprocketAPI")
+        self.api = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def validate(self, **data):
+        return self.client.post("/api/rentals/checkout/validate/", data, format="json")
+
+    def test_validate_is_cached_per_pincode_and_weight(self):
+        self.api.serviceability.return_value = COURIERS
+        res = self.validate(pincode="560001")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {
+            "pincode": "560001", "serviceable": True, "shipping_rate": 60.0, "estimated_days": 2,
+            "couriers": [{"courier": "Slow", "rate": 60.0, "days": 6}, {"courier": "Fast", "rate": 95.5, "days": 2}],
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(self.validate(pincode="560001").json(), res.json())
+        self.api.serviceability.assert_called_once_with("411042", "560001", 0.5)
+
+        self.assertEqual(self.validate(pincode="560001", order_id=self.order.pk).status_code, 200)
+        self.api.serviceability.assert_called_with("411042", "560001", 1.5)
+        self.assertEqual(self.validate(pincode="056000").status_code, 400)
+        self.assertEqual(self.validate(pincode="560001", order_id=0).status_code, 404)
+
+    def test_unknown_and_undeliverable_pincodes(self):
+        self.api.serviceability.side_effect = ConnectionError
+        self.assertIsNone(self.validate(pincode="110001").json()["serviceable"])
+        self.api.serviceability.side_effect = None
+        self.api.serviceability.return_value = {}
+        self.assertFalse(self.validate(pincode="110001").json()["serviceable"])  # failures aren't cached
+        self.assertEqual(self.api.serviceability.call_count, 2)
+
+        checkout = {
+            "order_id": self.order.pk, "name": "A", "email": "a@example.com",
+            "phone": "+910000000000", "address": "Delhi", "pincode": "110001",
+        }
+        with mock.patch("razorpay.Client") as client:
+            res = self.client.post("/api/rentals/payment/create/", checkout, format="json")
+            self.assertEqual(res.json(), {"error": "Enter the city and state for this pincode."})
+            res = self.client.post(
+                "/api/rentals/payment/create/", {**checkout, "city": "New Delhi", "state": "Delhi"}, format="json",
+            )
+        self.assertEqual(res.status_code, 400)
+        client.return_value.order.create.assert_not_called()
+        self.assertEqual(self.api.serviceability.call_count, 3)  # 3 garments: another weight bucket
+        # refused before anything was saved
+        self.assertEqual(RentalOrder.objects.filter(pk=self.order.pk).values_list("pincode", "address").get(), ("", "city"))
+
+    @override_settings(UPSTREAM_TIMEOUT=3)
+    def test_timed_out_lookup_is_unknown(self):
+        import requests
+
+        cache.set(TOKEN_CACHE_KEY, "token")
+        with mock.patch("rentals.serviceability.ShiprocketAPI", ShiprocketAPI), \
+                mock.patch("requests.request", side_effect=requests.Timeout) as request:
+            self.assertIsNone(check_serviceability("110001"))
+        self.assertEqual(request.call_args.kwargs["timeout"], 3)
+
+    def test_payloads_use_the_delivery_address(self):
+        self.api.serviceability.return_value = COURIERS
+        with mock.patch("razorpay.Client") as client:
+            client.return_value.order.create.return_value = {"id": "order_new", "amount": 100, "currency": "INR"}
+            res = self.client.post("/api/rentals/payment/create/", {
+                "order_id": self.order.pk, "name": "A", "email": "a@example.com", "phone": "+910000000000",
+                "address": "1 Janpath", "pincode": "110001", "city": "New Delhi", "state": "Delhi",
+            }, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        order = RentalOrder.objects.get(pk=self.order.pk)
+        forward, back = order_payload(order), return_payload(order)
+        self.assertEqual((forward["billing_pincode"], forward["billing_city"], forward["billing_state"]),
+                         ("110001", "New Delhi", "Delhi"))
+        self.assertEqual((back["pickup_pincode"], back["pickup_city"]), ("110001", "New Delhi"))
+        self.assertEqual((back["shipping_pincode"], back["shipping_city"]), ("411042", "Pune"))
+
+    def test_prewarm(self):
+        RentalOrder.objects.filter(pk=self.order.pk).update(pincode="400001")
+        with mock.patch("rentals.services.shiprocket_async.AsyncShiprocketAPI") as api:
+            api.return_value.serviceability = mock.AsyncMock(return_value=COURIERS)
+            out = StringIO()
+            call_command("prewarm_serviceability", "--pincodes", "560001", "--max-units", "2", stdout=out)
+            self.assertIn("Cached 4 lookups for 2 pincodes (0 failed)", out.getvalue())
+            call_command("prewarm_serviceability", "--only-missing", "--max-units", "2", stdout=out)
+            self.assertEqual(api.return_value.serviceability.await_count, 4)
+        self.assertTrue(self.validate(pincode="400001").json()["serviceable"])
+        self.api.serviceability.assert_not_called()
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cat = Category.objects.create(name="Lehengas", slug="lehengas")
+        sub = SubCategory.objects.create(category=cat, name="Bridal Lehengas", slug="bridal-lehengas")
+        names = ["Red Silk Lehenga", "Red Velvet Lehenga", "Ánarkali Suit", "Red Net Lehenga"]
+        cls.items = [
+            ClothingItem.objects.create(category=cat, subcategory=sub, name=name, description="", daily_rate=100)
+            for name in names
+        ]
+        ItemPopularity.objects.create(item=cls.items[1], score=5.0)
+        ClothingItem.objects.filter(pk=cls.items[3].pk).update(available=False)
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(autocomplete, "_index", None))
+
+    def names(self, q, **params):
+        res = self.client.get("/api/rentals/autocomplete/", {"q": q, **params})
+        self.assertEqual(res.status_code, 200)
+        return [row["name"] for row in res.json()]
+
+    def test_prefix_matching_and_ranking(self):
+        # popular first, unavailable last; every typed word prefixes a word of the name
+        self.assertEqual(self.names("re"), ["Red Velvet Lehenga", "Red Silk Lehenga", "Red Net Lehenga"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("red le", limit=1), ["Red Velvet Lehenga"])
+        self.assertEqual(self.names("leh"), [  # equal scores: shortest name first
+            "Red Velvet Lehenga", "Lehengas", "Bridal Lehengas", "Red Silk Lehenga", "Red Net Lehenga",
+        ])
+        self.assertEqual(self.names("anark"), ["Ánarkali Suit"])
+        self.assertEqual(self.names("silk velvet"), [])
+        self.assertEqual(self.names(" "), [])
+
+    def test_signals_patch_the_index(self):
+        self.names("red")  # loads it
+        with mock.patch.object(autocomplete, "build_index", wraps=autocomplete.build_index) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                item = self.items[0]
+                item.name = "Gold Silk Lehenga"
+                item.save()
+                ClothingItem.objects.create(name="Redwood Sherwani", description="", daily_rate=100)
+            self.assertEqual(self.names("red"), ["Red Velvet Lehenga", "Redwood Sherwani", "Red Net Lehenga"])
+            self.assertEqual(self.names("gold"), ["Gold Silk Lehenga"])
+            with self.captureOnCommitCallbacks(execute=True):
+                self.items[1].delete()
+            self.assertEqual(self.names("velvet"), [])
+            build.assert_not_called()
+
+            # another process's changes: replayed from the cache on the next lookup
+            with mock.patch.object(autocomplete, "_index", None), self.captureOnCommitCallbacks(execute=True):
+                self.items[2].name = "Anarkali Gown"
+                self.items[2].save()
+                self.items[0].delete()
+            self.assertEqual(self.names("gown"), ["Anarkali Gown"])
+            self.assertEqual(self.names("gold"), [])
+            build.assert_not_called()
+
+            # a bulk change: rebuilt on the next lookup
+            ClothingItem.objects.filter(pk=self.items[2].pk).update(name="Anarkali Kurta")
+            autocomplete.invalidate()
+            self.assertEqual(self.names("kurta"), ["Anarkali Kurta"])
+            build.assert_called_once()
+
+    @mock.patch("backend.db_router.PrimaryReplicaRouter.db_for_read", return_value="replica")
+    def test_built_from_the_primary(self, _):
+        # rebuilt right after a change: a lagging replica would bring back the old names
+        self.assertEqual(self.names("silk"), ["Red Silk Lehenga"])
+
+
+class CatalogTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sarees = Category.objects.create(name="Sarees", slug="sarees")
+        cls.lehengas = Category.objects.create(name="Lehengas", slug="lehengas")
+        cls.bridal = SubCategory.objects.create(category=cls.lehengas, name="Bridal", slug="bridal")
+        cls.party = SubCategory.objects.create(category=cls.lehengas, name="Party", slug="party")
+        for sub, available in [(cls.bridal, True), (cls.bridal, True), (cls.bridal, False), (None, True)]:
+            ClothingItem.objects.create(
+                category=cls.lehengas, subcategory=sub, name="Lehenga", description="", daily_rate=100, available=available,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def tree(self):
+        res = self.client.get("/api/rentals/catalog-tree/")
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def counts(self):
+        return [
+            (c["slug"], c["available_items"], [(s["slug"], s["available_items"]) for s in c["subcategories"]])
+            for c in self.tree()
+        ]
+
+    def test_tree(self):
+        with self.assertNumQueries(1):
+            tree = self.tree()
+        self.assertEqual(tree[0]["subcategories"][0], {
+            "id": self.bridal.pk, "name": "Bridal", "slug": "bridal", "image": None, "available_items": 2,
+        })
+        # the item in no subcategory counts for its category only
+        self.assertEqual(self.counts(), [("lehengas", 3, [("bridal", 2), ("party", 0)]), ("sarees", 0, [])])
+        with self.assertNumQueries(0):
+            self.tree()
+
+    @mock.patch("backend.db_router.PrimaryReplicaRouter.db_for_read", return_value="replica")
+    def test_read_from_the_primary(self, _):
+        # rebuilt right after a change: a lagging replica would cache the old counts
+        self.assertEqual(self.counts()[0][1], 3)
+
+    def test_changes_rebuild_it(self):
+        self.tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            ClothingItem.objects.create(
+                category=self.sarees, subcategory=SubCategory.objects.create(category=self.sarees, name="Silk", slug="silk"),
+                name="Saree", description="", daily_rate=100,
+            )
+        self.assertEqual(self.counts()[1], ("sarees", 1, [("silk", 1)]))
+
+        item = ClothingItem.objects.filter(subcategory=self.bridal).first()
+        self.client.force_authenticate(User.objects.create(username="staff@example.com", is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                "/api/rentals/items/bulk/", {"items": [{"id": item.pk, "subcategory_id": self.party.pk}]}, format="json",
+            )
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual(self.counts()[0], ("lehengas", 3, [("bridal", 1), ("party", 1)]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sarees.delete()
+        self.assertEqual([slug for slug, *_ in self.counts()], ["lehengas"])
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username="staff@example.com", email="staff@example.com", is_staff=True)
+        cls.items = build_catalog(categories=1, subcategories=1, items_per_sub=2, images_per_item=0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def place_order(self, start, end, status="pending"):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = RentalOrder.objects.create(user=self.staff, status=status, start_date=start, end_date=end)
+            RentalOrderItem.objects.create(order=order, item=self.items[0], quantity=2)
+            RentalOrderItem.objects.create(order=order, item=self.items[1])
+        return order
+
+    def snapshot(self):
+        items = ItemDailyRollup.objects.order_by("day", "item_id").values_list("day", "item_id", "units", "revenue", "deposit_held")
+        categories = CategoryDailyRollup.objects.order_by("day").values_list("day", "rentals_started", "units", "revenue")
+        return list(items), list(categories)
+
+    def test_maintained_as_orders_change(self):
+        order = self.place_order(date(2026, 3, 30), date(2026, 4, 1))
+        self.assertFalse(ItemDailyRollup.objects.exists())  # unpaid
+
+        order = RentalOrder.objects.get(pk=order.pk)
+        order.status = "active"
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save(update_fields=["status"])
+        items, categories = self.snapshot()
+        self.assertEqual(len(items), 6)  # 3 days x 2 items
+        self.assertEqual(items[0], (date(2026, 3, 30), self.items[0].pk, 2, Decimal("200.00"), Decimal("1000.00")))
+        # 2 x 100 + 101 per day; the rental counts once, on its first day
+        self.assertEqual(categories[0], (date(2026, 3, 30), 1, 3, Decimal("301.00")))
+        self.assertEqual(categories[1][1], 0)
+
+        # unrelated saves don't touch the rollups
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.save(update_fields=["payment_id"])
+        self.assertEqual(callbacks, [])
+
+        order.end_date = date(2026, 3, 30)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        self.assertEqual(ItemDailyRollup.objects.count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.items.filter(item=self.items[1]).delete()
+        self.assertEqual(self.snapshot()[1], [(date(2026, 3, 30), 1, 2, Decimal("200.00"))])
+
+        incremental = self.snapshot()
+        ItemDailyRollup.objects.all().delete()
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(self.snapshot(), ([], []))
+
+    def test_refresh_reads_and_writes_in_one_transaction(self):
+        self.place_order(date(2026, 3, 1), date(2026, 3, 2), status="active")
+        with CaptureQueriesContext(connection) as queries:
+            refresh_rollups(date(2026, 3, 1), date(2026, 3, 2))
+        sql = [query["sql"] for query in queries]
+        reads = [i for i, statement in enumerate(sql) if 'FROM "rentals_rentalorderitem"' in statement]
+        self.assertTrue(sql[0].startswith("SAVEPOINT"))
+        self.assertTrue(sql[-1].startswith("RELEASE SAVEPOINT"))
+        self.assertTrue(reads and 0 < reads[0] < len(sql) - 1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CategoryDailyRollup.objects.create(day=date(2026, 3, 1), category=self.items[0].category)
+
+    def test_reports(self):
+        self.place_order(date(2026, 3, 1), date(2026, 3, 3), status="active")
+        self.place_order(date(2026, 4, 1), date(2026, 4, 1), status="completed")
+
+        # COUNT(*) and one page, aggregated in the database
+        with self.assertNumQueries(2):
+            page = self.client.get("/api/rentals/reports/items/?period=2026-03").json()
+        items = page["results"]
+        self.assertEqual(page["count"], 2)
+        self.assertEqual([row["id"] for row in items], [self.items[0].pk, self.items[1].pk])
+        self.assertEqual(items[0]["revenue"], "600.00")
+        self.assertEqual(items[0]["unit_days"], 6)
+        self.assertEqual(items[0]["utilization"], 9.7)  # 3 of 31 days
+        quiet = self.client.get("/api/rentals/reports/items/?period=2026-05&page_size=1").json()
+        self.assertEqual(quiet["results"], [{
+            "id": self.items[0].pk, "name": self.items[0].name, "category": self.items[0].category_id,
+            "rental_days": 0, "unit_days": 0, "revenue": "0.00", "deposit_held": "0.00", "utilization": 0.0,
+        }])
+        self.assertIsNotNone(quiet["next"])
+
+        with self.assertNumQueries(1):
+            days = self.client.get("/api/rentals/reports/categories/?period=2026-03").json()
+        self.assertEqual([row["period"] for row in days], ["2026-03-01", "2026-03-02", "2026-03-03"])
+        months = self.client.get("/api/rentals/reports/categories/?period=2026").json()
+        self.assertEqual([(row["period"], row["revenue"], row["rentals_started"]) for row in months], [
+            ("2026-03-01", "903.00", 1), ("2026-04-01", "301.00", 1),
+        ])
+
+        self.assertEqual(self.client.get("/api/rentals/reports/items/?period=2026-13").status_code, 400)
+        renter = User.objects.create(username="plain@example.com", email="plain@example.com")
+        self.client.force_authenticate(renter)
+        self.assertEqual(self.client.get("/api/rentals/reports/items/").status_code, 403)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="renter@example.com", email="renter@example.com")
+        cls.items = build_catalog(categories=1, subcategories=1, items_per_sub=3, images_per_item=0)
+        # ends Jan 3, 13, 23, Feb 2; the last one is still active
+        cls.orders = build_orders(cls.user, cls.items, count=4, status="completed")
+        RentalOrder.objects.filter(pk=cls.orders[3].pk).update(status="active")
+
+    def test_archives_completed_orders(self):
+        call_command("rebuild_rollups", stdout=StringIO())
+        rollups = list(ItemDailyRollup.objects.order_by("day", "item_id").values_list("day", "item_id", "units"))
+        old = self.orders[0]
+
+        call_command("archive_data", "--before", "2026-02-10", "--batch-size", "2", stdout=StringIO())
+        self.assertEqual(list(RentalOrder.objects.values_list("pk", flat=True)), [self.orders[3].pk])
+        archived = ArchivedRentalOrder.objects.get(pk=old.pk)
+        self.assertEqual((archived.payment_id, archived.created_at), (old.payment_id, old.created_at))
+        self.assertEqual(ArchivedRentalOrderItem.objects.filter(order=archived).count(), 2)
+        self.assertFalse(RentalOrderItem.objects.filter(order_id=old.pk).exists())
+
+        # history still counts, also when rebuilt from the archive
+        self.assertEqual(ItemDailyRollup.objects.count(), len(rollups))
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(list(ItemDailyRollup.objects.order_by("day", "item_id").values_list("day", "item_id", "units")), rollups)
+        stats = annotate_order_stats(User.objects.filter(pk=self.user.pk)).get()
+        self.assertEqual((stats.order_count, stats.last_rental_date), (4, date(2026, 1, 31)))
+
+    def test_archived_orders_readable(self):
+        call_command("archive_data", "--before", "2026-02-10", "--skip-purge", stdout=StringIO())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        detail = client.get(f"/api/rentals/orders/{self.orders[0].pk}/").json()
+        self.assertEqual(detail["status"], "completed")
+        self.assertEqual(set(detail), set(RentalOrderSerializer.Meta.fields))
+        self.assertEqual(len(detail["items"]), 2)
+        self.assertEqual(len(client.get("/api/rentals/orders/").json()), 1)
+        archived = client.get("/api/rentals/orders/?archived=true").json()
+        self.assertEqual([row["id"] for row in archived["results"]], [o.pk for o in reversed(self.orders[:3])])
+        self.assertIsNone(archived["next"])
+        first = client.get("/api/rentals/orders/?archived=true&page_size=2").json()
+        self.assertEqual([row["id"] for row in first["results"]], [self.orders[2].pk, self.orders[1].pk])
+        rest = client.get(first["next"]).json()
+        self.assertEqual([row["id"] for row in rest["results"]], [self.orders[0].pk])
+
+        client.force_authenticate(User.objects.create(username="other@example.com", email="other@example.com"))
+        self.assertEqual(client.get(f"/api/rentals/orders/{self.orders[0].pk}/").status_code, 404)
+
+    def test_exports_include_archived_orders(self):
+        lines = [order.items.count() for order in self.orders]
+        call_command("archive_data", "--before", "2026-02-10", "--skip-purge", stdout=StringIO())
+
+        def export(*args):
+            out = StringIO()
+            with mock.patch("sys.stdout", mock.Mock(buffer=mock.Mock(write=lambda chunk: out.write(chunk.decode())))):
+                call_command("export_orders", "--type", "jsonl", *args)
+            return [json.loads(line) for line in out.getvalue().splitlines()]
+
+        rows = export()
+        self.assertEqual([row["order_id"] for row in rows], [o.pk for o in self.orders])
+        self.assertEqual([len(row["items"]) for row in rows], lines)
+        self.assertEqual(len(export("--status", "active")), 1)
+        self.assertEqual(len(export("--since", "2000-01-01", "--status", "completed")), 3)
+        # created after anything archived: the archive isn't read
+        with self.assertNumQueries(2):
+            self.assertEqual(export("--since", str(django_timezone.localdate() + timedelta(days=1))), [])
+
+    def test_archive_mirrors_live_columns(self):
+        for live, archive in ((RentalOrder, ArchivedRentalOrder), (RentalOrderItem, ArchivedRentalOrderItem)):
+            columns = {f.attname for f in archive._meta.concrete_fields}
+            self.assertLessEqual({f.attname for f in live._meta.concrete_fields}, columns, archive.__name__)
+
+    def test_purges_expired_otps_and_tokens(self):
+        now = django_timezone.now()
+        stale = OTPRequest.create_otp("a@example.com")
+        OTPRequest.objects.filter(pk=stale.pk).update(created_at=now - timedelta(days=2))
+        fresh = OTPRequest.create_otp("a@example.com")
+        expired = OutstandingToken.objects.create(user=self.user, jti="old", token="t", expires_at=now - timedelta(hours=1))
+        BlacklistedToken.objects.create(token=expired)
+        OutstandingToken.objects.create(user=self.user, jti="new", token="t", expires_at=now + timedelta(days=1))
+
+        call_command("archive_data", "--skip-orders", stdout=StringIO())
+        self.assertEqual(list(OTPRequest.objects.values_list("pk", flat=True)), [fresh.pk])
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), ["new"])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class LifecycleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="renter@example.com", email="renter@example.com")
+        cls.items = build_catalog(categories=1, subcategories=1, items_per_sub=2, images_per_item=0)
+
+    def order(self, status, start_in, days=2, **fields):
+        start = django_timezone.localdate() + timedelta(days=start_in)
+        return RentalOrder.objects.create(
+            user=self.user, status=status, start_date=start, end_date=start + timedelta(days=days), **fields,
+        )
+
+    def statuses(self, *orders):
+        return [RentalOrder.objects.get(pk=order.pk).status for order in orders]
+
+    def test_date_rules(self):
+        unpaid_started = self.order("pending", -1)
+        unpaid_waiting = self.order("pending", 5)
+        unpaid_today = self.order("pending", 0)  # may still be at the payment page
+        overdue = self.order("delivered", -20)
+        renting = self.order("active", -1)
+
+        call_command("advance_orders", "--skip-tracking", stdout=StringIO())
+        self.assertEqual(self.statuses(unpaid_started, unpaid_waiting, unpaid_today, overdue, renting),
+                         ["cancelled", "pending", "pending", "completed", "active"])
+        log = OrderStatusLog.objects.get(order_id=overdue.pk)
+        self.assertEqual((log.from_status, log.to_status, log.reason), ("delivered", "completed", "return overdue"))
+
+        # stale unpaid orders no longer block their items
+        RentalOrderItem.objects.create(order=unpaid_started, item=self.items[0], size="M")
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.post("/api/rentals/orders/", {
+            "start_date": str(unpaid_started.start_date), "end_date": str(unpaid_started.end_date),
+            "items": [{"item": self.items[0].pk, "size": "M", "quantity": 1}], "status": "completed",
+        }, format="json")
+        self.assertEqual(res.status_code, 201, res.content)
+        self.assertEqual(res.json()["status"], "pending")  # not client-settable
+
+    def test_payment_after_cancel_is_flagged_for_refund(self):
+        order = self.order("cancelled", -1, payment_id="order_late")
+        with mock.patch("rentals.views.ShiprocketAPI") as api, self.assertLogs("rentals.lifecycle", "WARNING"):
+            res = APIClient().post("/api/rentals/payment/webhook/", {
+                "event": "payment.captured",
+                "payload": {"payment": {"entity": {"id": "pay_1", "order_id": "order_late"}}},
+            }, format="json")
+        self.assertEqual(res.json(), {"message": "Order already cancelled", "refund_required": True})
+        api.assert_not_called()
+        self.assertEqual(self.statuses(order), ["cancelled"])
+        self.assertTrue(OrderStatusLog.objects.filter(order_id=order.pk, reason=REFUND_DUE).exists())
+
+    def test_tracking(self):
+        picked_up = self.order("active", 1, shiprocket_shipment_id="101")
+        delivered = self.order("shipped", 0, shiprocket_shipment_id="102")
+        waiting = self.order("active", 1, shiprocket_shipment_id="103")
+        returning = self.order("delivered", -3, shiprocket_shipment_id="104", return_shipment_id="204")
+        returned = self.order("return_picked", -4, shiprocket_shipment_id="105", return_shipment_id="205")
+        codes = {"101": 1, "102": 2, "103": 0, "204": 1, "205": 2}
+
+        async def track(api, shipment_id):
+            if shipment_id == "103":
+                raise ConnectionError("upstream down")
+            return {shipment_id: {"tracking_data": {"shipment_status": codes[shipment_id]}}}
+
+        with mock.patch("rentals.services.shiprocket_async.AsyncShiprocketAPI.track_order", track):
+            call_command("advance_orders", stdout=StringIO())
+        self.assertEqual(self.statuses(picked_up, delivered, waiting, returning, returned),
+                         ["shipped", "delivered", "active", "return_picked", "completed"])
+        self.assertEqual(OrderStatusLog.objects.filter(reason="tracking").count(), 4)
+
+    def test_transitions_are_checked(self):
+        with self.assertRaises(InvalidTransition):
+            advance(self.order("completed", -10), "active", reason="test")
+        with self.assertRaises(InvalidTransition):
+            transition(RentalOrder.objects.all(), "cancelled", "pending", reason="test")
+
+    def test_orders_moved_elsewhere_are_left_out(self):
+        shipping = self.order("active", 0)
+        other = User.objects.create(username="other@example.com", email="other@example.com")
+        raced = RentalOrder.objects.create(
+            user=other, status="active", start_date=shipping.start_date, end_date=shipping.end_date,
+        )
+        real_update = QuerySet.update
+
+        def update(queryset, **kwargs):
+            # another process cancels `raced` between the batch read and the UPDATE
+            if kwargs == {"status": "shipped"}:
+                real_update(RentalOrder.objects.filter(pk=raced.pk), status="cancelled")
+            return real_update(queryset, **kwargs)
+
+        receiver = mock.Mock()
+        statuses_changed.connect(receiver)
+        self.addCleanup(statuses_changed.disconnect, receiver)
+        with mock.patch.object(QuerySet, "update", update):
+            moved = transition(RentalOrder.objects.all(), "active", "shipped", reason="test")
+        self.assertEqual(moved, 1)
+        self.assertEqual(self.statuses(shipping, raced), ["shipped", "cancelled"])
+        self.assertEqual(list(OrderStatusLog.objects.values_list("order_id", flat=True)), [shipping.pk])
+        self.assertEqual(receiver.call_args.kwargs["user_ids"], {self.user.pk})
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
@@ -6,8 +7,12 @@ from .views import (
     ClothingItemViewSet,
     RentalOrderViewSet,
     PaymentViewSet,
+    CheckoutViewSet,
     RazorpayWebhookView,
     ShippingViewSet,
+    ReportViewSet,
+    AutocompleteView,
+    CatalogTreeView,
 )
 
 router = DefaultRouter()
@@ -16,13 +21,27 @@ router.register(r"subcategories", SubCategoryViewSet, basename="subcategory")
 router.register(r"items", ClothingItemViewSet, basename="item")
 router.register(r"orders", RentalOrderViewSet, basename="order")
 router.register(r"shipping", ShippingViewSet, basename="shipping")
+router.register(r"reports", ReportViewSet, basename="report")
+router.register(r"checkout", CheckoutViewSet, basename="checkout")
 
 # First define the router.urls
 urlpatterns = router.urls
 
+if settings.ASYNC_UPSTREAM_VIEWS:
+    from . import async_views
+
+    # Listed ahead of the router so they shadow the sync ShippingViewSet actions
+    urlpatterns = [
+        path("shipping/<int:pk>/create-shipment/", async_views.create_shipment, name="shipping-create-shipment-async"),
+        path("shipping/<int:pk>/track-shipment/", async_views.track_shipment, name="shipping-track-shipment-async"),
+        path("shipping/<int:pk>/create-return/", async_views.create_return, name="shipping-create-return-async"),
+    ] + urlpatterns
+
 # Then extend it with additional manual paths
 payment_create = PaymentViewSet.as_view({'post': 'create_razorpay_order'})
 urlpatterns += [
     path('payment/create/', payment_create, name='create-razorpay-order'),
     path('payment/webhook/', RazorpayWebhookView.as_view(), name='razorpay-webhook'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('catalog-tree/', CatalogTreeView.as_view(), name='catalog-tree'),
 ]
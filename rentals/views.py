@@ -1,59 +1,307 @@
 # rentals/views.py
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Category, ClothingItem, RentalOrder, SubCategory
-from .serializers import CategorySerializer, ClothingItemSerializer, RentalOrderSerializer, SubCategorySerializer
+from django.db.models import F, OuterRef, Prefetch, Subquery, Sum
+from .models import (
+    ArchivedRentalOrder, Category, ClothingItem, ClothingItemImage, CoRental, RentalOrder, RentalOrderItem, SubCategory,
+)
+from .dynamic_fields import SPARSE_PARAMETERS, DynamicFieldsViewMixin
+from .autocomplete import MAX_LIMIT, suggest
+from .bulk import bulk_set_status, bulk_update_items
+from .catalog_tree import get_tree
+from .exports import CHUNKERS, export_response, export_sources, parse_day
+from .lifecycle import advance, flag_refund
+from .rollups import category_report, item_report, parse_period, with_utilization
+from .serializers import (
+    ArchivedRentalOrderSerializer, CatalogTreeSerializer, CategoryReportSerializer, CategorySerializer,
+    ClothingItemSerializer, ItemBulkChangeSerializer, ItemBulkUpdateSerializer, ItemReportSerializer,
+    OrderBulkStatusResultSerializer, OrderBulkStatusSerializer, RentalOrderSerializer, ServiceabilitySerializer,
+    SubCategorySerializer, SuggestionSerializer,
+)
+from .serviceability import PINCODE_RE, check_serviceability
 from drf_spectacular.utils import extend_schema
-import razorpay
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status, viewsets, permissions
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiParameter, OpenApiTypes
 from rest_framework import serializers
 import hmac
 import hashlib
 from rest_framework.views import APIView
 from django.conf import settings
-from .services.shiprocket import ShiprocketAPI
+from .services.shiprocket import ShiprocketAPI, summarize_tracking
+from backend.db_router import replica_reads
+from backend.metrics import track_external
+from backend.renderers import ORJSONParser
+from backend.throttling import AutocompleteThrottle, CatalogThrottle, UploadThrottle
 from datetime import datetime
 from django.core.mail import send_mail
-import requests
+from django.http import Http404
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+sparse_schema = extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
 
 
+@sparse_schema
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
+    throttle_classes = [CatalogThrottle]
     queryset = Category.objects.all()  # ✅ No parent filtering
 
 
+# ?ordering=popular: precomputed trending score (rentals.popularity), unscored last
+POPULAR_ORDERING = OpenApiParameter("ordering", str, enum=["popular"], description="popular: trending first")
+
+
+# ?ids=1,2,3: a wishlist or cart in one request instead of one per item
+MAX_IDS = 100
+IDS_PARAMETER = OpenApiParameter("ids", str, description=f"Comma-separated ids to fetch (at most {MAX_IDS})")
+
+
+def filter_by_ids(queryset, request):
+    value = request.query_params.get("ids")
+    if value is None:
+        return queryset
+    try:
+        ids = {int(part) for part in value.split(",") if part.strip()}
+    except ValueError:
+        raise serializers.ValidationError({"ids": "Expected comma-separated integer ids."})
+    if len(ids) > MAX_IDS:
+        raise serializers.ValidationError({"ids": f"At most {MAX_IDS} ids per request."})
+    return queryset.filter(pk__in=ids)
+
+
+def order_by_popularity(queryset, request):
+    if request.query_params.get("ordering") == "popular":
+        return queryset.order_by(F("popularity__score").desc(nulls_last=True), "pk")
+    return queryset
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS + [POPULAR_ORDERING]),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
 class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SubCategorySerializer
-    queryset = SubCategory.objects.all()  # ✅ Use SubCategory model, not Category
+    throttle_classes = [CatalogThrottle]
+    queryset = SubCategory.objects.select_related("category")  # ✅ Use SubCategory model, not Category
 
+    def get_queryset(self):
+        return order_by_popularity(super().get_queryset(), self.request)
 
-class ClothingItemViewSet(viewsets.ModelViewSet):
-    queryset         = ClothingItem.objects.all()
-    serializer_class = ClothingItemSerializer
+
+class IsStaffOrReadOnly(permissions.BasePermission):
+    """Anyone may read; only staff may create, change or delete."""
+    def has_permission(self, request, view):
+        return request.method in permissions.SAFE_METHODS or bool(request.user and request.user.is_staff)
+
+
+class AutocompleteView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AutocompleteThrottle]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, required=True, description="What has been typed so far"),
+            OpenApiParameter("limit", int, description=f"Suggestions to return (default 10, at most {MAX_LIMIT})"),
+        ],
+        responses=SuggestionSerializer(many=True),
+        description="Item, subcategory and category names matching the typed prefixes, best first.",
+    )
+    def get(self, request):
+        try:
+            limit = max(int(request.query_params.get("limit", 10)), 1)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+        return Response(SuggestionSerializer(suggest(request.query_params.get("q", ""), limit), many=True).data)
+
+
+class CatalogTreeView(APIView):
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [CatalogThrottle]
+
+    @extend_schema(
+        responses=CatalogTreeSerializer(many=True),
+        description="Every category with its subcategories and their available item counts, for the navigation menu.",
+    )
+    def get(self, request):
+        return Response(CatalogTreeSerializer(get_tree(), many=True, context={"request": request}).data)
+
+
+# Serializer fields backed by a ClothingItem column, for .only() on slim requests
+ITEM_COLUMNS = {
+    "id", "name", "description", "sizes", "daily_rate", "available",
+    "security_deposit", "category", "subcategory",
+}
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS + [POPULAR_ORDERING, IDS_PARAMETER]),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
+class ClothingItemViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
+    serializer_class = ClothingItemSerializer
+    # IsAuthenticatedOrReadOnly first: 401 for anonymous writes, and the schema shows reads as public
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsStaffOrReadOnly]
+    throttle_classes   = [CatalogThrottle, UploadThrottle]
     parser_classes     = [MultiPartParser, FormParser]
 
+    def get_queryset(self):
+        """Join and prefetch only what the requested fields/expansions render."""
+        selection = self.selection
+        items = ClothingItem.objects.all()
+        if selection.wants("category") and selection.expands("category", ClothingItemSerializer.Meta.default_expand):
+            items = items.select_related("category")
+        if selection.wants("subcategory") and selection.expands("subcategory", ClothingItemSerializer.Meta.default_expand):
+            items = items.select_related("subcategory__category")
+        if selection.wants("images"):
+            items = items.prefetch_related("images")
+        elif selection.wants("primary_image"):
+            # one correlated subquery instead of loading every image
+            items = items.annotate(primary_image_name=Subquery(
+                ClothingItemImage.objects.filter(item=OuterRef("pk")).order_by("pk").values("image")[:1]
+            ))
+        if self.action == "retrieve" and selection.wants("related"):
+            items = items.prefetch_related(Prefetch("co_rentals", queryset=(
+                CoRental.objects.filter(related_item__available=True)
+                .select_related("related_item").order_by("rank")
+                .only("item_id", "related_item_id", "related_item__name", "related_item__daily_rate")
+                .annotate(primary_image_name=Subquery(
+                    ClothingItemImage.objects.filter(item=OuterRef("related_item_id")).order_by("pk").values("image")[:1]
+                ))
+            )))
+        if selection.only is not None:
+            items = items.only(*(ITEM_COLUMNS & selection.only | {"id"}))
+        if self.action == "list":
+            items = filter_by_ids(items, self.request)
+        return order_by_popularity(items, self.request)
+
+    @extend_schema(
+        request=ItemBulkUpdateSerializer, responses=ItemBulkChangeSerializer(many=True),
+        description="Staff only: change availability and categories of many items in one transaction.",
+    )
+    @action(
+        detail=False, methods=["post"], url_path="bulk",
+        permission_classes=[permissions.IsAdminUser], parser_classes=[ORJSONParser],
+    )
+    def bulk(self, request):
+        ser = ItemBulkUpdateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        try:
+            items = bulk_update_items(ser.validated_data["items"])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(ItemBulkChangeSerializer(sorted(items, key=lambda item: item.pk), many=True).data)
+
+
+class ArchivePagination(CursorPagination):
+    # keyset pages: no COUNT(*) or OFFSET over an archive that only grows
+    ordering = "-pk"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 @extend_schema(
     request=RentalOrderSerializer,
     responses=RentalOrderSerializer,
     description="Create and manage rental orders"
 )
-class RentalOrderViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[
+    OpenApiParameter(
+        "archived", bool,
+        description="List archived (long-completed) orders instead, newest first, "
+                    "as {next, previous, results} pages",
+    ),
+    OpenApiParameter("cursor", str, description="With archived: the page, from a next/previous link"),
+    OpenApiParameter("page_size", int, description="With archived: orders per page (default 50, at most 500)"),
+    IDS_PARAMETER,
+]))
+class RentalOrderViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = RentalOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
+        orders = RentalOrder.objects.all()
+        if self.selection.wants("items"):
+            orders = orders.prefetch_related("items")
+        if self.action == "list":
+            orders = filter_by_ids(orders, self.request)
         if user.is_staff:  # ✅ Admin/staff users can see all orders
-            return RentalOrder.objects.all()
-        return RentalOrder.objects.filter(user=user)  # ✅ Normal users only see their own
+            return orders
+        return orders.filter(user=user)  # ✅ Normal users only see their own
+
+    # Completed orders move to the archive tables (rentals.archive) with their ids
+    def get_archived_queryset(self):
+        orders = ArchivedRentalOrder.objects.all()
+        if self.selection.wants("items"):
+            orders = orders.prefetch_related("items")
+        if self.request.user.is_staff:
+            return orders
+        return orders.filter(user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("archived") == "true":
+            paginator = ArchivePagination()
+            page = paginator.paginate_queryset(filter_by_ids(self.get_archived_queryset(), request), request, view=self)
+            serializer = ArchivedRentalOrderSerializer(page, many=True, context=self.get_serializer_context())
+            return paginator.get_paginated_response(serializer.data)
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            order = get_object_or_404(self.get_archived_queryset(), pk=kwargs["pk"])
+            return Response(ArchivedRentalOrderSerializer(order, context=self.get_serializer_context()).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("type", str, enum=sorted(CHUNKERS), description="csv (default) or jsonl"),
+            OpenApiParameter("since", OpenApiTypes.DATE, description="Created on or after"),
+            OpenApiParameter("until", OpenApiTypes.DATE, description="Created on or before"),
+            OpenApiParameter("status", str, description="Comma-separated statuses"),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR, (200, "application/x-ndjson"): OpenApiTypes.STR},
+        description="Staff only: stream orders with their line items, payment ids and AWBs.",
+    )
+    @action(detail=False, methods=["get"], url_path="export", permission_classes=[permissions.IsAdminUser])
+    def export(self, request):
+        params = request.query_params
+        kind = params.get("type", "csv")
+        if kind not in CHUNKERS:
+            return Response({"error": f"type must be one of {', '.join(CHUNKERS)}"}, status=400)
+        try:
+            since, until = parse_day(params.get("since")), parse_day(params.get("until"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        statuses = [s for s in params.get("status", "").split(",") if s]
+
+        filename = f"orders-{since or 'start'}-{until or 'now'}.{kind}"
+        return export_response(request, export_sources(since, until, statuses), kind, filename)
+
+    @extend_schema(
+        request=OrderBulkStatusSerializer, responses=OrderBulkStatusResultSerializer,
+        description="Staff only: move many orders to a status in one transaction (allowed transitions only).",
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-status", permission_classes=[permissions.IsAdminUser])
+    def bulk_status(self, request):
+        ser = OrderBulkStatusSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+        moved, skipped = bulk_set_status(data["ids"], data["status"], data["reason"])
+        return Response(OrderBulkStatusResultSerializer({"moved": moved, "skipped": skipped}).data)
 
     @action(detail=True, methods=["get"], url_path="track")
     def track_order(self, request, pk: int = None):
         try:
-            order = self.get_object()
+            with replica_reads(request.user.pk):
+                order = self.get_object()
             if not order.payment_id:
                 return Response({"error": "Order not linked to a shipment"}, status=400)
 
@@ -95,6 +343,9 @@ class PaymentRequestSerializer(serializers.Serializer):
     email = serializers.EmailField()
     phone = serializers.CharField()
     address = serializers.CharField()
+    pincode = serializers.CharField(required=False, help_text="Delivery pincode; undeliverable ones are refused")
+    city = serializers.CharField(required=False, help_text="Required with pincode")
+    state = serializers.CharField(required=False, help_text="Required with pincode")
 
 class PaymentViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -110,33 +361,59 @@ class PaymentViewSet(viewsets.ViewSet):
         except RentalOrder.DoesNotExist:
             return Response({"error": "Order not found."}, status=404)
 
+        # the delivery address: a pincode comes with its city and state
+        delivery_address = {}
+        if data.get("pincode") is not None:
+            pincode = str(data["pincode"])
+            if not PINCODE_RE.match(pincode):
+                return Response({"error": "Enter a valid 6-digit pincode."}, status=400)
+            city, state = (str(data.get(field) or "").strip() for field in ("city", "state"))
+            if not (city and state):
+                return Response({"error": "Enter the city and state for this pincode."}, status=400)
+            delivery_address = {"pincode": pincode, "city": city, "state": state}
+
+        if order.status != "pending":
+            return Response({"error": "This order cannot be paid."}, status=400)
+
+        order_items = list(order.items.select_related("item"))
+
+        # refuse before the order is changed or a Razorpay order exists; an
+        # unknown answer (lookup failed) lets it through
+        pincode = delivery_address.get("pincode", order.pincode)
+        if pincode:
+            delivery = check_serviceability(pincode, sum(item.quantity for item in order_items))
+            if delivery is not None and not delivery["serviceable"]:
+                return Response({"error": f"We don't deliver to {pincode} yet."}, status=400)
+
         # update contact info
         for field in ["name","email","phone","address"]:
             setattr(order, field, data.get(field))
+        for field, value in delivery_address.items():
+            setattr(order, field, value)
         order.save()
 
-        if order.status != "pending":
-            return Response({"error": "This order cannot be paid."}, status=400)
-
         # ✅ total_price already = rental + security deposit
         amount_paise = int(float(order.total_price) * 100)
 
         # ✅ Calculate total security deposit from items
         security_deposit_total = sum(
             item.item.security_deposit * item.quantity
-            for item in order.items.all()
+            for item in order_items
         )
 
+        import razorpay  # heavy SDK (pulls in pkg_resources): load on first payment
+
         client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        razorpay_order = client.order.create({
-            "amount": amount_paise,
-            "currency": "INR",
-            "payment_capture": 1,
-            "notes": {
-                "rental_order_id": str(order.id),
-                "security_deposit": str(security_deposit_total),  # ✅ FIXED
-            }
-        })
+        with track_external("razorpay"):
+            razorpay_order = client.order.create({
+                "amount": amount_paise,
+                "currency": "INR",
+                "payment_capture": 1,
+                "notes": {
+                    "rental_order_id": str(order.id),
+                    "security_deposit": str(security_deposit_total),  # ✅ FIXED
+                }
+            }, timeout=settings.UPSTREAM_TIMEOUT)
 
         order.payment_id = razorpay_order['id']
         order.save(update_fields=["payment_id"])
@@ -148,6 +425,33 @@ class PaymentViewSet(viewsets.ViewSet):
             "currency": razorpay_order["currency"],
             "order": RentalOrderSerializer(order).data,
         })
+class CheckoutValidateSerializer(serializers.Serializer):
+    pincode = serializers.RegexField(PINCODE_RE, error_messages={"invalid": "Enter a valid 6-digit pincode."})
+    order_id = serializers.IntegerField(required=False, help_text="Quote for this order's parcel (default: one garment)")
+
+
+class CheckoutViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(request=CheckoutValidateSerializer, responses=ServiceabilitySerializer)
+    @action(methods=["post"], detail=False, url_path="validate")
+    def validate(self, request):
+        ser = CheckoutValidateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        pincode = ser.validated_data["pincode"]
+        units = 1
+        if "order_id" in ser.validated_data:
+            units = RentalOrderItem.objects.filter(
+                order_id=ser.validated_data["order_id"], order__user=request.user,
+            ).aggregate(units=Sum("quantity"))["units"]
+            if units is None:
+                return Response({"error": "Order not found."}, status=404)
+        delivery = check_serviceability(pincode, units) or {
+            "serviceable": None, "shipping_rate": None, "estimated_days": None, "couriers": [],
+        }
+        return Response(ServiceabilitySerializer({"pincode": pincode, **delivery}).data)
+
+
 class RazorpayWebhookPayloadSerializer(serializers.Serializer):
     event = serializers.CharField()
     payload = serializers.DictField()
@@ -168,8 +472,13 @@ class RazorpayWebhookView(APIView):
             )
             try:
                 order = RentalOrder.objects.get(payment_id=razorpay_order_id)
-                order.status = "active"
-                order.save(update_fields=["status"])
+                if order.status == "cancelled":
+                    # paid after the order expired (rentals.lifecycle): the money has to go back
+                    flag_refund(order, payload.get("payment", {}).get("entity", {}).get("id"))
+                    return Response({"message": "Order already cancelled", "refund_required": True})
+                if order.status != "pending":  # a redelivered event
+                    return Response({"message": f"Order already {order.status}"})
+                advance(order, "active", reason="payment.captured")
 
                 # ✅ Create shipment
                 try:
@@ -238,7 +547,8 @@ class ShippingViewSet(viewsets.ViewSet):
     @action(methods=['get'], detail=True, url_path='track-shipment')
     def track_shipment(self, request, pk=None):
         try:
-            order = RentalOrder.objects.get(pk=pk, user=request.user)
+            with replica_reads(request.user.pk):
+                order = RentalOrder.objects.get(pk=pk, user=request.user)
         except RentalOrder.DoesNotExist:
             return Response({"error": "Order not found"}, status=404)
 
@@ -248,52 +558,10 @@ class ShippingViewSet(viewsets.ViewSet):
         shiprocket = ShiprocketAPI()
         resp = shiprocket.track_order(order.shiprocket_shipment_id)
 
-        # ✅ Extract tracking data safely
-        tracking_data = (
-            resp.get(str(order.shiprocket_shipment_id), {})
-            .get("tracking_data", {})
-        )
-
-        shipment_status = tracking_data.get("shipment_status", "Unknown")
-        track_url = tracking_data.get("track_url")
-        expected_delivery = (
-            tracking_data.get("etd") or
-            tracking_data.get("expected_delivery")
-        )
-
-        # ✅ Calculate days_left
-        days_left = None
-        if expected_delivery:
-            from datetime import datetime
-            try:
-                delivery_date = datetime.strptime(expected_delivery, "%Y-%m-%d").date()
-                today = datetime.today().date()
-                days_left = (delivery_date - today).days
-            except Exception:
-                pass
-        
-        status_map = {
-    0: "Pending Pickup",
-    1: "In Transit",
-    2: "Delivered",
-    3: "Return to Origin Initiated",
-    4: "Return to Origin Delivered",
-    }
-
-        shipment_status_code = tracking_data.get("shipment_status", 0)
-        shipment_status = status_map.get(shipment_status_code, "Unknown")
-
         return Response({
             "order_id": order.id,
             "shipment_id": order.shiprocket_shipment_id,
-            "tracking_info": {
-                "tracking_data": {
-                    "shipment_status": shipment_status,  # ✅ mapped to text
-                    "track_url": tracking_data.get("track_url") or "Not available yet",
-                    "expected_delivery": tracking_data.get("etd") or tracking_data.get("expected_delivery"),
-                }
-            },
-            "days_left": days_left
+            **summarize_tracking(resp, order.shiprocket_shipment_id),
         })
 
     @action(methods=['post'], detail=True, url_path='create-return')
@@ -316,4 +584,61 @@ class ShippingViewSet(viewsets.ViewSet):
         order.return_awb = resp.get("awb_code")
         order.save(update_fields=["return_shipment_id", "return_awb"])
 
-        return Response({"return_shipment": resp})
\ No newline at end of file
+        return Response({"return_shipment": resp})
+
+PERIOD_PARAMETER = OpenApiParameter("period", str, description="YYYY or YYYY-MM (default: this month)")
+
+
+class ReportPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class ReportViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAdminUser]
+
+    def _period(self):
+        try:
+            return parse_period(self.request.query_params.get("period"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+    @extend_schema(
+        parameters=[
+            PERIOD_PARAMETER, OpenApiParameter("category", str, description="Category slug"),
+            OpenApiParameter("page", int, description="Page number"),
+            OpenApiParameter("page_size", int, description="Items per page (default 100, at most 1000)"),
+        ],
+        responses=ItemReportSerializer(many=True),
+        description="Staff only: rental days, revenue and utilization per item, busiest first, "
+                    "as {count, next, previous, results} pages.",
+    )
+    @action(detail=False, methods=["get"], url_path="items")
+    def items(self, request):
+        period = self._period()
+        if isinstance(period, Response):
+            return period
+        paginator = ReportPagination()
+        rows = paginator.paginate_queryset(item_report(*period, category=request.query_params.get("category")), request)
+        return paginator.get_paginated_response(ItemReportSerializer(with_utilization(rows, *period), many=True).data)
+
+    @extend_schema(
+        parameters=[
+            PERIOD_PARAMETER,
+            OpenApiParameter("granularity", str, enum=["day", "month"],
+                             description="Default: day for a month, month for a year"),
+        ],
+        responses=CategoryReportSerializer(many=True),
+        description="Staff only: rentals started, unit-days, revenue and deposit held per category.",
+    )
+    @action(detail=False, methods=["get"], url_path="categories")
+    def categories(self, request):
+        period = self._period()
+        if isinstance(period, Response):
+            return period
+        first, last = period
+        granularity = request.query_params.get("granularity") or ("day" if first.month == last.month else "month")
+        if granularity not in ("day", "month"):
+            return Response({"error": "granularity must be day or month"}, status=400)
+        return Response(CategoryReportSerializer(category_report(first, last, granularity), many=True).data)
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from backend.changelist import LargeTableAdmin
 from .models import CustomUser
 
 @admin.register(CustomUser)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdmin, UserAdmin):
     # show these fields in the user list
     list_display = ("id", "username", "email", "auth_provider", "is_active", "is_staff", "date_joined")
     list_filter = ("auth_provider", "is_staff", "is_superuser", "is_active")
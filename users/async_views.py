@@ -0,0 +1,53 @@
+# users/async_views.py
+"""
+Async GoogleLoginView for ASGI deployments (enabled by ASYNC_UPSTREAM_VIEWS).
+Fetching Google's signing keys, the only network step, is awaited on the
+httpx client (backend.http) instead of blocking a worker thread.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from backend.http import with_async_client
+from backend.throttling import AuthThrottle
+from .serializers import GoogleLoginSerializer
+from .services.google import aprefetch_certs, verify_google_token
+from .views import GoogleLoginView, google_login_result
+
+
+@csrf_exempt
+@require_POST
+@with_async_client
+async def google_login(request):
+    throttle = AuthThrottle()
+    if not throttle.allow_request(request, None):
+        return JsonResponse(
+            {"detail": "Request was throttled."}, status=429, headers={"Retry-After": str(throttle.wait())},
+        )
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        data = request.POST
+    serializer = GoogleLoginSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    token = serializer.validated_data["token"]
+
+    try:
+        await aprefetch_certs()
+        # Verify token against Google's (cached) signing keys
+        idinfo = verify_google_token(token)
+        # the user lookup and token issuing are the sync view's, in one thread hop
+        body, status = await sync_to_async(google_login_result)(idinfo)
+        return JsonResponse(body, status=status)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+
+# Documented in the OpenAPI schema as the DRF view it stands in for
+google_login.cls = GoogleLoginView
+google_login.initkwargs = {}
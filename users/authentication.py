@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _version_key(user_id):
+    return f"auth:user-version:{user_id}"
+
+
+def user_cache_key(user_id):
+    """
+    Cache key for a user, scoped by its current version so a write that
+    races a read can never resurrect a stale row after invalidation.
+    """
+    version = cache.get(_version_key(user_id), 0)
+    return f"auth:user:{user_id}:{version}"
+
+
+def invalidate_cached_user(user_id):
+    """Bump the user's version so every cached copy is ignored."""
+    key = _version_key(user_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from a short-TTL cache instead
+    of running a SELECT on every authenticated request.
+
+    Entries are invalidated from users.signals whenever a user is saved or
+    deleted (deactivation, merge), and expire after AUTH_USER_CACHE_TTL
+    seconds regardless. A queryset.update() sends no signal: a user
+    deactivated that way keeps authenticating until the TTL runs out, unless
+    the caller also calls invalidate_cached_user().
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        ttl = getattr(settings, "AUTH_USER_CACHE_TTL", 0)
+        if user_id is None or not ttl:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # full checks (exists / active / revoked) run on a miss
+            user = super().get_user(validated_token)
+            cache.set(key, user, ttl)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
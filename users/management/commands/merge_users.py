@@ -1,41 +1,115 @@
+from collections import defaultdict
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from rentals.models import RentalOrder
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Lower
+from rentals.models import ArchivedRentalOrder, RentalOrder
+from users.authentication import invalidate_cached_user
+from users.stats import refresh_user_stats, stats_denormalized
 
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = "Merge duplicate Google and OTP users based on email"
-
-    def handle(self, *args, **kwargs):
-        duplicates = {}
-        for user in User.objects.all():
-            email = user.email.lower()
-            if email in duplicates:
-                duplicates[email].append(user)
+    help = "Merge duplicate Google and OTP users based on email (case-insensitive)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report what would be merged without changing anything",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="Number of duplicate emails merged per transaction",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        chunk_size = options["chunk_size"]
+
+        # Only the duplicated emails come back, grouped in the database
+        emails = list(
+            User.objects.filter(email__isnull=False)
+            .annotate(email_lower=Lower("email"))
+            .values("email_lower")
+            .annotate(n=Count("id"))
+            .filter(n__gt=1)
+            .order_by("email_lower")
+            .values_list("email_lower", flat=True)
+        )
+        if not emails:
+            self.stdout.write(self.style.SUCCESS("No duplicate users found."))
+            return
+
+        merged_users = moved_orders = 0
+        for start in range(0, len(emails), chunk_size):
+            chunk = emails[start:start + chunk_size]
+            if dry_run:
+                users, orders = self._report_chunk(chunk)
             else:
-                duplicates[email] = [user]
+                with transaction.atomic():
+                    users, orders = self._merge_chunk(chunk)
+            merged_users += users
+            moved_orders += orders
+
+        prefix = "[dry-run] would merge" if dry_run else "Merged"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {merged_users} duplicate users across {len(emails)} emails, "
+            f"reassigning {moved_orders} orders."
+        ))
+
+    def _groups(self, chunk):
+        groups = defaultdict(list)
+        rows = (
+            User.objects.filter(email__lower__in=chunk)
+            .order_by("id")
+            .values_list("id", "email", "auth_provider")
+        )
+        for user_id, email, provider in rows:
+            groups[email.lower()].append((user_id, provider))
+        return groups
 
-        for email, users in duplicates.items():
-            if len(users) > 1:
-                self.stdout.write(self.style.WARNING(f"Found duplicates for {email}: {[u.id for u in users]}"))
+    def _report_chunk(self, chunk):
+        groups = self._groups(chunk)
+        dup_ids = [uid for users in groups.values() for uid, _ in users[1:]]
+        order_counts = dict(
+            RentalOrder.objects.filter(user_id__in=dup_ids)
+            .values("user_id")
+            .annotate(n=Count("id"))
+            .values_list("user_id", "n")
+        )
+        orders = 0
+        for email, users in groups.items():
+            main_id, dups = users[0][0], [uid for uid, _ in users[1:]]
+            n = sum(order_counts.get(uid, 0) for uid in dups)
+            orders += n
+            self.stdout.write(self.style.WARNING(
+                f"[dry-run] {email}: keep {main_id}, merge {dups} ({n} orders)"
+            ))
+        return len(dup_ids), orders
 
-                # Pick the first as the "main" user
-                main_user = users[0]
+    def _merge_chunk(self, chunk):
+        merged = orders = 0
+        for email, users in self._groups(chunk).items():
+            # Keep the oldest account as the "main" user
+            main_id, main_provider = users[0]
+            dups = [uid for uid, _ in users[1:]]
+            self.stdout.write(self.style.WARNING(f"Found duplicates for {email}: {[uid for uid, _ in users]}"))
 
-                for dup in users[1:]:
-                    # Reassign rental orders to main user
-                    orders = RentalOrder.objects.filter(user=dup)
-                    for order in orders:
-                        order.user = main_user
-                        order.save()
+            # Plain UPDATE: skips RentalOrder.save() and its price recalculation
+            orders += RentalOrder.objects.filter(user_id__in=dups).update(user_id=main_id)
+            orders += ArchivedRentalOrder.objects.filter(user_id__in=dups).update(user_id=main_id)
 
-                    # Merge auth_provider if needed
-                    if dup.auth_provider == "google":
-                        main_user.auth_provider = "google"
-                        main_user.save()
+            # Merge auth_provider if needed
+            if main_provider != "google" and any(p == "google" for _, p in users[1:]):
+                User.objects.filter(pk=main_id).update(auth_provider="google")
+                transaction.on_commit(lambda uid=main_id: invalidate_cached_user(uid))
 
-                    # Delete duplicate user
-                    dup.delete()
+            User.objects.filter(pk__in=dups).delete()
+            if stats_denormalized():
+                refresh_user_stats([main_id])
+            merged += len(dups)
 
-                self.stdout.write(self.style.SUCCESS(f"Merged users for {email} into {main_user.id}"))
+            self.stdout.write(self.style.SUCCESS(f"Merged users for {email} into {main_id}"))
+        return merged, orders
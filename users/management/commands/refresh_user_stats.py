@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from users.stats import refresh_user_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized UserOrderStats table from RentalOrder"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = refresh_user_stats(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed order stats for {written} users."))
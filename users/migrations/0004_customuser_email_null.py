@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def blank_emails_to_null(apps, schema_editor):
+    apps.get_model("users", "CustomUser").objects.filter(email="").update(email=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_userorderstats'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='customuser',
+            name='users_customuser_email_ci_unique',
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True, verbose_name='email address'),
+        ),
+        migrations.RunPython(blank_emails_to_null, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='users_customuser_email_ci_unique'),
+        ),
+    ]
@@ -1,8 +1,14 @@
 import random
 from datetime import timedelta
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# Enables `email__lower=...`, which compiles to LOWER(email) = ... and
+# matches the case-insensitive unique index on CustomUser.email
+models.CharField.register_lookup(Lower)
 
 class OTPRequest(models.Model):
     email      = models.EmailField()
@@ -29,4 +35,38 @@ class CustomUser(AbstractUser):
     )
     auth_provider = models.CharField(
         max_length=20, choices=AUTH_PROVIDERS, default="email"
-    )
\ No newline at end of file
+    )
+    # NULL, not "", when there is none: the unique index below needs no
+    # condition (MySQL ignores conditional constraints) and email__lower
+    # lookups can use it
+    email = models.EmailField(_("email address"), blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower("email"), name="users_customuser_email_ci_unique"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.email:  # forms and normalize_email() give ""
+            self.email = None
+        super().save(*args, **kwargs)
+
+
+class UserOrderStats(models.Model):
+    """
+    Denormalized per-user order totals for the admin user directory.
+    Only maintained when USER_STATS_DENORMALIZED is on (see users.stats).
+    """
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="order_stats"
+    )
+    order_count = models.PositiveIntegerField(default=0)
+    lifetime_spend = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_rental_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-lifetime_spend"]),
+            models.Index(fields=["-last_rental_date"]),
+        ]
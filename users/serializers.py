@@ -20,3 +20,15 @@ class UserSerializer(serializers.ModelSerializer):
             "id", "username", "email", "first_name", "last_name",
             "auth_provider", "is_staff",  "is_active", "date_joined"
         ]
+
+
+class UserDirectorySerializer(UserSerializer):
+    """UserSerializer plus the order stats annotated by users.stats."""
+    order_count = serializers.IntegerField(read_only=True)
+    lifetime_spend = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    last_rental_date = serializers.DateField(read_only=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + [
+            "order_count", "lifetime_spend", "last_rental_date"
+        ]
@@ -0,0 +1,64 @@
+# users/services/google.py
+"""
+Google sign-in helpers. google-auth is imported on first use (see
+google_transport), keeping it out of worker boot and management commands.
+"""
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from backend.metrics import track_external
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+CERTS_CACHE_KEY = "google:oauth2-certs"
+DEFAULT_MAX_AGE = 3600
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+# One transport (and HTTP session) per process
+_request = None
+
+
+def get_request():
+    global _request
+    if _request is None:
+        from .google_transport import CachedCertsRequest
+
+        _request = CachedCertsRequest()
+    return _request
+
+
+async def aprefetch_certs():
+    """
+    Make sure signing keys are cached without blocking the event loop, so the
+    verify_google_token() call that follows is pure local crypto.
+    """
+    request = get_request()
+    if request.has_fresh_certs():
+        return
+    cached = await cache.aget(CERTS_CACHE_KEY)
+    if cached and time.time() < cached[0]:
+        request.use_certs(*cached)
+        return
+    from backend.http import get_async_client
+
+    with track_external("google"):
+        response = await get_async_client().get(GOOGLE_CERTS_URL)
+    await sync_to_async(request.store_certs)(response.status_code, response.headers, response.content)
+
+
+def verify_google_token(token):
+    """
+    Verify a Google ID token and return its claims.
+    The audience is only checked when GOOGLE_CLIENT_ID is configured.
+    """
+    from google.oauth2 import id_token
+
+    return id_token.verify_oauth2_token(
+        token,
+        get_request(),
+        audience=getattr(settings, "GOOGLE_CLIENT_ID", None),
+    )
@@ -0,0 +1,114 @@
+# users/services/google_transport.py
+"""
+google-auth transport with cached signing keys. Kept apart from
+users.services.google so google-auth (and its crypto backends) is only
+imported by the first token verification, not at URLconf load.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from google.auth import exceptions, transport
+from google.auth.transport import requests as google_requests
+
+from backend.metrics import track_external
+from .google import _MAX_AGE_RE, CERTS_CACHE_KEY, DEFAULT_MAX_AGE, GOOGLE_CERTS_URL
+
+
+class _CertsResponse(transport.Response):
+    """Minimal transport response wrapping certificate JSON we already hold."""
+
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def status(self):
+        return 200
+
+    @property
+    def headers(self):
+        return {"content-type": "application/json"}
+
+    @property
+    def data(self):
+        return self._data
+
+
+class CachedCertsRequest(google_requests.Request):
+    """
+    google-auth transport that answers the certs endpoint from cache.
+
+    Keys are kept in process and in the shared Django cache for as long as
+    Google's Cache-Control max-age allows, so after the first login token
+    verification is pure local crypto. When GOOGLE_CERTS_FILE is set the keys
+    are read from that file and the network is never touched, which is what
+    tests and benchmarks use.
+
+    Every other URL goes through one pooled requests.Session.
+    """
+
+    def __init__(self, session=None):
+        super().__init__(session=session)
+        self._lock = threading.Lock()
+        self._certs = None
+        self._expires_at = 0
+        self._file_certs = None
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if method == "GET" and url == GOOGLE_CERTS_URL:
+            return _CertsResponse(self.get_certs())
+        with track_external("google"):
+            return super().__call__(
+                url, method=method, body=body, headers=headers, timeout=timeout or settings.UPSTREAM_TIMEOUT, **kwargs
+            )
+
+    def get_certs(self):
+        certs_file = getattr(settings, "GOOGLE_CERTS_FILE", None)
+        if certs_file:
+            return self._load_file(certs_file)
+
+        now = time.time()
+        if self._certs is not None and now < self._expires_at:
+            return self._certs
+
+        with self._lock:
+            if self._certs is not None and now < self._expires_at:
+                return self._certs
+
+            cached = cache.get(CERTS_CACHE_KEY)
+            if cached and now < cached[0]:
+                return self.use_certs(*cached)
+
+            with track_external("google"):
+                response = super().__call__(GOOGLE_CERTS_URL, method="GET", timeout=settings.UPSTREAM_TIMEOUT)
+            return self.store_certs(response.status, response.headers, response.data)
+
+    def has_fresh_certs(self):
+        if getattr(settings, "GOOGLE_CERTS_FILE", None):
+            return True
+        return self._certs is not None and time.time() < self._expires_at
+
+    def use_certs(self, expires_at, data):
+        """Serve `data` (certs JSON) until `expires_at` (a time.time() value); returns it."""
+        self._expires_at, self._certs = expires_at, data
+        return data
+
+    def store_certs(self, status, headers, data):
+        """Keep a certs response in process and in the shared cache; returns the body."""
+        if status != 200:
+            raise exceptions.TransportError(f"Could not fetch certificates at {GOOGLE_CERTS_URL}")
+        match = _MAX_AGE_RE.search(headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE
+        expires_at = time.time() + max_age
+        cache.set(CERTS_CACHE_KEY, (expires_at, data), max_age)
+        return self.use_certs(expires_at, data)
+
+    def _load_file(self, path):
+        if self._file_certs is None:
+            with open(path, "rb") as fh:
+                data = fh.read()
+            json.loads(data)  # fail loudly on a broken file
+            self._file_certs = data
+        return self._file_certs
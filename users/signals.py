@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rentals.archive import is_archiving, orders_archived
+from rentals.lifecycle import statuses_changed
+from rentals.models import RentalOrder
+
+from .authentication import invalidate_cached_user
+from .stats import refresh_user_stats, stats_denormalized
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    # covers profile edits, deactivation and merge_users deleting duplicates
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=RentalOrder)
+@receiver(post_delete, sender=RentalOrder)
+def update_user_order_stats(sender, instance, origin=None, **kwargs):
+    # orders cascading away with their user: the stats row goes with it
+    if isinstance(origin, User) or getattr(origin, "model", None) is User:
+        return
+    if is_archiving():  # refreshed once per batch by refresh_archived_users
+        return
+    if stats_denormalized():
+        refresh_user_stats([instance.user_id])
+
+
+@receiver(orders_archived)
+@receiver(statuses_changed)
+def refresh_moved_orders_users(sender, user_ids, **kwargs):
+    if stats_denormalized():
+        refresh_user_stats(user_ids)
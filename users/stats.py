@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from rentals.models import ArchivedRentalOrder, RentalOrder
+from .models import UserOrderStats
+
+User = get_user_model()
+
+# Only paid orders count as spend
+SPEND_FILTER = Q(orders__status__in=RentalOrder.PAID_STATUSES)
+
+_ZERO = Value(Decimal("0.00"), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _archived(aggregate, **filters):
+    # per-user aggregate over ArchivedRentalOrder; a subquery, since a second
+    # join next to `orders` would multiply the rows being summed
+    return Subquery(
+        ArchivedRentalOrder.objects.filter(user=OuterRef("pk"), **filters).order_by()
+        .values("user").annotate(value=aggregate).values("value")
+    )
+
+
+def _live_and_archived():
+    # archived orders are all older than any live one
+    return {
+        "order_count": Count("orders") + Coalesce(_archived(Count("id")), Value(0)),
+        "lifetime_spend": (
+            Coalesce(Sum("orders__total_price", filter=SPEND_FILTER), _ZERO)
+            + Coalesce(_archived(Sum("total_price"), status__in=RentalOrder.PAID_STATUSES), _ZERO)
+        ),
+        "last_rental_date": Coalesce(Max("orders__start_date"), _archived(Max("start_date"))),
+    }
+
+
+def stats_denormalized():
+    return getattr(settings, "USER_STATS_DENORMALIZED", False)
+
+
+def annotate_order_stats(queryset):
+    """
+    Add order_count, lifetime_spend and last_rental_date to a user queryset.
+
+    By default they are aggregated over RentalOrder (and ArchivedRentalOrder)
+    in the same query; with
+    USER_STATS_DENORMALIZED they are read from the UserOrderStats table.
+    """
+    if stats_denormalized():
+        return queryset.annotate(
+            order_count=Coalesce(F("order_stats__order_count"), Value(0)),
+            lifetime_spend=Coalesce(F("order_stats__lifetime_spend"), _ZERO),
+            last_rental_date=F("order_stats__last_rental_date"),
+        )
+    return queryset.annotate(**_live_and_archived())
+
+
+def refresh_user_stats(user_ids=None, batch_size=1000):
+    """
+    Recompute UserOrderStats rows, either for the given users or for everyone.
+    Returns the number of rows written.
+    """
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+
+    written = 0
+    batch = []
+    rows = (
+        users.annotate(**_live_and_archived())
+        .order_by("pk")
+        .values_list("pk", "order_count", "lifetime_spend", "last_rental_date")
+    )
+    for user_id, count, spend, last_date in rows.iterator(chunk_size=batch_size):
+        batch.append(UserOrderStats(
+            user_id=user_id, order_count=count,
+            lifetime_spend=spend, last_rental_date=last_date,
+        ))
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+    if batch:
+        written += _upsert(batch)
+    return written
+
+
+def _upsert(batch):
+    UserOrderStats.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["order_count", "lifetime_spend", "last_rental_date", "updated_at"],
+    )
+    return len(batch)
@@ -1,3 +1,300 @@
-from django.test import TestCase
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from requests import Response as HTTPResponse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.query_budget import QueryBudget
+from rentals.models import ArchivedRentalOrder, RentalOrder
+from .authentication import CachedJWTAuthentication, invalidate_cached_user
+from .models import OTPRequest
+from .services.google import CERTS_CACHE_KEY, GOOGLE_CERTS_URL
+from .services.google_transport import CachedCertsRequest
+from .stats import annotate_order_stats, refresh_user_stats
+
+User = get_user_model()
+
+# max SQL queries, max duplicate queries, max wall time (ms) per endpoint.
+# Issuing a refresh token costs one INSERT into the blacklist's outstanding tokens.
+API_BUDGETS = {
+    "user-list": (2, 0, 500),
+    "user-detail": (1, 0, 300),
+    "send-otp": (1, 0, 300),
+    "verify-otp": (3, 0, 300),
+    "google-login": (3, 0, 300),
+}
+
+
+class EndpointBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username="staff@example.com", email="staff@example.com", is_staff=True)
+        for n in range(30):
+            user = User.objects.create(username=f"user{n}@example.com", email=f"user{n}@example.com")
+            for d in range(n % 4):
+                RentalOrder.objects.create(
+                    user=user, status="completed", total_price=100,
+                    start_date=date(2026, 1, 1) + timedelta(days=d),
+                    end_date=date(2026, 1, 2) + timedelta(days=d),
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertBudget(self, name, method, url, **kwargs):
+        max_queries, max_duplicates, max_ms = API_BUDGETS[name]
+        with QueryBudget(name, max_queries, max_duplicates, max_ms):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, response.content[:500])
+        return response
+
+    def test_user_directory(self):
+        self.client.force_authenticate(self.staff)
+        response = self.assertBudget("user-list", "get", "/api/auth/list/?ordering=-lifetime_spend")
+        self.assertEqual(response.data["results"][0]["order_count"], 3)
+        self.assertBudget("user-detail", "get", f"/api/auth/list/{self.staff.pk}/")
+
+    def test_otp_login(self):
+        self.assertBudget("send-otp", "post", "/api/auth/send-otp/", data={"email": "user1@example.com"})
+        otp = OTPRequest.objects.latest("created_at")
+        self.assertBudget("verify-otp", "post", "/api/auth/verify-otp/", data={
+            "email": "user1@example.com", "otp": otp.code,
+        })
+
+    def test_google_login(self):
+        claims = {"email": "user2@example.com", "name": "User Two"}
+        with mock.patch("users.async_views.verify_google_token", return_value=claims), \
+                mock.patch("users.async_views.aprefetch_certs"):
+            self.assertBudget("google-login", "post", "/api/auth/google-login/", data={"token": "t"})
+
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "auth": "2/min"},
+    })
+    def test_auth_endpoints_are_throttled(self):
+        cache.clear()
+        for _ in range(2):
+            self.assertEqual(self.client.post("/api/auth/send-otp/", {"email": "user1@example.com"}).status_code, 200)
+        with self.assertNumQueries(0):
+            res = self.client.post("/api/auth/verify-otp/", {"email": "user1@example.com", "otp": "000000"})
+        self.assertEqual(res.status_code, 429)
+        res = self.client.post("/api/auth/google-login/", {"token": "t"})
+        self.assertEqual(res.status_code, 429)
+        self.assertIn("Retry-After", res)
+
+
+class AdminChangelistBudgetTests(TestCase):
+    def test_user_changelist(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        for n in range(20):
+            User.objects.create(username=f"user{n}", email=f"user{n}@example.com")
+        self.client.force_login(admin)
+        # one COUNT(*): no full result count (backend.changelist)
+        with QueryBudget("admin:customuser", 4, 0, 1000):
+            response = self.client.get("/api/admin/users/customuser/")
+        self.assertEqual(response.status_code, 200)
+
+
+# the duplicates merge_users cleans up predate the case-insensitive email
+# constraint; the test drops it inside its transaction to create them
+@skipUnless(connection.features.can_rollback_ddl, "drops a constraint inside the test transaction")
+class MergeUsersTests(TestCase):
+    def setUp(self):
+        constraint = next(c for c in User._meta.constraints if c.name == "users_customuser_email_ci_unique")
+        connection.SchemaEditorClass(connection).remove_constraint(User, constraint)
+
+        self.main = User.objects.create(username="asha", email="Asha@Example.com")
+        self.google = User.objects.create(username="asha-google", email="asha@example.com", auth_provider="google")
+        self.otp = User.objects.create(username="asha-otp", email="ASHA@EXAMPLE.COM")
+        self.other = User.objects.create(username="ravi", email="ravi@example.com")
+        self.live = RentalOrder.objects.create(
+            user=self.google, status="active", total_price=100,
+            start_date=date(2026, 1, 1), end_date=date(2026, 1, 2),
+        )
+        self.archived = ArchivedRentalOrder.objects.create(
+            id=self.live.pk + 1000, user=self.otp, status="completed", total_price=100,
+            start_date=date(2025, 1, 1), end_date=date(2025, 1, 2), created_at=timezone.now(),
+        )
+
+    def merge(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("merge_users", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        out = self.merge("--dry-run")
+        self.assertIn(f"keep {self.main.pk}, merge {[self.google.pk, self.otp.pk]} (1 orders)", out)
+        self.assertEqual(User.objects.count(), 4)
+        self.assertEqual(RentalOrder.objects.get().user_id, self.google.pk)
+        self.assertEqual(ArchivedRentalOrder.objects.get().user_id, self.otp.pk)
+        self.assertEqual(User.objects.get(pk=self.main.pk).auth_provider, "email")
+
+    def test_merges_into_the_oldest_account(self):
+        out = self.merge()
+        self.assertIn("Merged 2 duplicate users across 1 emails, reassigning 2 orders.", out)
+        self.assertEqual(set(User.objects.values_list("pk", flat=True)), {self.main.pk, self.other.pk})
+        self.assertEqual(RentalOrder.objects.get().user_id, self.main.pk)
+        self.assertEqual(ArchivedRentalOrder.objects.get().user_id, self.main.pk)
+        # signs in with Google through the kept account from now on
+        self.assertEqual(User.objects.get(pk=self.main.pk).auth_provider, "google")
+
+        self.assertIn("No duplicate users found.", self.merge())
+
+
+class EmailConstraintTests(TestCase):
+    def test_emails_unique_ignoring_case(self):
+        User.objects.create(username="asha", email="Asha@Example.com")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create(username="asha-2", email="asha@example.COM")
+        # users without an email don't collide
+        User.objects.create(username="no-email-1", email="")
+        User.objects.create(username="no-email-2", email="")
+        self.assertEqual(User.objects.filter(email__isnull=True).count(), 2)
+
+    def test_lookup_uses_the_index(self):
+        plan = User.objects.filter(email__lower="asha@example.com").explain()
+        self.assertIn("users_customuser_email_ci_unique", plan)
+
+
+class OrderStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.live = User.objects.create(username="live@example.com", email="live@example.com")
+        cls.archived = User.objects.create(username="old@example.com", email="old@example.com")
+        cls.both = User.objects.create(username="both@example.com", email="both@example.com")
+        User.objects.create(username="none@example.com", email="none@example.com")
+        for user, status, price, start in [
+            (cls.live, "completed", 100, date(2026, 3, 1)),
+            (cls.live, "pending", 40, date(2026, 4, 1)),  # not paid: counted, not spent
+            (cls.both, "active", 250, date(2026, 2, 1)),
+        ]:
+            RentalOrder.objects.create(user=user, status=status, total_price=price,
+                                       start_date=start, end_date=start + timedelta(days=1))
+        for n, (user, status, price, start) in enumerate([
+            (cls.archived, "completed", 80, date(2025, 5, 1)),
+            (cls.archived, "cancelled", 60, date(2025, 6, 1)),
+            (cls.both, "completed", 120, date(2025, 1, 1)),
+        ]):
+            ArchivedRentalOrder.objects.create(
+                id=10_000 + n, user=user, status=status, total_price=price,
+                start_date=start, end_date=start + timedelta(days=1), created_at=timezone.now(),
+            )
+
+    def stats(self):
+        users = annotate_order_stats(User.objects.order_by("pk"))
+        return list(users.values_list("username", "order_count", "lifetime_spend", "last_rental_date"))
+
+    def test_denormalized_stats_match_the_aggregates(self):
+        with override_settings(USER_STATS_DENORMALIZED=False):
+            aggregated = self.stats()
+        self.assertEqual(refresh_user_stats(), 4)
+        with override_settings(USER_STATS_DENORMALIZED=True):
+            self.assertEqual(self.stats(), aggregated)
+
+        self.assertEqual(aggregated, [
+            ("live@example.com", 2, 100, date(2026, 4, 1)),
+            ("old@example.com", 2, 80, date(2025, 6, 1)),
+            ("both@example.com", 2, 370, date(2026, 2, 1)),
+            ("none@example.com", 0, 0, None),
+        ])
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="asha@example.com", email="asha@example.com")
+        self.token = AccessToken.for_user(self.user)
+        self.auth = CachedJWTAuthentication()
+
+    def test_cached_after_first_lookup(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.auth.get_user(self.token), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.auth.get_user(self.token), self.user)
+
+    def test_saves_and_deletes_invalidate(self):
+        self.auth.get_user(self.token)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+        self.user.is_active = True
+        self.user.save(update_fields=["is_active"])
+        self.auth.get_user(self.token)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+    def test_queryset_update_needs_explicit_invalidation(self):
+        self.auth.get_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.auth.get_user(self.token), self.user)  # no signal: still cached
+        invalidate_cached_user(self.user.pk)
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+
+CERTS = b'{"kid": "-----BEGIN CERTIFICATE-----"}'
+
+
+@override_settings(GOOGLE_CERTS_FILE=None)
+class CachedCertsRequestTests(SimpleTestCase):
+    def setUp(self):
+        cache.delete(CERTS_CACHE_KEY)
+
+    def session(self, cache_control="public, max-age=120"):
+        response = HTTPResponse()
+        response.status_code = 200
+        response.headers["Cache-Control"] = cache_control
+        response._content = CERTS
+        session = mock.Mock()
+        session.request.return_value = response
+        return session
+
+    def test_cached_for_max_age(self):
+        session = self.session()
+        request = CachedCertsRequest(session=session)
+        self.assertEqual(request(GOOGLE_CERTS_URL).data, CERTS)
+        self.assertEqual(request(GOOGLE_CERTS_URL).data, CERTS)
+        self.assertEqual(session.request.call_count, 1)
+        self.assertTrue(request.has_fresh_certs())
+
+        cache.delete(CERTS_CACHE_KEY)
+        with mock.patch("time.time", return_value=time.time() + 121):
+            self.assertFalse(request.has_fresh_certs())
+            request.get_certs()
+        self.assertEqual(session.request.call_count, 2)
+
+    def test_other_processes_use_the_shared_cache(self):
+        CachedCertsRequest(session=self.session()).get_certs()
+        session = self.session()
+        self.assertEqual(CachedCertsRequest(session=session).get_certs(), CERTS)
+        session.request.assert_not_called()
+
+    def test_offline_from_file(self):
+        session = self.session()
+        with tempfile.NamedTemporaryFile(suffix=".json") as fh:
+            fh.write(CERTS)
+            fh.flush()
+            with override_settings(GOOGLE_CERTS_FILE=fh.name):
+                request = CachedCertsRequest(session=session)
+                self.assertTrue(request.has_fresh_certs())
+                self.assertEqual(request(GOOGLE_CERTS_URL).data, CERTS)
+        session.request.assert_not_called()
+        self.assertIsNone(cache.get(CERTS_CACHE_KEY))
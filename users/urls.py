@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import SendOTPView, VerifyOTPView, GoogleLoginView, UserViewSet
 
 
+if settings.ASYNC_UPSTREAM_VIEWS:
+    from .async_views import google_login as google_login_view
+else:
+    google_login_view = GoogleLoginView.as_view()
+
 router = DefaultRouter()
 router.register("list", UserViewSet, basename="user-list")
 
@@ -11,6 +17,6 @@ router.register("list", UserViewSet, basename="user-list")
 urlpatterns = [
     path("send-otp/", SendOTPView.as_view(), name="send-otp"),
     path("verify-otp/", VerifyOTPView.as_view(), name="verify-otp"),
-    path("google-login/", GoogleLoginView.as_view(), name="google-login"),
+    path("google-login/", google_login_view, name="google-login"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
@@ -1,20 +1,24 @@
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from google.oauth2 import id_token
-from google.auth.transport import requests
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, filters
+from rest_framework.pagination import PageNumberPagination
+from backend.throttling import AuthThrottle
 from .models import OTPRequest
-from .serializers import SendOTPSerializer, VerifyOTPSerializer, GoogleLoginSerializer, UserSerializer
+from .serializers import SendOTPSerializer, VerifyOTPSerializer, GoogleLoginSerializer, UserDirectorySerializer
+from .stats import annotate_order_stats
+from .services.google import verify_google_token
 
 User = get_user_model()
 
 class SendOTPView(generics.GenericAPIView):
     serializer_class = SendOTPSerializer
+    throttle_classes = [AuthThrottle]
 
     def post(self, request, *args, **kwargs):
         ser = self.get_serializer(data=request.data)
@@ -33,6 +37,7 @@ class SendOTPView(generics.GenericAPIView):
 
 class VerifyOTPView(generics.GenericAPIView):
     serializer_class = VerifyOTPSerializer
+    throttle_classes = [AuthThrottle]
 
     def post(self, request, *args, **kwargs):
         ser = self.get_serializer(data=request.data)
@@ -48,7 +53,7 @@ class VerifyOTPView(generics.GenericAPIView):
             return Response({"detail": "OTP has expired."}, status=status.HTTP_400_BAD_REQUEST)
 
         # ✅ Always check if user exists by email
-        user = User.objects.filter(email=email).first()
+        user = User.objects.filter(email__lower=email.lower()).first()
         if not user:
             user = User.objects.create(username=email, email=email, auth_provider="email")
 
@@ -65,9 +70,52 @@ class VerifyOTPView(generics.GenericAPIView):
 
 
 
+def google_login_result(idinfo):
+    """
+    Sign in (creating on first login) the user behind verified Google ID token
+    claims and issue their JWTs. Returns (body, status); shared by
+    GoogleLoginView and the async users.async_views.google_login.
+    """
+    email = idinfo.get("email")
+    name = idinfo.get("name")
+
+    if not email:
+        return {"error": "Google account has no email"}, status.HTTP_400_BAD_REQUEST
+
+    # ✅ Always check if user exists by email
+    user = User.objects.filter(email__lower=email.lower()).first()
+    if user:
+        # Update provider if necessary
+        if user.auth_provider != "google":
+            user.auth_provider = "google"
+            user.save()
+    else:
+        # Create new user if not exist
+        user = User.objects.create(
+            username=email,
+            email=email,
+            first_name=name,
+            auth_provider="google",
+        )
+
+    # ✅ Issue JWT
+    refresh = RefreshToken.for_user(user)  # writes an OutstandingToken row
+    return {
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "name": user.first_name,
+            "auth_provider": user.auth_provider,
+        }
+    }, status.HTTP_200_OK
+
+
 class GoogleLoginView(generics.GenericAPIView):
     serializer_class = GoogleLoginSerializer
     permission_classes = []  # allow anyone
+    throttle_classes = [AuthThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -76,42 +124,9 @@ class GoogleLoginView(generics.GenericAPIView):
         token = serializer.validated_data["token"]
 
         try:
-            # Verify token with Google
-            idinfo = id_token.verify_oauth2_token(token, requests.Request())
-            email = idinfo.get("email")
-            name = idinfo.get("name")
-
-            if not email:
-                return Response({"error": "Google account has no email"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # ✅ Always check if user exists by email
-            user = User.objects.filter(email=email).first()
-            if user:
-                # Update provider if necessary
-                if user.auth_provider != "google":
-                    user.auth_provider = "google"
-                    user.save()
-            else:
-                # Create new user if not exist
-                user = User.objects.create(
-                    username=email,
-                    email=email,
-                    first_name=name,
-                    auth_provider="google",
-                )
-
-            # ✅ Issue JWT
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "name": user.first_name,
-                    "auth_provider": user.auth_provider,
-                }
-            })
+            # Verify token against Google's (cached) signing keys
+            body, code = google_login_result(verify_google_token(token))
+            return Response(body, status=code)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -122,11 +137,54 @@ class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
+class UserDirectoryPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint to list all users (for admin panel).
     Only accessible by staff/admins.
+
+    Each user carries order_count, lifetime_spend and last_rental_date,
+    computed in the same query. Supports ?search= (email/name),
+    ?auth_provider=, ?is_active=, ?has_orders= and ?rented_since=YYYY-MM-DD.
     """
-    queryset = User.objects.all().order_by("-date_joined")
-    serializer_class = UserSerializer
-    permission_classes = [IsAdminUser]
\ No newline at end of file
+    serializer_class = UserDirectorySerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = UserDirectoryPagination
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ["email", "first_name", "last_name", "username"]
+    ordering_fields = ["date_joined", "order_count", "lifetime_spend", "last_rental_date"]
+    ordering = ["-date_joined"]
+
+    def get_queryset(self):
+        qs = User.objects.all()
+        params = self.request.query_params
+
+        auth_provider = params.get("auth_provider")
+        if auth_provider:
+            qs = qs.filter(auth_provider=auth_provider)
+
+        is_active = params.get("is_active")
+        if is_active in ("true", "false"):
+            qs = qs.filter(is_active=is_active == "true")
+
+        qs = annotate_order_stats(qs)
+
+        has_orders = params.get("has_orders")
+        if has_orders == "true":
+            qs = qs.filter(order_count__gt=0)
+        elif has_orders == "false":
+            qs = qs.filter(order_count=0)
+
+        try:
+            rented_since = parse_date(params.get("rented_since", ""))
+        except ValueError:
+            rented_since = None
+        if rented_since:
+            qs = qs.filter(last_rental_date__gte=rented_since)
+
+        return qs